@@ -1,7 +1,8 @@
 """
 CryptVault - Professional File Encryption System
 
-A secure file encryption library using Fernet (AES-128-CBC) with PBKDF2 key derivation.
+A secure file encryption library using AES-256-GCM / ChaCha20-Poly1305 (with
+legacy Fernet AES-128-CBC support) and PBKDF2 key derivation.
 
 Basic Usage:
     >>> from cryptvault import CryptVault
@@ -25,14 +26,33 @@ Advanced Usage:
     >>>
     >>> # List saved keys
     >>> keys = vault.list_keys()
+    >>>
+    >>> # Encrypt a whole directory tree concurrently
+    >>> results = vault.encrypt_batch(["projects/"], "backup/", password="ProjectPass123")
+    >>>
+    >>> # Pin a cipher suite instead of benchmarking the host
+    >>> vault = CryptVault(cipher="chacha20-poly1305")
 
 For more information, see the documentation in docs/
 """
 
 from .file_encryption_sandbox import CryptVault
+from .catalog import Catalog
+from .keystore import KeyStore, KeyRecord
+from .container import ContainerError, select_cipher
+from .storage import StorageBackend, LocalStorage, DirectoryStorage, S3Storage
+from .scheduler import BatchScheduler, BatchResult
+from .workqueue import WorkQueue
+from .progress import Progress, ProgressTracker
+from .throttle import Throttle
 
 __version__ = "1.0.0"
 __author__ = "Pawored"
 __email__ = "zogoxi-gobo52@protonmail.com"
 
-__all__ = ['CryptVault']
+__all__ = [
+    'CryptVault', 'Catalog', 'KeyStore', 'KeyRecord', 'ContainerError', 'select_cipher',
+    'StorageBackend', 'LocalStorage', 'DirectoryStorage', 'S3Storage',
+    'BatchScheduler', 'BatchResult', 'WorkQueue', 'Progress', 'ProgressTracker',
+    'Throttle',
+]
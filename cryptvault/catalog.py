@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Sandbox Catalog
+SQLite index of every file written by the vault, so questions like "which
+files use key X" or "how big is the sandbox" never need a filesystem crawl.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+
+
+SORT_COLUMNS = {
+    'created': 'created',
+    'size': 'stored_size',
+    'name': 'name',
+    'key': 'key_id',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT,
+    plaintext_size INTEGER,
+    stored_size INTEGER NOT NULL,
+    key_id TEXT,
+    cipher TEXT,
+    created TEXT NOT NULL,
+    plaintext_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_key ON files(key_id);
+CREATE INDEX IF NOT EXISTS idx_files_created ON files(created);
+CREATE INDEX IF NOT EXISTS idx_files_size ON files(stored_size);
+CREATE INDEX IF NOT EXISTS idx_files_name ON files(name);
+"""
+
+
+def _location(path: Union[Path, str]) -> str:
+    """Catalog key for a file: resolved local path, or a storage URI as-is."""
+    if isinstance(path, str) and '://' in path:
+        return path
+    return str(Path(path).resolve())
+
+
+class Catalog:
+    """Indexed record of the files produced by a CryptVault sandbox."""
+
+    FILENAME = ".catalog.db"
+
+    def __init__(self, db_path: Path):
+        """Initialize catalog (the database is opened on first use).
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._conn = None
+        # One connection shared by batch worker threads, serialized by a lock
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def record(self, path: Union[Path, str], kind: str, stored_size: int, created: str,
+               source: Optional[str] = None, plaintext_size: Optional[int] = None,
+               key_id: Optional[str] = None, cipher: Optional[str] = None,
+               plaintext_hash: Optional[str] = None) -> None:
+        """Insert or replace the entry for an output file.
+
+        Args:
+            path: Output file path or storage URI
+            kind: 'encrypted' or 'decrypted'
+            stored_size: Size of the output file in bytes
+            created: ISO timestamp
+            source: Input file the output was produced from
+            plaintext_size: Size of the plaintext in bytes
+            key_id: Saved key used, if any
+            cipher: Cipher suite of the encrypted data
+            plaintext_hash: Hex SHA-256 of the plaintext, or "<algorithm>:<hex>"
+                for other digests (e.g. "blake2b:...")
+        """
+        location = _location(path)
+        name = location.rsplit('/', 1)[-1] if '://' in location else Path(location).name
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, name, kind, source, plaintext_size, "
+                "stored_size, key_id, cipher, created, plaintext_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (location, name, kind, source, plaintext_size, stored_size,
+                 key_id, cipher, created, plaintext_hash),
+            )
+
+    def get(self, path: Union[Path, str]) -> Optional[Dict[str, Any]]:
+        """Entry for one file, or None if it is not cataloged."""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM files WHERE path = ?", (_location(path),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def remove(self, path: Union[Path, str]) -> None:
+        """Drop the entry for a file."""
+        self.remove_many([path])
+
+    def remove_many(self, paths: List[Union[Path, str]]) -> None:
+        """Drop the entries for several files in one transaction."""
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?",
+                                  [(_location(path),) for path in paths])
+
+    def _where(self, key_id: Optional[str] = None, kind: Optional[str] = None,
+               cipher: Optional[str] = None, name: Optional[str] = None,
+               created_before: Optional[str] = None,
+               created_after: Optional[str] = None) -> tuple[str, list]:
+        clauses, params = [], []
+        for column, value in (('key_id', key_id), ('kind', kind), ('cipher', cipher)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if name is not None:
+            clauses.append("name GLOB ?")
+            params.append(name)
+        if created_before is not None:
+            clauses.append("created < ?")
+            params.append(created_before)
+        if created_after is not None:
+            clauses.append("created >= ?")
+            params.append(created_after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, sort: str = 'created', descending: bool = False,
+              limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        """Query catalog entries.
+
+        Args:
+            sort: Sort field ('created', 'size', 'name' or 'key')
+            descending: Reverse the sort order
+            limit: Maximum number of rows
+            **filters: key_id, kind, cipher, name (glob), created_before,
+                created_after (ISO timestamps)
+
+        Returns:
+            List of entry dictionaries
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort field '{sort}'. Choose from: {', '.join(SORT_COLUMNS)}")
+        where, params = self._where(**filters)
+        sql = f"SELECT * FROM files{where} ORDER BY {SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def summary(self, **filters: Any) -> Dict[str, int]:
+        """Count and total stored size of matching entries."""
+        where, params = self._where(**filters)
+        with self._lock:
+            count, total = self.conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(stored_size), 0) FROM files{where}", params
+            ).fetchone()
+        return {'count': count, 'total_size': total}
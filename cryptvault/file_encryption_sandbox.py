@@ -2,27 +2,70 @@
 # -*- coding: utf-8 -*-
 """
 CryptVault - Professional File Encryption System
-Secure file encryption using Fernet (AES-128-CBC) with PBKDF2 key derivation.
+Secure file encryption using AES-256-GCM / ChaCha20-Poly1305 (or legacy
+Fernet AES-128-CBC) with PBKDF2 key derivation.
 """
 
+import io
 import os
 import sys
 import json
 import base64
+import glob
+import hashlib
+import shutil
+import signal
+import threading
 import argparse
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, TextIO, Iterable, Iterator, Callable, List
 
 try:
-    from cryptography.fernet import Fernet
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    from cryptography.fernet import Fernet, InvalidToken
 except ImportError:
     print("ERROR: cryptography package not installed")
     print("Install with: pip install cryptography>=42.0.0")
     sys.exit(1)
 
+from .catalog import Catalog, SORT_COLUMNS
+from .storage import (
+    DURABILITY_NONE, DURABILITY_POLICIES, TEMP_SUFFIX,
+    StorageBackend, LocalStorage, storage_from_url,
+)
+from .container import (
+    AEAD_CIPHERS, CIPHERS, CIPHER_AUTO, CIPHER_FERNET, MAGIC, TAG_SIZE, DEFAULT_SEGMENT_SIZE,
+    DEFAULT_DIGEST, DEFAULT_VERIFY_WORKERS, DIGESTS,
+    ContainerError, DigestError, IntegrityReport, PrefixedReader, SegmentCipher, SegmentError,
+    build_header, data_key, encode_header, merkle_header, read_header, recipients_header,
+    rewrite_header, segment_leaves, verify_container, wrap_key,
+    encrypt_stream, decrypt_stream, is_container, select_cipher,
+)
+from .journal import Journal, source_fingerprint
+from .kdf import derive_keys, pbkdf2_key
+from .iomode import IO_CACHED, IO_MODES, IO_STREAMING, STREAMING_BUFFER_SIZE, check_io_mode, io_streams
+from .throttle import Throttle
+from .tuning import DEFAULT_SAMPLE_SIZE, Tuning, TuningCache, benchmark
+from .watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, Watcher
+from .sparse import ExtentMap, ExtentHasher, SparseReader, data_extents
+from .volumes import (
+    VOLUME_MAGIC, VolumeError, VolumeReader, VolumeReport, VolumeWriter,
+    is_volume_index, part_path, read_index, verify_volumes,
+)
+from .keystore import KeyStore, KeyRecord
+from .progress import ProgressCallback, ProgressTracker, format_progress, track
+from .workqueue import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, WorkQueue, run_worker
+from .scheduler import (
+    DEFAULT_WORKERS, DEFAULT_MEMORY_BUDGET, BatchScheduler, BatchTask, BatchResult, walk_files,
+)
+
+# Key-store name recorded for outputs written to a stream
+STREAM_NAME = "<stream>"
+# Invalid lines listed when a key import is rejected
+MAX_REPORTED_ERRORS = 20
+
 
 class CryptVault:
     """Main encryption/decryption engine for CryptVault."""
@@ -31,44 +74,44 @@ class CryptVault:
     PBKDF2_ITERATIONS = 600000
     SALT_LENGTH = 16
 
-    def __init__(self, sandbox_dir: str = "sandbox"):
+    def __init__(self, sandbox_dir: str = "sandbox", cipher: str = CIPHER_AUTO,
+                 storage: Optional[StorageBackend] = None,
+                 durability: str = DURABILITY_NONE):
         """Initialize CryptVault with sandbox directory.
 
         Args:
             sandbox_dir: Directory for encrypted files and key storage
+            cipher: Cipher suite for new files ('auto', 'aes-256-gcm',
+                'chacha20-poly1305' or 'fernet')
+            storage: Backend for encrypted files (default: local filesystem)
+            durability: fsync policy for local outputs ('none', 'file' or
+                'batch'; with 'batch', call sync() at the end of each batch)
         """
         self.sandbox_dir = Path(sandbox_dir)
         self.sandbox_dir.mkdir(exist_ok=True)
-        self.keys_file = self.sandbox_dir / ".keys.json"
-        self._keys_cache = None
-
-    def _load_keys(self) -> Dict[str, Any]:
-        """Load saved keys from .keys.json file."""
-        if self._keys_cache is not None:
-            return self._keys_cache
-
-        if not self.keys_file.exists():
-            self._keys_cache = {}
-            return self._keys_cache
-
-        try:
-            with open(self.keys_file, 'r') as f:
-                self._keys_cache = json.load(f)
-            return self._keys_cache
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"WARNING: Error loading keys file: {e}")
-            self._keys_cache = {}
-            return self._keys_cache
-
-    def _save_keys(self, keys: Dict[str, Any]) -> None:
-        """Save keys to .keys.json file."""
-        try:
-            with open(self.keys_file, 'w') as f:
-                json.dump(keys, f, indent=2)
-            self._keys_cache = keys
-        except IOError as e:
-            print(f"ERROR: Failed to save keys: {e}")
-            raise
+        # Session state: PBKDF2 results and the shared password-only key
+        # entry, reused while a session is open (see session())
+        self._session_depth = 0
+        self._session_lock = threading.Lock()
+        self._kdf_locks: Dict[tuple, threading.Lock] = {}
+        self._kdf_cache: Dict[tuple, bytes] = {}
+        self._session_keys: Dict[str, tuple[bytes, str]] = {}
+        self.cipher = self._resolve_cipher(cipher)
+        self.catalog = Catalog(self.sandbox_dir / Catalog.FILENAME)
+        self.local = LocalStorage(durability=durability)
+        self.storage = storage or self.local
+        self.keystore = KeyStore(self.sandbox_dir, self.local)
+        self.keys_file = self.keystore.path
+        self.tuning = TuningCache(self.sandbox_dir, self.local)
+
+    @staticmethod
+    def _resolve_cipher(cipher: str) -> str:
+        """Validate a cipher name, benchmarking the host for 'auto'."""
+        if cipher == CIPHER_AUTO:
+            return select_cipher()
+        if cipher not in CIPHERS:
+            raise ValueError(f"Unsupported cipher '{cipher}'. Choose from: {', '.join(CIPHERS)}")
+        return cipher
 
     def _derive_key_from_password(self, password: str, salt: Optional[bytes] = None) -> tuple[bytes, bytes]:
         """Derive encryption key from password using PBKDF2.
@@ -82,155 +125,177 @@ class CryptVault:
         """
         if salt is None:
             salt = os.urandom(self.SALT_LENGTH)
+        return pbkdf2_key(password, salt, self.PBKDF2_ITERATIONS), salt
+
+    def _password_key(self, password: str, salt: bytes) -> bytes:
+        """Derive the key for a password and salt, once per session."""
+        if not self._session_depth:
+            key, _ = self._derive_key_from_password(password, salt)
+            return key
+        cache_key = (password, salt)
+        with self._session_lock:
+            lock = self._kdf_locks.setdefault(cache_key, threading.Lock())
+        # Per-entry lock: concurrent workers wait for one derivation instead
+        # of each running it, while different salts still derive in parallel
+        with lock:
+            if cache_key not in self._kdf_cache:
+                self._kdf_cache[cache_key], _ = self._derive_key_from_password(password, salt)
+            return self._kdf_cache[cache_key]
+
+    def _prime_password_keys(self, password: str, salts: Iterable[bytes],
+                             workers: Optional[int] = None) -> int:
+        """Derive a session's password keys for many salts at once, in parallel.
+
+        Keys already cached are skipped; later _password_key calls for these
+        salts are cache hits.
 
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=self.PBKDF2_ITERATIONS,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        return key, salt
+        Returns:
+            Number of keys derived
+        """
+        if not self._session_depth:
+            raise RuntimeError("Password keys can only be primed inside a session")
+        with self._session_lock:
+            missing = [salt for salt in set(salts) if (password, salt) not in self._kdf_cache]
+        keys = derive_keys(password, missing, self.PBKDF2_ITERATIONS, workers)
+        with self._session_lock:
+            for salt, key in keys.items():
+                self._kdf_cache[(password, salt)] = key
+        return len(keys)
+
+    @contextmanager
+    def session(self):
+        """Share password key derivations across every file in a run.
+
+        Inside a session each (password, salt) pair goes through PBKDF2 only
+        once, and password-only encryption derives a single master key whose
+        key entry is shared by all files of the session instead of creating
+        one entry (and one KDF) per file. Container files still get unique
+        per-file data keys: each header carries a random salt that HKDF
+        combines with the master key. Sessions nest; cached keys are dropped
+        when the outermost one ends.
+        """
+        with self._session_lock:
+            self._session_depth += 1
+        try:
+            yield self
+        finally:
+            with self._session_lock:
+                self._session_depth -= 1
+                if not self._session_depth:
+                    self._kdf_cache.clear()
+                    self._kdf_locks.clear()
+                    self._session_keys.clear()
+
+    def _session_master_key(self, password: str) -> tuple[bytes, str]:
+        """Master key and key ID for password-only encryption in a session."""
+        with self._session_lock:
+            lock = self._kdf_locks.setdefault(('master', password), threading.Lock())
+        with lock:
+            if password not in self._session_keys:
+                salt = os.urandom(self.SALT_LENGTH)
+                key = self._password_key(password, salt)
+                key_id = self.keystore.create({
+                    'type': 'password',
+                    'salt': base64.b64encode(salt).decode(),
+                    'created': datetime.now().isoformat(),
+                    'session': True,
+                })
+                self._session_keys[password] = (key, key_id)
+            return self._session_keys[password]
 
     def _generate_random_key(self) -> bytes:
         """Generate a random Fernet key."""
         return Fernet.generate_key()
 
-    def encrypt_file(self, input_path: str, output_path: Optional[str] = None,
-                     password: Optional[str] = None, key_name: Optional[str] = None) -> tuple[str, str]:
-        """Encrypt a file.
+    def _encryption_key(self, output_name: str, password: Optional[str] = None,
+                        key_name: Optional[str] = None) -> tuple[bytes, str]:
+        """Resolve (or create and save) the key for a new encrypted output.
 
         Args:
-            input_path: Path to file to encrypt
-            output_path: Output path (default: sandbox/filename.encrypted)
+            output_name: Output filename recorded in the key store
             password: Password for encryption
             key_name: Name of saved key to use
 
         Returns:
-            Tuple of (output_path, key_id)
+            Tuple of (key_bytes, key_id)
         """
-        input_path = Path(input_path)
-        if not input_path.exists():
-            raise FileNotFoundError(f"Input file not found: {input_path}")
-
-        # Determine output path
-        if output_path is None:
-            output_path = self.sandbox_dir / f"{input_path.name}.encrypted"
-        else:
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Get or generate encryption key
         if key_name:
             # Use saved key
-            keys = self._load_keys()
-            if key_name not in keys:
+            key_data = self.keystore.get(key_name)
+            if key_data is None:
                 raise ValueError(f"Saved key '{key_name}' not found. Use save-key command first.")
 
-            key_data = keys[key_name]
             if key_data['type'] == 'password':
                 if not password:
                     raise ValueError(f"Password required for key '{key_name}'")
-                salt = base64.b64decode(key_data['salt'])
-                key, _ = self._derive_key_from_password(password, salt)
+                key = self._password_key(password, base64.b64decode(key_data['salt']))
             else:  # type == 'key'
                 key = base64.b64decode(key_data['key'])
 
             # Update usage stats
-            keys[key_name].setdefault('files', [])
-            if str(output_path.name) not in keys[key_name]['files']:
-                keys[key_name]['files'].append(str(output_path.name))
-            self._save_keys(keys)
+            self.keystore.add_file(key_name, output_name)
 
             key_id = key_name
 
+        elif password and self._session_depth:
+            # One master key per password for the whole session
+            key, key_id = self._session_master_key(password)
+            self.keystore.add_file(key_id, output_name)
+
         elif password:
             # Derive key from password
             key, salt = self._derive_key_from_password(password)
 
             # Save key with timestamp
-            key_id = f"key_{datetime.now().isoformat()}"
-            keys = self._load_keys()
-            keys[key_id] = {
+            key_id = self.keystore.create({
                 'type': 'password',
                 'salt': base64.b64encode(salt).decode(),
                 'created': datetime.now().isoformat(),
-                'files': [str(output_path.name)]
-            }
-            self._save_keys(keys)
+            }, files=[output_name])
 
         else:
             # Generate random key
             key = self._generate_random_key()
 
             # Save key with timestamp
-            key_id = f"key_{datetime.now().isoformat()}"
-            keys = self._load_keys()
-            keys[key_id] = {
+            key_id = self.keystore.create({
                 'type': 'key',
                 'key': base64.b64encode(key).decode(),
                 'created': datetime.now().isoformat(),
-                'files': [str(output_path.name)]
-            }
-            self._save_keys(keys)
-
-        # Encrypt file
-        fernet = Fernet(key)
-        with open(input_path, 'rb') as f:
-            plaintext = f.read()
-
-        encrypted = fernet.encrypt(plaintext)
+            }, files=[output_name])
 
-        with open(output_path, 'wb') as f:
-            f.write(encrypted)
+        return key, key_id
 
-        return str(output_path), key_id
-
-    def decrypt_file(self, input_path: str, output_path: Optional[str] = None,
-                     password: Optional[str] = None, key: Optional[str] = None,
-                     key_name: Optional[str] = None) -> str:
-        """Decrypt a file.
+    def _decryption_key(self, input_name: str, password: Optional[str] = None,
+                        key: Optional[str] = None, key_name: Optional[str] = None,
+                        header: Optional[Dict[str, Any]] = None) -> tuple[bytes, Optional[str]]:
+        """Resolve the key for an encrypted input.
 
         Args:
-            input_path: Path to encrypted file
-            output_path: Output path (default: sandbox/filename.decrypted)
+            input_name: Encrypted filename (used to find the salt for password-only decryption)
             password: Password for decryption
             key: Direct key (base64)
             key_name: Name of saved key
+            header: Container header of the input; for password-only
+                decryption of a shared container, picks the saved key whose
+                password opens one of its recipient entries
 
         Returns:
-            Output file path
+            Tuple of (key_bytes, key_id or None for direct keys)
         """
-        input_path = Path(input_path)
-        if not input_path.exists():
-            raise FileNotFoundError(f"Encrypted file not found: {input_path}")
-
-        # Determine output path
-        if output_path is None:
-            # Remove .encrypted extension if present
-            base_name = input_path.stem
-            if base_name.endswith('.encrypted'):
-                base_name = base_name[:-10]  # Remove .encrypted
-            output_path = self.sandbox_dir / f"{base_name}.decrypted"
-        else:
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Get decryption key
         if key_name:
             # Use saved key by name
-            keys = self._load_keys()
-            if key_name not in keys:
+            key_data = self.keystore.get(key_name)
+            if key_data is None:
                 raise ValueError(f"Saved key '{key_name}' not found")
 
-            key_data = keys[key_name]
             if key_data['type'] == 'password':
                 if not password:
                     raise ValueError(f"Password required for key '{key_name}'")
-                salt = base64.b64decode(key_data['salt'])
-                decryption_key, _ = self._derive_key_from_password(password, salt)
+                decryption_key = self._password_key(password, base64.b64decode(key_data['salt']))
             else:  # type == 'key'
                 decryption_key = base64.b64decode(key_data['key'])
+            return decryption_key, key_name
 
         elif key:
             # Use direct key
@@ -238,41 +303,884 @@ class CryptVault:
                 decryption_key = base64.b64decode(key)
             except Exception:
                 decryption_key = key.encode()
+            return decryption_key, None
 
         elif password:
             # Need to find the salt from saved keys
-            # Try to find matching file in saved keys
-            keys = self._load_keys()
-            found_key = None
-
-            for key_id, key_data in keys.items():
-                if key_data['type'] == 'password':
-                    if str(input_path.name) in key_data.get('files', []):
-                        salt = base64.b64decode(key_data['salt'])
-                        decryption_key, _ = self._derive_key_from_password(password, salt)
-                        found_key = key_id
-                        break
-
-            if not found_key:
-                raise ValueError("Cannot decrypt: file not found in saved keys. Use -n to specify key name or -k for direct key.")
+            fallback = None
+            for key_id, salt in self._password_candidates(input_name, header):
+                candidate = self._password_key(password, salt)
+                if not header or 'recipients' not in header:
+                    return candidate, key_id
+                try:
+                    data_key(header, candidate)
+                    return candidate, key_id
+                except ContainerError:
+                    # Wrong password, or another recipient's key; keep looking
+                    fallback = fallback or (candidate, key_id)
+            if fallback is not None:
+                return fallback
+
+            raise ValueError("Cannot decrypt: file not found in saved keys. Use -n to specify key name or -k for direct key.")
         else:
             raise ValueError("Must provide password, key, or key-name for decryption")
 
-        # Decrypt file
+    def _password_candidates(self, input_name: str,
+                             header: Optional[Dict[str, Any]] = None) -> Iterator[tuple[str, bytes]]:
+        """(key_id, salt) of the saved password keys that may open an input.
+
+        Keys that encrypted the filename, newest first; for a shared
+        container only those in its recipient list.
+        """
+        recipients = header.get('recipients') if header else None
+        ids = {entry['id'] for entry in recipients} if recipients is not None else None
+        for key_id in self.keystore.owners(input_name):
+            key_data = self.keystore.get(key_id)
+            if key_data is None or key_data['type'] != 'password':
+                continue
+            if ids is not None and key_id not in ids:
+                continue
+            yield key_id, base64.b64decode(key_data['salt'])
+
+    def _batch_salts(self, inputs: Iterable[str], pattern: str, legacy_only: bool = False) -> set:
+        """Salts password-only decryption of a batch will derive keys for.
+
+        Mirrors _decryption_key: the newest password key of each file, or
+        every password recipient of a shared container. With
+        ``legacy_only``, containers are left out.
+        """
+        salts = set()
+        for path, _ in walk_files(inputs, pattern):
+            header = None
+            with open(path, 'rb') as f:
+                if is_container(f.read(len(MAGIC))):
+                    if legacy_only:
+                        continue
+                    f.seek(0)
+                    try:
+                        header = read_header(f)[0]
+                    except ContainerError:
+                        pass
+            for _, salt in self._password_candidates(path.name, header):
+                salts.add(salt)
+                if not header or 'recipients' not in header:
+                    break
+        return salts
+
+    @staticmethod
+    def _encrypt_to(src: BinaryIO, dst: BinaryIO, key: bytes, cipher: str, hasher: Any,
+                    extent_map: Optional[ExtentMap] = None, throttle: Optional[Throttle] = None,
+                    size: Optional[int] = None, recipients: Optional[Dict[str, bytes]] = None,
+                    segment_size: int = DEFAULT_SEGMENT_SIZE) -> None:
+        """Encrypt ``src`` into ``dst`` with the given cipher suite.
+
+        With an extent map, ``src`` yields only the data extents (a
+        SparseReader) and the map is stored in the container header.
+        With a ``size`` (bytes ``src`` will yield), the container gets a
+        Merkle tree and stores the plaintext digest of ``hasher``. With ``recipients`` (vault key per key ID, ``key``
+        among them), a random data key is wrapped for each of them. A
+        throttle's crypto limit is held while the cipher runs.
+        """
+        crypto_limit = throttle.crypto if throttle else None
+        if cipher == CIPHER_FERNET:
+            # Fernet tokens are not segmented, so the whole input is buffered
+            plaintext = src.read()
+            hasher.update(plaintext)
+            with crypto_limit or nullcontext():
+                token = Fernet(key).encrypt(plaintext)
+            dst.write(token)
+            return
+
+        fields = extent_map.to_header() if extent_map is not None else {}
+        if size is not None:
+            fields.update(merkle_header(size), digest=hasher.name)
+        if recipients:
+            fields.update(recipients_header(recipients))
+        if extent_map is not None:
+            hasher = ExtentHasher(hasher, extent_map)
+        encrypt_stream(src, dst, key, cipher, hasher=hasher,
+                       header=build_header(cipher, segment_size, **fields), crypto_limit=crypto_limit)
+        if extent_map is not None:
+            hasher.finish()
+
+    @staticmethod
+    def _decrypt_to(src: BinaryIO, dst: BinaryIO, key: bytes, hasher: Any,
+                    seek_holes: bool = True, throttle: Optional[Throttle] = None) -> str:
+        """Decrypt ``src`` into ``dst``, detecting the format.
+
+        Args:
+            seek_holes: Recreate holes of sparse containers by seeking ``dst``
+                (False writes zeros, for streams)
+            throttle: Run limits (its crypto limit is held while the cipher runs)
+
+        Returns:
+            Cipher suite of the input
+        """
+        crypto_limit = throttle.crypto if throttle else None
+        prefix = src.read(len(MAGIC))
+        src = PrefixedReader(prefix, src)
+        if is_container(prefix):
+            return decrypt_stream(src, dst, key, hasher=hasher, seek_holes=seek_holes,
+                                  crypto_limit=crypto_limit)['cipher']
+
+        # Legacy Fernet token
+        token = src.read()
+        with crypto_limit or nullcontext():
+            decrypted = Fernet(key).decrypt(token)
+        hasher.update(decrypted)
+        dst.write(decrypted)
+        return CIPHER_FERNET
+
+    @staticmethod
+    def _rehash(stream: BinaryIO, size: int, hasher: Any, chunk_size: int = 1024 * 1024) -> None:
+        """Feed the first ``size`` bytes of a stream into a hasher."""
+        stream.seek(0)
+        while size > 0:
+            chunk = stream.read(min(chunk_size, size))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size -= len(chunk)
+
+    @staticmethod
+    def _throttled(throttle: Optional[Throttle], src: BinaryIO, dst: BinaryIO) -> tuple[BinaryIO, BinaryIO]:
+        """Meter an operation's input and output against a throttle's I/O rate."""
+        if throttle is None:
+            return src, dst
+        return throttle.reader(src), throttle.writer(dst)
+
+    @staticmethod
+    def _tracker(progress: Any, total: Optional[int], name: str) -> tuple[Optional[ProgressTracker], bool]:
+        """Tracker for one operation, and whether this operation owns it.
+
+        ``progress`` is a callback, or a ProgressTracker shared by a batch.
+        """
+        if progress is None:
+            return None, False
+        if isinstance(progress, ProgressTracker):
+            return progress, False
+        return ProgressTracker(progress, total, name), True
+
+    def _encrypt_resumable(self, input_path: Path, output_path: Path, password: Optional[str],
+                           key_name: Optional[str], cipher: str, hasher: Any,
+                           tracker: Optional[ProgressTracker] = None,
+                           extent_map: Optional[ExtentMap] = None,
+                           io_mode: str = IO_CACHED, throttle: Optional[Throttle] = None,
+                           size: Optional[int] = None,
+                           recipients: Optional[Dict[str, Optional[str]]] = None,
+                           segment_size: int = DEFAULT_SEGMENT_SIZE) -> str:
+        """Encrypt through a staging file and checkpoint journal.
+
+        Returns:
+            Key ID used for encryption
+        """
+        journal = Journal(output_path)
+        fingerprint = source_fingerprint(input_path)
+        state = journal.load('encrypt', fingerprint)
+        if state and not state['segments_done']:
+            # Nothing staged to check a key against: start over
+            journal.discard()
+            state = None
+
+        if state:
+            # Continue with the key and header of the interrupted run
+            key, _ = self._decryption_key(output_path.name, password, key_name=state['key_id'])
+            self._check_resume_key(journal, state, key)
+        else:
+            key, key_id = self._encryption_key(output_path.name, password, key_name)
+            fields = extent_map.to_header() if extent_map else {}
+            if size is not None:
+                fields.update(merkle_header(size), digest=hasher.name)
+            if recipients is not None:
+                # The wrapped data key is kept in the journaled header
+                fields.update(recipients_header(
+                    self._recipient_keys(output_path.name, key, key_id, recipients)))
+            state = {
+                'operation': 'encrypt',
+                'fingerprint': fingerprint,
+                'key_id': key_id,
+                'header': build_header(cipher, segment_size, **fields),
+                'segments_done': 0,
+            }
+            journal.save(state)
+
+        header = state['header']
+        done = state['segments_done']
+        segment_size = header['segment_size']
+        offset = len(encode_header(header)) + done * (segment_size + TAG_SIZE) if done else 0
+
+        # The map of the interrupted run stays authoritative (the input is unchanged)
+        extent_map = ExtentMap.from_header(header)
+        if extent_map is not None:
+            hasher = ExtentHasher(hasher, extent_map)
+        leaves = None
+        if done and 'merkle' in header:
+            # The tree covers the staged segments too
+            with open(journal.staging, 'rb') as staged:
+                leaves = segment_leaves(staged, header, encode_header(header), done)
+
+        with open(input_path, 'rb') as raw, journal.open_staging(offset) as staging, \
+                io_streams(raw, staging, io_mode) as (reader, dst):
+            reader, dst = self._throttled(throttle, reader, dst)
+            src = track(SparseReader(reader, extent_map) if extent_map else reader, tracker)
+            self._rehash(src, done * segment_size, hasher)
+            encrypt_stream(src, dst, key, header['cipher'], hasher=hasher, header=header,
+                           start_index=done,
+                           on_segment=journal.checkpointer(state, dst, segment_size + TAG_SIZE),
+                           crypto_limit=throttle.crypto if throttle else None, leaves=leaves)
+        if extent_map is not None:
+            hasher.finish()
+        journal.finalize()
+        return state['key_id']
+
+    @staticmethod
+    def _check_resume_key(journal: Journal, state: Dict[str, Any], key: bytes) -> None:
+        """Authenticate the last staged segment with the key of a resumed run.
+
+        Raises:
+            ValueError: If the key differs from the interrupted run's (a
+                different password would mix two keys in one container)
+        """
+        header = state['header']
+        prefix = encode_header(header)
+        index = state['segments_done'] - 1
+        sealed = header['segment_size'] + TAG_SIZE
         try:
-            fernet = Fernet(decryption_key)
-            with open(input_path, 'rb') as f:
-                encrypted = f.read()
+            with open(journal.staging, 'rb') as staged:
+                staged.seek(len(prefix) + index * sealed)
+                # Checkpoints never follow the final segment
+                SegmentCipher(header, prefix, key).decrypt_segment(index, staged.read(sealed), False)
+        except ContainerError:
+            raise ValueError(f"Key does not match the interrupted run of {journal.output_path.name}; "
+                             f"use the same password, or delete {journal.path.name} to start over")
+
+    def _decrypt_resumable(self, input_path: Path, output_path: Path, key: bytes, hasher: Any,
+                           tracker: Optional[ProgressTracker] = None,
+                           io_mode: str = IO_CACHED, throttle: Optional[Throttle] = None) -> str:
+        """Decrypt a container through a staging file and checkpoint journal.
 
-            decrypted = fernet.decrypt(encrypted)
+        Returns:
+            Cipher suite of the input
+        """
+        journal = Journal(output_path)
+        fingerprint = source_fingerprint(input_path)
+        state = journal.load('decrypt', fingerprint)
+
+        with open(input_path, 'rb') as raw:
+            if not is_container(raw.read(len(MAGIC))):
+                raise ValueError("Resumable decryption requires the segmented container format")
+            raw.seek(0)
+            header, _ = read_header(raw)
+            raw.seek(0)
+
+            if not state:
+                state = {'operation': 'decrypt', 'fingerprint': fingerprint, 'segments_done': 0}
+                journal.save(state)
+            done = state['segments_done']
+            segment_size = header['segment_size']
+            offset = done * segment_size
+            extent_map = ExtentMap.from_header(header)
+            if extent_map is not None and done:
+                offset = extent_map.logical_offset(offset)
+
+            with journal.open_staging(offset) as staging:
+                self._rehash(staging, offset, hasher)
+                staging.seek(offset)
+                with io_streams(raw, staging, io_mode) as (src, dst):
+                    src, dst = self._throttled(throttle, src, dst)
+                    decrypt_stream(track(src, tracker), dst, key, hasher=hasher, start_index=done,
+                                   on_segment=journal.checkpointer(state, dst, segment_size),
+                                   crypto_limit=throttle.crypto if throttle else None)
+        journal.finalize()
+        return header['cipher']
+
+    def encrypt_stream(self, src: BinaryIO, dst: Optional[BinaryIO], password: Optional[str] = None,
+                       key_name: Optional[str] = None, cipher: Optional[str] = None,
+                       name: str = STREAM_NAME, progress: Optional[ProgressCallback] = None,
+                       throttle: Optional[Throttle] = None,
+                       output_path: Optional[str] = None) -> str:
+        """Encrypt a stream (e.g. stdin) into another stream (e.g. stdout).
+
+        Data flows through one segment at a time, so memory stays bounded
+        regardless of input size (except for the buffered 'fernet' suite).
 
-            with open(output_path, 'wb') as f:
-                f.write(decrypted)
+        Args:
+            src: Readable plaintext stream
+            dst: Writable output stream (None with ``output_path``)
+            password: Password for encryption
+            key_name: Name of saved key to use
+            cipher: Cipher suite override (default: the vault's cipher)
+            name: Name recorded in the key store for the output
+            progress: Callback receiving Progress updates (total unknown)
+            throttle: I/O rate and crypto concurrency limits
+            output_path: Local file to write instead of ``dst``; it is
+                written atomically and recorded in the catalog, as with
+                encrypt_file
 
-            return str(output_path)
+        Returns:
+            Key ID used for encryption
+        """
+        cipher = self._resolve_cipher(cipher) if cipher else self.cipher
+        key, key_id = self._encryption_key(name, password, key_name)
+        tracker, owned = self._tracker(progress, None, name)
+        hasher = _CountingHasher(hashlib.sha256())
+        with ExitStack() as stack:
+            if output_path is not None:
+                output_path = Path(output_path)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                dst = stack.enter_context(self.local.writer(str(output_path)))
+            src, dst = self._throttled(throttle, src, dst)
+            self._encrypt_to(track(src, tracker), dst, key, cipher, hasher, throttle=throttle)
+        if owned:
+            tracker.finish()
+        if output_path is not None:
+            self.catalog.record(
+                output_path, 'encrypted',
+                stored_size=output_path.stat().st_size,
+                created=datetime.now().isoformat(),
+                plaintext_size=hasher.size,
+                key_id=key_id,
+                cipher=cipher,
+                plaintext_hash=self._digest_label(hasher),
+            )
+        return key_id
+
+    def decrypt_stream(self, src: BinaryIO, dst: BinaryIO, password: Optional[str] = None,
+                       key: Optional[str] = None, key_name: Optional[str] = None,
+                       name: str = STREAM_NAME, progress: Optional[ProgressCallback] = None,
+                       throttle: Optional[Throttle] = None) -> None:
+        """Decrypt a stream (e.g. stdin) into another stream (e.g. stdout).
+
+        Plaintext is written as each segment authenticates; if a later segment
+        fails, a ValueError is raised after earlier segments were emitted.
 
+        Args:
+            src: Readable encrypted stream
+            dst: Writable plaintext stream
+            password: Password for decryption (requires key_name for streams)
+            key: Direct key (base64)
+            key_name: Name of saved key
+            name: Encrypted filename used to look up password salts
+            progress: Callback receiving Progress updates (total unknown)
+            throttle: I/O rate and crypto concurrency limits
+        """
+        if password and not (key or key_name) and name == STREAM_NAME:
+            # Every password-only stream is recorded under this name, so the
+            # newest one's salt would be picked for all of them
+            raise ValueError("Password-only decryption of a stream needs the key name "
+                             "reported at encryption (-n/--key-name)")
+        decryption_key, _ = self._decryption_key(name, password, key, key_name)
+        tracker, owned = self._tracker(progress, None, name)
+        src, dst = self._throttled(throttle, src, dst)
+        try:
+            self._decrypt_to(track(src, tracker), dst, decryption_key, hashlib.sha256(),
+                             seek_holes=False, throttle=throttle)
         except Exception as e:
             raise ValueError(f"Decryption failed: {e}. Check your password/key.")
+        if owned:
+            tracker.finish()
+
+    def encrypt_file(self, input_path: str, output_path: Optional[str] = None,
+                     password: Optional[str] = None, key_name: Optional[str] = None,
+                     cipher: Optional[str] = None, resumable: bool = False,
+                     progress: Optional[ProgressCallback] = None,
+                     sparse: bool = True, io_mode: str = IO_CACHED,
+                     throttle: Optional[Throttle] = None, merkle: bool = True,
+                     recipients: Optional[Dict[str, Optional[str]]] = None,
+                     digest: str = DEFAULT_DIGEST,
+                     volume_size: Optional[int] = None,
+                     segment_size: Optional[int] = None) -> tuple[str, str]:
+        """Encrypt a file.
+
+        Args:
+            input_path: Path to file to encrypt
+            output_path: Output path (default: sandbox/filename.encrypted)
+            password: Password for encryption
+            key_name: Name of saved key to use
+            cipher: Cipher suite override (default: the vault's cipher)
+            resumable: Checkpoint progress so an interrupted run can be
+                continued by calling again with the same arguments
+            progress: Callback receiving Progress updates (bytes done,
+                total, rate, ETA) at most once per second and at the end
+            sparse: Skip the holes of sparse inputs (VM images, database
+                files) and store their extent map instead; decryption
+                recreates a sparse file
+            io_mode: 'cached' (default) or 'streaming', which reads and
+                writes in large aligned chunks and drops the input and
+                output from the page cache behind itself (for bulk jobs)
+            throttle: I/O rate and crypto concurrency limits (share one
+                Throttle between calls to limit them together)
+            merkle: Append a Merkle tree over the ciphertext segments, so
+                the file can be verified in parts and without the key
+                (see verify_file); the input must not change size meanwhile
+            recipients: Share the file with more saved keys (name to
+                password, None for random keys); each can decrypt it and
+                recipients can be changed later without re-encrypting
+                (see add_recipient). An empty dict still writes a shareable
+                container
+            digest: Plaintext hash computed in the same pass ('sha256' or
+                'blake2b', usually faster without SHA extensions); stored in
+                the catalog and, with a Merkle tree, in the file, where
+                decrypt_file checks it
+            volume_size: Write the output as parts of this many bytes plus
+                an index under the output name (see verify_volumes); not
+                combinable with resumable
+            segment_size: Plaintext bytes per segment (default: the value
+                autotune() measured for the output's target, else 1 MiB)
+
+        Returns:
+            Tuple of (output_path, key_id)
+        """
+        input_path = Path(input_path)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        cipher = self._resolve_cipher(cipher) if cipher else self.cipher
+        check_io_mode(io_mode)
+        if resumable and (cipher == CIPHER_FERNET or not self.storage.is_local):
+            raise ValueError("Resumable mode requires an AEAD cipher and local storage")
+        if recipients is not None and cipher == CIPHER_FERNET:
+            raise ValueError("Recipients require an AEAD cipher")
+        if digest not in DIGESTS:
+            raise ValueError(f"Unsupported digest '{digest}'. Choose from: {', '.join(DIGESTS)}")
+        if volume_size is not None and (resumable or volume_size <= 0):
+            raise ValueError("Volumes need a positive size and cannot be combined with resumable mode")
+
+        # Determine output path (an object name for remote storage)
+        if not self.storage.is_local:
+            output_path = output_path or f"{input_path.name}.encrypted"
+        elif output_path is None:
+            output_path = self.sandbox_dir / f"{input_path.name}.encrypted"
+        else:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        name = str(output_path)
+
+        extent_map = data_extents(input_path) if sparse and cipher != CIPHER_FERNET else None
+        total = extent_map.data_size if extent_map else input_path.stat().st_size
+        size = total if merkle else None
+
+        if segment_size is None:
+            tuned = self.tuning.lookup(self._tuning_target(Path(name).parent))
+            segment_size = tuned.segment_size if tuned else DEFAULT_SEGMENT_SIZE
+
+        hasher = hashlib.new(digest)
+        tracker, owned = self._tracker(progress, total, str(input_path))
+        if resumable:
+            key_id = self._encrypt_resumable(input_path, output_path, password, key_name, cipher,
+                                             hasher, tracker, extent_map, io_mode, throttle, size,
+                                             recipients, segment_size)
+        else:
+            # Get or generate encryption key
+            key, key_id = self._encryption_key(Path(name).name, password, key_name)
+            shared = None
+            if recipients is not None:
+                shared = self._recipient_keys(Path(name).name, key, key_id, recipients)
+
+            # Encrypt file (only the data extents of sparse files are read)
+            writer = VolumeWriter(self.storage, name, volume_size) if volume_size else self.storage.writer(name)
+            with open(input_path, 'rb') as raw, writer as out, \
+                    io_streams(raw, out, io_mode) as (reader, dst):
+                reader, dst = self._throttled(throttle, reader, dst)
+                src = SparseReader(reader, extent_map) if extent_map else reader
+                self._encrypt_to(track(src, tracker), dst, key, cipher, hasher, extent_map,
+                                 throttle, size, shared, segment_size)
+        if owned:
+            tracker.finish()
+
+        self.catalog.record(
+            output_path if self.storage.is_local else self.storage.uri(name), 'encrypted',
+            stored_size=self._stored_size(name),
+            created=datetime.now().isoformat(),
+            source=str(input_path),
+            plaintext_size=input_path.stat().st_size,
+            key_id=key_id,
+            cipher=cipher,
+            plaintext_hash=self._digest_label(hasher),
+        )
+
+        return name if self.storage.is_local else self.storage.uri(name), key_id
+
+    def decrypt_file(self, input_path: str, output_path: Optional[str] = None,
+                     password: Optional[str] = None, key: Optional[str] = None,
+                     key_name: Optional[str] = None, resumable: bool = False,
+                     progress: Optional[ProgressCallback] = None,
+                     io_mode: str = IO_CACHED, throttle: Optional[Throttle] = None,
+                     volume_workers: int = 1) -> str:
+        """Decrypt a file.
+
+        With remote storage, ``input_path`` is an object name in the backend
+        and the plaintext is written locally.
+
+        Args:
+            input_path: Path to encrypted file
+            output_path: Output path (default: sandbox/filename.decrypted)
+            password: Password for decryption
+            key: Direct key (base64)
+            key_name: Name of saved key
+            resumable: Checkpoint progress so an interrupted run can be
+                continued by calling again with the same arguments
+            progress: Callback receiving Progress updates (bytes done,
+                total, rate, ETA) at most once per second and at the end
+            io_mode: 'cached' (default) or 'streaming' (see encrypt_file)
+            throttle: I/O rate and crypto concurrency limits
+            volume_workers: Parts of a volume set fetched concurrently
+                (each held in memory until its turn); 1 streams them in order
+
+        Returns:
+            Output file path
+        """
+        if resumable and not self.storage.is_local:
+            raise ValueError("Resumable mode requires local storage")
+        check_io_mode(io_mode)
+        name = str(input_path)
+        input_path = Path(input_path)
+        if not self.storage.exists(name):
+            raise FileNotFoundError(f"Encrypted file not found: {input_path}")
+
+        # Determine output path
+        if output_path is None:
+            output_path = self._default_decrypt_output(input_path)
+        else:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One read of the stored object yields the volume index, the header
+        # and the data (a single GET with remote storage)
+        with self._open_peeked(name, volume_workers) as (raw, index, header):
+            if index is not None and resumable:
+                raise ValueError("Resumable mode cannot read volumes")
+
+            # Get decryption key (the header tells shared containers' password recipients apart)
+            decryption_key, used_key = self._decryption_key(str(input_path.name), password, key,
+                                                            key_name, header)
+
+            # Decrypt file (container format, or legacy Fernet token), hashing
+            # with the algorithm of the stored digest so it is checked for free
+            hasher = hashlib.new(header.get('digest', DEFAULT_DIGEST) if header else DEFAULT_DIGEST)
+            tracker, owned = self._tracker(progress, index['size'] if index else self.storage.size(name),
+                                           name)
+            try:
+                if resumable:
+                    # Verified segments stay staged for the next attempt
+                    cipher = self._decrypt_resumable(input_path, output_path, decryption_key, hasher,
+                                                     tracker, io_mode, throttle)
+                else:
+                    with self.local.writer(str(output_path)) as out, \
+                            io_streams(raw, out, io_mode) as (src, dst):
+                        src, dst = self._throttled(throttle, src, dst)
+                        cipher = self._decrypt_to(track(src, tracker), dst, decryption_key, hasher,
+                                                  throttle=throttle)
+            except SegmentError as e:
+                raise ValueError(f"Decryption failed: {self._diagnose(name, e)}")
+            except (DigestError, VolumeError) as e:
+                raise ValueError(f"Decryption failed: {e}")
+            except Exception as e:
+                raise ValueError(f"Decryption failed: {e}. Check your password/key.")
+        if owned:
+            tracker.finish()
+
+        stored_size = output_path.stat().st_size
+        self.catalog.record(
+            output_path, 'decrypted',
+            stored_size=stored_size,
+            created=datetime.now().isoformat(),
+            source=str(input_path) if self.storage.is_local else self.storage.uri(name),
+            plaintext_size=stored_size,
+            key_id=used_key,
+            cipher=cipher,
+            plaintext_hash=self._digest_label(hasher),
+        )
+
+        return str(output_path)
+
+    @staticmethod
+    def _digest_label(hasher: Any) -> str:
+        """Catalog form of a plaintext digest: hex for SHA-256, 'name:hex' otherwise."""
+        if hasher.name == DEFAULT_DIGEST:
+            return hasher.hexdigest()
+        return f"{hasher.name}:{hasher.hexdigest()}"
+
+    def _peek_header(self, name: str) -> Optional[Dict[str, Any]]:
+        """Container header of a stored file, or None for legacy Fernet files."""
+        with self._open_peeked(name) as (_, _, header):
+            return header
+
+    @contextmanager
+    def _open_peeked(self, name: str, volume_workers: int = 1) -> Iterator[tuple]:
+        """Open a stored encrypted file once, parsing its volume index and header.
+
+        The bytes consumed while parsing are replayed (or, for seekable
+        files, re-read after a seek), so the stream still starts at the
+        container or Fernet token.
+
+        Args:
+            name: Encrypted file (an object name with remote storage)
+            volume_workers: Parts of a volume set fetched concurrently
+
+        Yields:
+            Tuple of (readable stream, volume index or None, container
+            header or None)
+        """
+        with ExitStack() as stack:
+            f = stack.enter_context(self.storage.reader(name))
+            index = header = None
+            prefix = f.read(len(MAGIC))
+            if is_volume_index(prefix):
+                index = read_index(PrefixedReader(prefix, f))
+                f = stack.enter_context(VolumeReader(self.storage, name, index, volume_workers))
+                prefix = f.read(len(MAGIC))
+            if is_container(prefix):
+                header, prefix = read_header(PrefixedReader(prefix, f))
+            seekable = getattr(f, 'seekable', None)
+            if seekable is not None and seekable():
+                f.seek(0)
+            else:
+                f = PrefixedReader(prefix, f)
+            yield f, index, header
+
+    def _volume_index(self, name: str) -> Optional[Dict[str, Any]]:
+        """Index of a volume set stored under ``name``, or None for single files."""
+        with self.storage.reader(name) as f:
+            if not is_volume_index(f.read(len(VOLUME_MAGIC))):
+                return None
+            f.seek(0)
+            return read_index(f)
+
+    def _stored_size(self, name: str) -> int:
+        """Stored bytes of an output, all parts of a volume set included."""
+        index = self._volume_index(name)
+        return self.storage.size(name) + (index['size'] if index else 0)
+
+    @contextmanager
+    def open_encrypted(self, name: str, volume_workers: int = 1) -> Iterator[BinaryIO]:
+        """Open a stored encrypted file for reading; volume sets read as one stream.
+
+        Args:
+            name: Encrypted file (an object name with remote storage)
+            volume_workers: Parts of a volume set fetched concurrently
+
+        Yields:
+            Readable stream
+        """
+        with self._open_peeked(name, volume_workers) as (f, _, _):
+            yield f
+
+    def _recipient_keys(self, output_name: str, key: bytes, key_id: str,
+                        recipients: Dict[str, Optional[str]]) -> Dict[str, bytes]:
+        """Vault keys of a shared output: its own key plus each saved recipient key."""
+        keys = {key_id: key}
+        for name, password in recipients.items():
+            if name not in keys:
+                keys[name], _ = self._encryption_key(output_name, password, name)
+        return keys
+
+    def _shared_header(self, input_path: str) -> Dict[str, Any]:
+        if not self.storage.is_local:
+            raise ValueError("Changing recipients requires local storage")
+        if not Path(input_path).exists():
+            raise FileNotFoundError(f"Encrypted file not found: {input_path}")
+        if self._volume_index(input_path) is not None:
+            raise ValueError("Recipients of split volumes cannot be changed")
+        header = self._peek_header(input_path)
+        if header is None:
+            raise ValueError("Recipients require the segmented container format")
+        return header
+
+    def _store_header(self, input_path: str, header: Dict[str, Any]) -> None:
+        """Write a changed header, in place if it fits, else into a copy of the file."""
+        if rewrite_header(input_path, header):
+            return
+        with open(input_path, 'rb') as src, self.local.writer(input_path) as out:
+            read_header(src)
+            out.write(encode_header(header))
+            shutil.copyfileobj(src, out, STREAMING_BUFFER_SIZE)
+
+    def recipients(self, input_path: str) -> List[str]:
+        """Key IDs that can open an encrypted file (empty if it is not shared)."""
+        header = self._shared_header(input_path)
+        return [entry['id'] for entry in header.get('recipients', [])]
+
+    def add_recipient(self, input_path: str, recipient: str, recipient_password: Optional[str] = None,
+                      password: Optional[str] = None, key: Optional[str] = None,
+                      key_name: Optional[str] = None) -> List[str]:
+        """Share an encrypted file with another saved key.
+
+        The file's data key is wrapped for the new recipient and only the
+        header is rewritten; the segments are not re-encrypted. Files
+        encrypted without recipients are converted on first use, which
+        copies them once to make room in the header.
+
+        Args:
+            input_path: Encrypted file (local storage only)
+            recipient: Name of the saved key to add
+            recipient_password: Password of the recipient key (password keys)
+            password: Password of a current recipient (to unwrap the data key)
+            key: Direct key of a current recipient (base64)
+            key_name: Saved key name of a current recipient
+
+        Returns:
+            Key IDs of all recipients
+        """
+        header = self._shared_header(input_path)
+        name = Path(input_path).name
+        unlock, used_key = self._decryption_key(name, password, key, key_name, header)
+        try:
+            file_key = data_key(header, unlock)
+        except ContainerError as e:
+            raise ValueError(f"{e}. Check your password/key.")
+
+        entries = header.setdefault('recipients', [wrap_key(file_key, unlock, used_key or 'owner')])
+        if recipient in {entry['id'] for entry in entries}:
+            raise ValueError(f"'{recipient}' is already a recipient")
+        recipient_key, _ = self._encryption_key(name, recipient_password, recipient)
+        entries.append(wrap_key(file_key, recipient_key, recipient))
+        self._store_header(input_path, header)
+        return [entry['id'] for entry in entries]
+
+    def remove_recipient(self, input_path: str, recipient: str) -> List[str]:
+        """Drop a recipient's entry from an encrypted file's header.
+
+        No key is needed. The removed key can no longer open this copy of
+        the file, but whoever held it may have kept the data key or the
+        plaintext; re-encrypt the file to revoke access fully.
+
+        Returns:
+            Key IDs of the remaining recipients
+        """
+        header = self._shared_header(input_path)
+        entries = header.get('recipients', [])
+        remaining = [entry for entry in entries if entry['id'] != recipient]
+        if len(remaining) == len(entries):
+            raise ValueError(f"'{recipient}' is not a recipient")
+        if not remaining:
+            raise ValueError("Cannot remove the last recipient")
+        header['recipients'] = remaining
+        self._store_header(input_path, header)
+        self.keystore.remove_refs([(recipient, Path(input_path).name)])
+        return [entry['id'] for entry in remaining]
+
+    def _diagnose(self, name: str, error: SegmentError) -> str:
+        """Explain a failed segment using the container's Merkle tree, if it has one."""
+        volumes = self.verify_volumes(name)
+        if volumes is not None:
+            if volumes.damaged:
+                number = volumes.damaged[0]
+                return (f"volume part {number} ({volumes.parts[number - 1]}) is damaged; "
+                        f"fetch it again")
+            return f"{error}. Check your password/key."
+        report = None
+        if self.storage.is_local:
+            try:
+                report = verify_container(name, error.index, error.index + 1)
+            except (ContainerError, OSError):
+                pass
+        if report is None or not report.tree_ok:
+            return f"{error}. Check your password/key."
+        if report.corrupt:
+            start, end = report.plaintext_range(error.index)
+            return (f"segment {error.index} (plaintext bytes {start}-{end}) is corrupted; "
+                    f"run 'cryptvault verify' to find every damaged segment")
+        return f"{error}, but the file is intact. Check your password/key."
+
+    def verify_file(self, input_path: str, start: int = 0, end: Optional[int] = None,
+                    workers: int = DEFAULT_VERIFY_WORKERS) -> IntegrityReport:
+        """Check an encrypted file against its Merkle tree without decrypting it.
+
+        No key is needed, so archives can be scrubbed anywhere; checking a
+        range of segments at a time makes scrubbing incremental.
+
+        Args:
+            input_path: Encrypted file (local storage only)
+            start: First segment to check
+            end: Segment after the last one to check (default: all)
+            workers: Threads hashing segments concurrently
+
+        Returns:
+            IntegrityReport listing corrupted segments, or None if the file
+            has no Merkle tree (legacy Fernet files, containers written
+            without one)
+        """
+        if not self.storage.is_local:
+            raise ValueError("Verification requires local storage")
+        with open(input_path, 'rb') as f:
+            if not is_container(f.read(len(MAGIC))):
+                return None
+            f.seek(0)
+            header, _ = read_header(f)
+        if 'merkle' not in header:
+            return None
+        return verify_container(input_path, start, end, workers)
+
+    def verify_volumes(self, input_path: str,
+                       workers: int = DEFAULT_VERIFY_WORKERS) -> Optional[VolumeReport]:
+        """Check the parts of a volume set against its index without the key.
+
+        Only the parts listed as damaged need to be transferred again.
+
+        Args:
+            input_path: Index of the volume set (an object name with remote storage)
+            workers: Parts hashed concurrently
+
+        Returns:
+            VolumeReport listing missing or damaged parts, or None if the
+            file is not a volume set
+        """
+        index = self._volume_index(input_path)
+        if index is None:
+            return None
+        return verify_volumes(self.storage, input_path, index, workers)
+
+    def _tuning_target(self, directory: Optional[Path] = None) -> str:
+        """Where tuning results apply: a local directory, or the whole remote backend."""
+        if not self.storage.is_local:
+            return self.storage.uri('')
+        return str(Path(directory or self.sandbox_dir).resolve())
+
+    def autotune(self, sources: Iterable[str], target: Optional[str] = None,
+                 sample_size: int = DEFAULT_SAMPLE_SIZE, cipher: Optional[str] = None) -> Tuning:
+        """Measure the best segment size and worker count for a source and target.
+
+        Data read from the source is encrypted into scratch files on the
+        target with candidate settings (see tuning.benchmark). The result is
+        cached in the sandbox for this host and target and used from then on
+        by encrypt_file and encrypt_batch when writing below the target.
+
+        Args:
+            sources: Files and/or directories (the largest of the first
+                files found is read as the sample)
+            target: Output directory (default: sandbox); with remote
+                storage, an object name prefix for the scratch objects, and
+                the result applies to the whole backend
+            sample_size: Bytes encrypted per candidate
+            cipher: Cipher suite to measure (default: the vault's cipher)
+
+        Returns:
+            The cached Tuning
+        """
+        cipher = self._resolve_cipher(cipher) if cipher else self.cipher
+        if cipher == CIPHER_FERNET:
+            # Fernet tokens are not segmented
+            cipher = select_cipher()
+        sample = None
+        for count, (path, _) in enumerate(walk_files(sources)):
+            if sample is None or path.stat().st_size > sample.stat().st_size:
+                sample = path
+            if count >= 100 or sample.stat().st_size >= sample_size:
+                break
+        if sample is None or not sample.stat().st_size:
+            raise ValueError("No non-empty file to sample in the sources")
+
+        if self.storage.is_local:
+            directory = Path(target) if target else self.sandbox_dir
+            directory.mkdir(parents=True, exist_ok=True)
+            prefix = str(directory) + os.sep
+            key = self._tuning_target(directory)
+        else:
+            prefix = target or ""
+            key = self._tuning_target()
+        tuning = benchmark(sample, self.storage, prefix, cipher, sample_size)
+        self.tuning.store(key, tuning)
+        return tuning
 
     def save_key(self, name: str, password: Optional[str] = None, key: Optional[str] = None) -> None:
         """Save a key with a descriptive name.
@@ -282,94 +1190,987 @@ class CryptVault:
             password: Password to save
             key: Direct key to save (base64)
         """
+        self.keystore.put(name, self._key_entry(password, key))
+
+    def _key_entry(self, password: Optional[str] = None, key: Optional[str] = None) -> Dict[str, Any]:
+        """Key-store metadata for a new password or direct key."""
         if not password and not key:
             raise ValueError("Must provide either password or key")
 
-        keys = self._load_keys()
-
         if password:
-            # Save password with salt
-            _, salt = self._derive_key_from_password(password)
-            keys[name] = {
+            # Only the salt is stored; the key is derived when the password is used
+            return {
                 'type': 'password',
-                'salt': base64.b64encode(salt).decode(),
+                'salt': base64.b64encode(os.urandom(self.SALT_LENGTH)).decode(),
                 'created': datetime.now().isoformat(),
-                'files': []
             }
+        try:
+            # Stored keys are base64 of a Fernet key (as generated for new files)
+            Fernet(base64.b64decode(key, validate=True))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid key format. Key must be a base64 encoded Fernet key.")
+        return {
+            'type': 'key',
+            'key': key,
+            'created': datetime.now().isoformat(),
+        }
+
+    def _imported_key(self, entry: Any) -> tuple[str, Dict[str, Any]]:
+        """Validate one import entry and return its name and key-store metadata.
+
+        An entry is either an exported record (type, salt or key, created,
+        ...) or a new key given as for save-key (``password`` or ``key``).
+        """
+        if not isinstance(entry, dict) or not isinstance(entry.get('name'), str) or not entry['name']:
+            raise ValueError("expected an object with a non-empty 'name'")
+        fields = {k: v for k, v in entry.items() if k not in ('name', 'password', 'files')}
+        key_type = fields.get('type', 'password' if 'password' in entry else 'key')
+        if 'password' in entry:
+            if key_type != 'password' or 'salt' in fields or 'key' in fields:
+                raise ValueError("'password' cannot be combined with 'salt', 'key' or another type")
+            if not isinstance(entry['password'], str) or not entry['password']:
+                raise ValueError("'password' must be a non-empty string")
+            base = self._key_entry(password=entry['password'])
+        elif key_type == 'key':
+            if not isinstance(fields.get('key'), str) or not fields['key']:
+                raise ValueError("missing 'key'")
+            base = self._key_entry(key=fields['key'])
+        elif key_type == 'password':
+            try:
+                valid = len(base64.b64decode(fields['salt'], validate=True)) == self.SALT_LENGTH
+            except (KeyError, ValueError, TypeError):
+                valid = False
+            if not valid:
+                raise ValueError(f"missing or invalid 'salt' (must be {self.SALT_LENGTH} base64 encoded bytes)")
+            base = {'created': datetime.now().isoformat()}
         else:
-            # Save direct key
+            raise ValueError(f"unknown key type '{key_type}'")
+        return entry['name'], {**base, **fields}
+
+    def import_keys(self, lines: Iterable[str], replace: bool = False) -> int:
+        """Add saved keys from NDJSON lines in one key-store write.
+
+        Every line is validated before anything is stored, so a bad entry
+        leaves the key store untouched. New password entries only get a
+        random salt (no PBKDF2 runs; keys are derived when used).
+
+        Args:
+            lines: One JSON object per line (as written by export_keys, or
+                ``{"name": ..., "password": ...}`` / ``{"name": ..., "key": ...}``)
+            replace: Overwrite existing keys of the same name instead of
+                rejecting them
+
+        Returns:
+            Number of keys imported
+
+        Raises:
+            ValueError: Listing the invalid lines, if any
+        """
+        existing = self.keystore.records()
+        entries: Dict[str, Dict[str, Any]] = {}
+        errors = []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
             try:
-                # Validate key format
-                base64.b64decode(key)
-                keys[name] = {
-                    'type': 'key',
-                    'key': key,
-                    'created': datetime.now().isoformat(),
-                    'files': []
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    raise ValueError("not valid JSON")
+                name, fields = self._imported_key(entry)
+                if name in entries:
+                    raise ValueError(f"duplicate key '{name}'")
+                if name in existing and not replace:
+                    raise ValueError(f"key '{name}' already exists (use --replace)")
+            except ValueError as e:
+                errors.append(f"line {number}: {e}")
+                continue
+            entries[name] = fields
+
+        if errors:
+            shown = errors[:MAX_REPORTED_ERRORS]
+            if len(errors) > len(shown):
+                shown.append(f"... and {len(errors) - len(shown)} more")
+            raise ValueError(f"{len(errors)} invalid entries, nothing imported:\n  " + "\n  ".join(shown))
+        self.keystore.put_many(entries)
+        return len(entries)
+
+    def export_keys(self, stream: TextIO, name: Optional[str] = None,
+                    key_type: Optional[str] = None, legacy: bool = False) -> int:
+        """Write saved keys as NDJSON that import_keys reads back unchanged.
+
+        The output holds the stored secrets (salts and direct keys).
+
+        Args:
+            stream: Text stream receiving one JSON object per key
+            name: Key name glob pattern
+            key_type: 'password' or 'key'
+            legacy: Write one .keys.json object with ``files`` lists instead,
+                for versions that read the lists from the key store
+
+        Returns:
+            Number of keys written
+        """
+        if legacy:
+            return self.keystore.write_legacy(
+                stream, (summary['name'] for summary in self.keystore.query(name=name, key_type=key_type)))
+        count = 0
+        for summary in self.keystore.query(name=name, key_type=key_type):
+            record = self.keystore.get(summary['name'])
+            if record is None:
+                continue
+            stream.write(json.dumps({'name': record.name, **record.to_json()}) + "\n")
+            count += 1
+        return count
+
+    @staticmethod
+    def _memory_cost(size: int, legacy: bool, io_mode: str = IO_CACHED,
+                     segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+        """Estimate peak memory for processing one file.
+
+        Fernet tokens are handled whole (plaintext, token and its base64
+        form are all in memory); containers only hold a few segments.
+        Streaming I/O adds a read and a write buffer.
+        """
+        buffers = 2 * min(size, STREAMING_BUFFER_SIZE) if io_mode == IO_STREAMING else 0
+        if legacy:
+            return 3 * size + buffers
+        return 3 * min(size, segment_size) + buffers
+
+    def _default_decrypt_output(self, input_path: Path) -> Path:
+        """Sandbox output of a decryption without an explicit output path."""
+        # Remove .encrypted extension if present
+        base_name = input_path.stem
+        if base_name.endswith('.encrypted'):
+            base_name = base_name[:-10]  # Remove .encrypted
+        return self.sandbox_dir / f"{base_name}.decrypted"
+
+    @staticmethod
+    def _claim_output(claimed: set, output: Path) -> Dict[str, Any]:
+        """Reserve a batch output; a second input mapping to it gets a conflict.
+
+        Returns:
+            Extra task fields (``conflict`` when the output is already taken)
+        """
+        target = os.path.abspath(output)
+        if target in claimed:
+            return {'conflict': output}
+        claimed.add(target)
+        return {}
+
+    @staticmethod
+    def _check_claim(task: BatchTask) -> None:
+        if 'conflict' in task.extra:
+            raise ValueError(f"Output {task.extra['conflict']} is already written by another "
+                             f"input of this batch")
+
+    @staticmethod
+    def _batch_output(path: Path, root: Path, output_dir: Optional[Path],
+                      operation: str) -> Optional[Path]:
+        """Output path for a batch input, mirroring its place below ``root``."""
+        if output_dir is None:
+            return None
+        relative = path.relative_to(root)
+        if operation == 'encrypt':
+            name = f"{relative.name}.encrypted"
+        else:
+            name = relative.name[:-len('.encrypted')] if relative.name.endswith('.encrypted') else relative.name
+        return Path(output_dir) / relative.parent / name
+
+    def encrypt_batch(self, inputs: Iterable[str], output_dir: Optional[str] = None,
+                      password: Optional[str] = None, key_name: Optional[str] = None,
+                      cipher: Optional[str] = None, pattern: str = "*",
+                      workers: Optional[int] = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                      scheduler: Optional[BatchScheduler] = None,
+                      on_result: Optional[Callable[[BatchResult], None]] = None,
+                      session: bool = True,
+                      progress: Optional[ProgressCallback] = None,
+                      io_mode: str = IO_CACHED,
+                      throttle: Optional[Throttle] = None,
+                      digest: str = DEFAULT_DIGEST,
+                      volume_size: Optional[int] = None,
+                      autotune: bool = False) -> List[BatchResult]:
+        """Encrypt files and directory trees concurrently.
+
+        Work is scheduled largest-first under a global in-flight memory
+        budget; directory trees are walked lazily as capacity frees up.
+
+        Args:
+            inputs: Files and/or directories to encrypt
+            output_dir: Output directory (default: sandbox); directory
+                structure below each input directory is preserved
+            password: Password for encryption
+            key_name: Name of saved key to use
+            cipher: Cipher suite override (default: the vault's cipher)
+            pattern: Filename glob for files inside directories
+            workers: Maximum concurrent files (default: the tuned count for
+                ``output_dir``, else 4)
+            memory_budget: In-flight memory budget in bytes
+            scheduler: Pre-configured scheduler (overrides workers/memory_budget)
+            on_result: Callback invoked as each file finishes
+            session: Run in a key session (one KDF per password for the
+                batch; password-only files share one key entry)
+            progress: Callback receiving Progress for the whole batch (the
+                total grows as directories are walked)
+            io_mode: 'cached' or 'streaming' for every file of the batch
+                (streaming keeps a bulk run out of the page cache)
+            throttle: I/O rate and crypto concurrency limits shared by all
+                files of the batch (adjustable while it runs)
+            digest: Plaintext hash of every file (see encrypt_file)
+            volume_size: Split outputs into parts of this many bytes
+            autotune: Benchmark ``output_dir`` first (see autotune) unless a
+                result for it is cached already
+
+        Returns:
+            List of BatchResult (value holds the key ID)
+        """
+        cipher = self._resolve_cipher(cipher) if cipher else self.cipher
+        output_dir = Path(output_dir) if output_dir else self.sandbox_dir
+        legacy = cipher == CIPHER_FERNET
+        check_io_mode(io_mode)
+        inputs = list(inputs)
+
+        tuned = self.tuning.lookup(self._tuning_target(output_dir))
+        if tuned is None and autotune:
+            tuned = self.autotune(inputs, str(output_dir), cipher=cipher)
+        segment_size = tuned.segment_size if tuned else DEFAULT_SEGMENT_SIZE
+        if workers is None:
+            workers = tuned.workers if tuned else DEFAULT_WORKERS
+
+        def tasks():
+            # Same-named files from different inputs must not overwrite each other
+            claimed = set()
+            for path, root in walk_files(inputs, pattern):
+                size = path.stat().st_size
+                output = self._batch_output(path, root, output_dir, 'encrypt')
+                if tracker is not None:
+                    tracker.add_total(size)
+                yield BatchTask(path, size, self._memory_cost(size, legacy, io_mode, segment_size), output,
+                                self._claim_output(claimed, output))
+
+        def run(task: BatchTask) -> BatchResult:
+            self._check_claim(task)
+            output, key_id = self.encrypt_file(str(task.path), str(task.output),
+                                               password, key_name, cipher, progress=tracker,
+                                               io_mode=io_mode, throttle=throttle, digest=digest,
+                                               volume_size=volume_size, segment_size=segment_size)
+            return BatchResult(str(task.path), output, value=key_id)
+
+        tracker = ProgressTracker(progress, total=0) if progress else None
+        scheduler = scheduler or BatchScheduler(workers, memory_budget)
+        try:
+            with self.session() if session else ExitStack():
+                results = scheduler.run(tasks(), run, on_result)
+        finally:
+            self.sync()
+        if tracker is not None:
+            tracker.finish()
+        return results
+
+    def decrypt_batch(self, inputs: Iterable[str], output_dir: Optional[str] = None,
+                      password: Optional[str] = None, key: Optional[str] = None,
+                      key_name: Optional[str] = None, pattern: str = "*.encrypted",
+                      workers: int = DEFAULT_WORKERS, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                      scheduler: Optional[BatchScheduler] = None,
+                      on_result: Optional[Callable[[BatchResult], None]] = None,
+                      session: bool = True,
+                      progress: Optional[ProgressCallback] = None,
+                      io_mode: str = IO_CACHED,
+                      throttle: Optional[Throttle] = None,
+                      kdf_workers: Optional[int] = None) -> List[BatchResult]:
+        """Decrypt files and directory trees concurrently.
+
+        With a password alone, the inputs are first walked to collect the
+        distinct password keys they were encrypted with, and those are
+        derived up front across a process pool, so key derivation takes
+        (distinct keys / cores) rounds instead of one round per file.
+
+        Args:
+            inputs: Encrypted files and/or directories
+            output_dir: Output directory; original filenames (without
+                .encrypted) and structure are restored. Default: the usual
+                sandbox/<name>.decrypted outputs. An input whose output
+                another input of the batch already writes fails instead of
+                overwriting it
+            password: Password for decryption
+            key: Direct key (base64)
+            key_name: Name of saved key
+            pattern: Filename glob for files inside directories
+            workers: Maximum concurrent files
+            memory_budget: In-flight memory budget in bytes
+            scheduler: Pre-configured scheduler (overrides workers/memory_budget)
+            on_result: Callback invoked as each file finishes
+            session: Derive each password key only once for the batch
+            progress: Callback receiving Progress for the whole batch
+            io_mode: 'cached' or 'streaming' for every file of the batch
+            throttle: I/O rate and crypto concurrency limits for the batch
+            kdf_workers: Processes deriving password keys up front
+                (default: one per CPU; needs a session)
+
+        Returns:
+            List of BatchResult
+        """
+        check_io_mode(io_mode)
+        # Walked twice when keys are planned
+        inputs = list(inputs)
+
+        def tasks():
+            claimed = set()
+            for path, root in walk_files(inputs, pattern):
+                size = path.stat().st_size
+                with open(path, 'rb') as f:
+                    prefix = f.read(len(MAGIC))
+                    volumes = is_volume_index(prefix)
+                    if volumes:
+                        # Sized by its parts, which are streamed like one file
+                        f.seek(0)
+                        try:
+                            size = read_index(f)['size']
+                        except VolumeError:
+                            pass
+                legacy = not (volumes or is_container(prefix))
+                output = (self._batch_output(path, root, output_dir, 'decrypt')
+                          or self._default_decrypt_output(path))
+                if tracker is not None:
+                    tracker.add_total(size)
+                yield BatchTask(path, size, self._memory_cost(size, legacy, io_mode), output,
+                                self._claim_output(claimed, output))
+
+        def run(task: BatchTask) -> BatchResult:
+            self._check_claim(task)
+            output = self.decrypt_file(str(task.path), str(task.output),
+                                       password, key, key_name, progress=tracker, io_mode=io_mode,
+                                       throttle=throttle)
+            return BatchResult(str(task.path), output)
+
+        tracker = ProgressTracker(progress, total=0) if progress else None
+        scheduler = scheduler or BatchScheduler(workers, memory_budget)
+        try:
+            with self.session() if session else ExitStack():
+                if session and password and not key and not key_name:
+                    self._prime_password_keys(password, self._batch_salts(inputs, pattern),
+                                              kdf_workers)
+                results = scheduler.run(tasks(), run, on_result)
+        finally:
+            self.sync()
+        if tracker is not None:
+            tracker.finish()
+        return results
+
+    def _migrate_file(self, path: Path, password: Optional[str], key: Optional[str],
+                      key_name: Optional[str], cipher: str) -> Optional[str]:
+        """Re-encrypt one legacy Fernet file as a container, in place.
+
+        The container is written next to the file, read back and decrypted,
+        and only renamed over the original once its plaintext matches.
+
+        Returns:
+            Key ID used (None for direct keys)
+        """
+        name = str(path)
+        vault_key, key_id = self._decryption_key(path.name, password, key, key_name)
+        try:
+            plaintext = Fernet(vault_key).decrypt(path.read_bytes())
+        except (InvalidToken, ValueError):
+            raise ValueError("Decryption failed. Check your password/key.")
+        digest = hashlib.sha256(plaintext).hexdigest()
+
+        # Temporaries abandoned by an interrupted run of this file
+        for stale in path.parent.glob(f".{glob.escape(path.name)}.*{TEMP_SUFFIX}"):
+            stale.unlink(missing_ok=True)
+        with self.local.writer(name) as out:
+            self._encrypt_to(io.BytesIO(plaintext), out, vault_key, cipher, hashlib.sha256(),
+                             size=len(plaintext))
+            # The original is about to be replaced: make the copy durable first
+            out.flush()
+            os.fsync(out.fileno())
+            check = hashlib.sha256()
+            with open(out.tmp, 'rb') as written, open(os.devnull, 'wb') as sink:
+                decrypt_stream(written, sink, vault_key, hasher=check)
+            if check.hexdigest() != digest:
+                raise ValueError("Verification failed: migrated file does not match the original")
+
+        if key_id is not None:
+            self.keystore.add_file(key_id, path.name)
+        previous = self.catalog.get(path) or {}
+        self.catalog.record(
+            path, 'encrypted',
+            stored_size=path.stat().st_size,
+            created=previous.get('created') or datetime.now().isoformat(),
+            source=previous.get('source'),
+            plaintext_size=len(plaintext),
+            key_id=key_id,
+            cipher=cipher,
+            plaintext_hash=digest,
+        )
+        return key_id
+
+    def migrate(self, inputs: Iterable[str], password: Optional[str] = None,
+                key: Optional[str] = None, key_name: Optional[str] = None,
+                cipher: Optional[str] = None, pattern: str = "*.encrypted",
+                workers: int = DEFAULT_WORKERS, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                scheduler: Optional[BatchScheduler] = None,
+                on_result: Optional[Callable[[BatchResult], None]] = None,
+                kdf_workers: Optional[int] = None) -> List[BatchResult]:
+        """Convert legacy Fernet files to the segmented container format in place.
+
+        Files are migrated concurrently under the batch memory budget
+        (Fernet files are held whole). Each one is re-encrypted under the
+        key it was encrypted with, verified by decrypting the new file,
+        and atomically swapped in under the same name, so a crash leaves
+        either the old or the new file. Files that are already containers
+        are skipped, which makes an interrupted run resumable by running
+        it again.
+
+        Args:
+            inputs: Encrypted files and/or directories
+            password: Password for decryption
+            key: Direct key (base64)
+            key_name: Name of saved key
+            cipher: Container cipher (default: the vault's cipher, or the
+                fastest AEAD if the vault encrypts with 'fernet')
+            pattern: Filename glob for files inside directories
+            workers: Maximum concurrent files
+            memory_budget: In-flight memory budget in bytes
+            scheduler: Pre-configured scheduler (overrides workers/memory_budget)
+            on_result: Callback invoked as each file finishes
+            kdf_workers: Processes deriving password keys up front
+
+        Returns:
+            List of BatchResult for the migrated files (value holds the key ID)
+        """
+        cipher = self._resolve_cipher(cipher) if cipher else self.cipher
+        if cipher == CIPHER_FERNET:
+            cipher = select_cipher()
+        inputs = list(inputs)
+
+        def tasks():
+            for path, _ in walk_files(inputs, pattern):
+                with open(path, 'rb') as f:
+                    prefix = f.read(len(MAGIC))
+                    if is_container(prefix) or is_volume_index(prefix):
+                        continue
+                size = path.stat().st_size
+                yield BatchTask(path, size, self._memory_cost(size, legacy=True))
+
+        def run(task: BatchTask) -> BatchResult:
+            key_id = self._migrate_file(task.path, password, key, key_name, cipher)
+            return BatchResult(str(task.path), str(task.path), value=key_id)
+
+        scheduler = scheduler or BatchScheduler(workers, memory_budget)
+        try:
+            with self.session():
+                if password and not key and not key_name:
+                    self._prime_password_keys(
+                        password, self._batch_salts(inputs, pattern, legacy_only=True), kdf_workers)
+                return scheduler.run(tasks(), run, on_result)
+        finally:
+            self.sync()
+
+    def enqueue(self, queue: WorkQueue, inputs: Iterable[str], output_dir: Optional[str] = None,
+                operation: str = 'encrypt', pattern: Optional[str] = None) -> int:
+        """Add files and directory trees to a shared work queue.
+
+        Paths are stored resolved, so the queue should be submitted from a
+        host that sees the shared storage at the same paths as the workers.
+
+        Args:
+            queue: Work queue on shared storage
+            inputs: Files and/or directories
+            output_dir: Output directory (default: each worker's sandbox)
+            operation: 'encrypt' or 'decrypt'
+            pattern: Filename glob inside directories (default depends on operation)
+
+        Returns:
+            Number of tasks added
+        """
+        if operation not in ('encrypt', 'decrypt'):
+            raise ValueError(f"Invalid operation: {operation}")
+        if pattern is None:
+            pattern = "*" if operation == 'encrypt' else "*.encrypted"
+        output_dir = Path(output_dir).resolve() if output_dir else None
+
+        def tasks():
+            for path, root in walk_files(inputs, pattern):
+                output = self._batch_output(path.resolve(), root.resolve(), output_dir, operation)
+                yield {
+                    'operation': operation,
+                    'path': str(path.resolve()),
+                    'output': str(output) if output else None,
+                    'size': path.stat().st_size,
                 }
-            except Exception:
-                raise ValueError("Invalid key format. Key must be base64 encoded.")
 
-        self._save_keys(keys)
+        return queue.enqueue(tasks())
 
-    def list_keys(self) -> Dict[str, Any]:
+    def work(self, queue: WorkQueue, password: Optional[str] = None, key: Optional[str] = None,
+             key_name: Optional[str] = None, cipher: Optional[str] = None,
+             threads: int = 1, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+             wait: bool = True, on_task: Optional[Callable] = None,
+             progress: Optional[ProgressCallback] = None, io_mode: str = IO_CACHED,
+             throttle: Optional[Throttle] = None) -> int:
+        """Process tasks from a shared work queue until it is drained.
+
+        Args:
+            queue: Work queue on shared storage
+            password: Password for encryption/decryption
+            key: Direct key (base64, decrypt tasks only)
+            key_name: Name of saved key
+            cipher: Cipher suite override for encrypt tasks
+            threads: Tasks processed concurrently by this worker
+            lease_seconds: Lease length (renewed while a file is processed)
+            wait: Keep polling until other workers' leases are resolved
+            on_task: Callback invoked with (task, error) after each task
+            progress: Callback receiving Progress for each file (named by path)
+            io_mode: 'cached' or 'streaming' for every file this worker handles
+            throttle: I/O rate and crypto concurrency limits for this worker
+
+        Returns:
+            Number of tasks completed by this worker
+        """
+        # Auto-generated per-file keys would only exist in this worker's key
+        # store, so encrypted batches must share a saved key
+        if key_name is None and 'encrypt' in queue.operations():
+            raise ValueError("Queued encryption requires a saved key (key_name) "
+                             "available to every worker")
+
+        def handle(task):
+            if task['operation'] == 'encrypt':
+                return self.encrypt_file(task['path'], task['output'], password, key_name, cipher,
+                                         progress=progress, io_mode=io_mode, throttle=throttle)
+            return self.decrypt_file(task['path'], task['output'], password, key, key_name,
+                                     progress=progress, io_mode=io_mode, throttle=throttle), None
+
+        try:
+            with self.session():
+                return run_worker(queue, handle, threads=threads, lease_seconds=lease_seconds,
+                                  wait=wait, on_task=on_task)
+        finally:
+            self.sync()
+
+    def watch(self, source: str, output_dir: Optional[str] = None,
+              password: Optional[str] = None, key_name: Optional[str] = None,
+              cipher: Optional[str] = None, pattern: str = "*",
+              workers: int = DEFAULT_WORKERS, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+              debounce: float = DEFAULT_DEBOUNCE, poll_interval: float = DEFAULT_POLL_INTERVAL,
+              polling: bool = False, initial_scan: bool = True,
+              stop: Optional[threading.Event] = None,
+              on_result: Optional[Callable[[BatchResult], None]] = None,
+              progress: Optional[ProgressCallback] = None, io_mode: str = IO_CACHED,
+              throttle: Optional[Throttle] = None) -> int:
+        """Encrypt files below a directory as they appear or change.
+
+        Runs until ``stop`` is set. Changes are debounced and coalesced into
+        batches, which run on one worker pool kept for the whole watch, in a
+        single key session (password keys are derived once). Each output
+        takes its source's modification time, so files whose output is
+        current are skipped, including on the catch-up scan after a restart
+        (with remote storage every file found is encrypted again).
+
+        Args:
+            source: Directory to watch recursively
+            output_dir: Output directory mirroring the tree (default: sandbox)
+            password: Password for encryption
+            key_name: Name of saved key to use
+            cipher: Cipher suite override (default: the vault's cipher)
+            pattern: Filename glob of files to encrypt
+            workers: Maximum concurrent files
+            memory_budget: In-flight memory budget in bytes per batch
+            debounce: Seconds a file must be unchanged before it is encrypted
+            poll_interval: Seconds between scans when polling
+            polling: Poll even where inotify is available
+            initial_scan: First encrypt existing files whose output is missing
+                or out of date
+            stop: Event that ends the watch after the current batch
+            on_result: Callback invoked as each file finishes
+            progress: Callback receiving Progress for each file (named by path)
+            io_mode: 'cached' or 'streaming' for every file
+            throttle: I/O rate and crypto concurrency limits for the watch
+
+        Returns:
+            Number of files encrypted
+        """
+        cipher = self._resolve_cipher(cipher) if cipher else self.cipher
+        output_dir = Path(output_dir) if output_dir else self.sandbox_dir
+        legacy = cipher == CIPHER_FERNET
+        check_io_mode(io_mode)
+        root = Path(source)
+        stop = stop or threading.Event()
+        watcher = Watcher(source, pattern, debounce, poll_interval, polling,
+                          exclude=(output_dir, self.sandbox_dir),
+                          ignore_suffixes=(TEMP_SUFFIX, Journal.SUFFIX, Journal.STAGING_SUFFIX))
+
+        def tasks(batch):
+            for path in batch:
+                try:
+                    st = path.stat()
+                except OSError:
+                    # Removed again before its turn
+                    continue
+                output = self._batch_output(path, root, output_dir, 'encrypt')
+                try:
+                    if self.storage.is_local and output.stat().st_mtime_ns == st.st_mtime_ns:
+                        continue
+                except OSError:
+                    pass
+                yield BatchTask(path, st.st_size, self._memory_cost(st.st_size, legacy, io_mode),
+                                output, extra={'mtime_ns': st.st_mtime_ns})
+
+        def run(task: BatchTask) -> BatchResult:
+            output, key_id = self.encrypt_file(str(task.path), str(task.output),
+                                               password, key_name, cipher, progress=progress,
+                                               io_mode=io_mode, throttle=throttle)
+            # Stamp the output with the source mtime seen before encrypting: a
+            # write during encryption changes the source mtime, so the file
+            # is picked up again instead of looking current
+            if self.storage.is_local:
+                mtime_ns = task.extra['mtime_ns']
+                os.utime(output, ns=(mtime_ns, mtime_ns))
+            return BatchResult(str(task.path), output, value=key_id)
+
+        encrypted = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cryptvault-watch") as pool, \
+                self.session():
+            scheduler = BatchScheduler(workers, memory_budget, executor=pool)
+            for batch in watcher.batches(stop, watcher.files() if initial_scan else ()):
+                try:
+                    results = scheduler.run(tasks(batch), run, on_result)
+                finally:
+                    self.sync()
+                encrypted += sum(1 for r in results if r.ok)
+        return encrypted
+
+    def sync(self) -> None:
+        """Flush batched outputs to stable storage (group commit).
+
+        Only does work with the 'batch' durability policy, where it fsyncs
+        every file and directory written since the previous call.
+        """
+        self.local.sync()
+        if self.storage is not self.local:
+            self.storage.sync()
+
+    @staticmethod
+    def _remove_output(path: Path) -> None:
+        """Delete a local output, with its parts if it is a volume index."""
+        try:
+            with open(path, 'rb') as f:
+                if is_volume_index(f.read(len(VOLUME_MAGIC))):
+                    f.seek(0)
+                    for part in read_index(f)['parts']:
+                        Path(part_path(str(path), part)).unlink(missing_ok=True)
+        except (OSError, VolumeError):
+            pass
+        path.unlink(missing_ok=True)
+
+    def gc(self, max_age_days: Optional[float] = None, keep: Optional[int] = None,
+           max_total_size: Optional[int] = None, prune_unknown: bool = False,
+           dry_run: bool = False, drop_unused_keys: bool = False) -> Dict[str, Any]:
+        """Remove expired sandbox outputs and compact the key store.
+
+        Outputs in the sandbox are ranked newest first; a file expires when it
+        is older than ``max_age_days``, beyond the newest ``keep`` files, or
+        would push the retained total past ``max_total_size``. Key-store file
+        references to removed or vanished outputs are pruned in one
+        transaction. Key entries are never deleted unless
+        ``drop_unused_keys`` is set: an output missing from its recorded
+        path may only have been moved, and its key is the only way to
+        decrypt it.
+
+        Args:
+            max_age_days: Maximum age of retained outputs
+            keep: Maximum number of retained outputs
+            max_total_size: Byte budget for retained outputs
+            prune_unknown: Also prune references the catalog and sandbox know
+                nothing about (e.g. stores written before the catalog existed)
+            dry_run: Report what would change without touching anything
+            drop_unused_keys: Also delete auto-generated ``key_*`` entries
+                whose references were all pruned (irreversible)
+
+        Returns:
+            Report dictionary (removed, freed_bytes, pruned_refs, dropped_keys)
+        """
+        sandbox = self.sandbox_dir.resolve()
+        outputs = {}
+        vanished = []
+        live_elsewhere = set()
+        # References hold bare file names, so catalogued outputs are matched
+        # on (key, name): a same-named file under another key stays unaffected
+        key_ids = {}
+
+        for entry in self.catalog.query():
+            if '://' in entry['path']:
+                # Objects in remote storage are never collected here
+                live_elsewhere.add(entry['name'])
+                continue
+            path = Path(entry['path'])
+            key_ids[path] = entry['key_id']
+            if not path.exists():
+                vanished.append(path)
+            elif path.parent == sandbox:
+                outputs[path] = (entry['created'], entry['stored_size'])
+            else:
+                live_elsewhere.add(path.name)
+
+        # Outputs written before the catalog existed are ranked by mtime;
+        # temporaries abandoned by a crash are removed after a day
+        stale_tmp_cutoff = datetime.now().timestamp() - 86400
+        for path in sandbox.iterdir():
+            if path.suffix == TEMP_SUFFIX and path.stat().st_mtime < stale_tmp_cutoff:
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+            elif path.suffix in ('.encrypted', '.decrypted') and path not in outputs and path.is_file():
+                stat = path.stat()
+                outputs[path] = (datetime.fromtimestamp(stat.st_mtime).isoformat(), stat.st_size)
+
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+
+        expired = []
+        retained_size = 0
+        newest_first = sorted(outputs.items(), key=lambda item: item[1][0], reverse=True)
+        for rank, (path, (created, size)) in enumerate(newest_first):
+            if ((keep is not None and rank >= keep)
+                    or (cutoff is not None and created < cutoff)
+                    or (max_total_size is not None and retained_size + size > max_total_size)):
+                expired.append(path)
+            else:
+                retained_size += size
+
+        # Prune key-store references
+        expired_set = set(expired)
+        live = {path.name for path in outputs if path not in expired_set} | live_elsewhere
+        gone = {(key_ids.get(path), path.name) for path in expired + vanished}
+        gone_uncatalogued = {path.name for path in expired if key_ids.get(path) is None}
+
+        pruned = []
+        referenced, kept = set(), set()
+        for name, f in self.keystore.iter_refs():
+            referenced.add(name)
+            if f not in live and ((name, f) in gone or f in gone_uncatalogued or prune_unknown):
+                pruned.append((name, f))
+            else:
+                kept.add(name)
+        dropped_keys = []
+        if drop_unused_keys:
+            dropped_keys = [name for name in self.keystore.records()
+                            if name in referenced and name not in kept and name.startswith('key_')]
+
+        freed = sum(outputs[path][1] for path in expired)
+        if not dry_run:
+            for path in expired:
+                self._remove_output(path)
+            self.catalog.remove_many(expired + vanished)
+            self.keystore.remove_refs(pruned)
+            self.keystore.delete(dropped_keys)
+
+        return {
+            'removed': [str(path) for path in expired],
+            'freed_bytes': freed,
+            'pruned_refs': len(pruned),
+            'dropped_keys': dropped_keys,
+        }
+
+    def list_keys(self) -> Dict[str, KeyRecord]:
         """List all saved keys.
 
         Returns:
-            Dictionary of saved keys
+            Dictionary of saved keys (read-only records; each record's
+            'files' list is loaded only when accessed)
+        """
+        return self.keystore.records()
+
+    def query_keys(self, name: Optional[str] = None, key_type: Optional[str] = None,
+                   created_after: Optional[str] = None, limit: Optional[int] = None,
+                   offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """Stream summaries of saved keys from the key-store index.
+
+        Only the matching page is read; secrets and file lists are never
+        loaded.
+
+        Args:
+            name: Key name glob pattern
+            key_type: 'password' or 'key'
+            created_after: ISO timestamp; only keys created at or after it
+            limit: Maximum number of keys
+            offset: Number of matching keys to skip
+
+        Yields:
+            Dictionaries with name, type, created and files (count)
         """
-        return self._load_keys()
+        return self.keystore.query(limit=limit, offset=offset, name=name,
+                                   key_type=key_type, created_after=created_after)
+
+
+class _CountingHasher:
+    """Hasher wrapper that also counts the bytes it was fed."""
+
+    def __init__(self, hasher: Any):
+        self.hasher = hasher
+        self.name = hasher.name
+        self.size = 0
+
+    def update(self, data: bytes) -> None:
+        self.size += len(data)
+        self.hasher.update(data)
+
+    def digest(self) -> bytes:
+        return self.hasher.digest()
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+def _is_stream(path: Optional[str]) -> bool:
+    """Check whether a CLI path argument refers to stdin/stdout."""
+    return path == '-'
+
+
+def _open_streams(stack: ExitStack, vault: CryptVault, input_path: str,
+                  output_path: Optional[str], encrypted: bool = False,
+                  volume_workers: int = 1) -> tuple[BinaryIO, BinaryIO, str]:
+    """Open CLI input/output for streaming, mapping '-' to stdin/stdout.
+
+    An ``encrypted`` input file may be a volume set, read as one stream.
+
+    Returns:
+        Tuple of (source, destination, output name)
+    """
+    if _is_stream(input_path):
+        src = sys.stdin.buffer
+    elif encrypted:
+        src = stack.enter_context(vault.open_encrypted(input_path, volume_workers))
+    else:
+        src = stack.enter_context(open(input_path, 'rb'))
+
+    if output_path is None or _is_stream(output_path):
+        return src, sys.stdout.buffer, STREAM_NAME
+
+    output_path = Path(output_path)
+    return src, stack.enter_context(vault.local.writer(str(output_path))), output_path.name
+
+
+def _print_progress(progress) -> None:
+    # Progress goes to stderr so it never mixes with streamed output
+    print(format_progress(progress), file=sys.stderr, flush=True)
+
+
+def _progress_callback(args) -> Optional[ProgressCallback]:
+    return _print_progress if getattr(args, 'progress', False) else None
+
+
+def _throttle(args) -> Optional[Throttle]:
+    """Throttle for --io-rate/--crypto-workers/--control-file (SIGHUP reloads the file)."""
+    if not (args.io_rate or args.crypto_workers or args.control_file):
+        return None
+    throttle = Throttle(args.io_rate, args.crypto_workers, args.control_file)
+    if args.control_file:
+        throttle.install_signal_handler()
+    return throttle
 
 
 def cmd_encrypt(args, vault: CryptVault):
     """Handle encrypt command."""
+    streaming = _is_stream(args.input) or _is_stream(args.output)
+    # Keep stdout clean for ciphertext when streaming
+    log = sys.stderr if streaming else sys.stdout
     try:
-        output_path, key_id = vault.encrypt_file(
-            args.input,
-            args.output,
-            args.password,
-            args.key_name
-        )
-
-        print(f"[OK] File encrypted: {output_path}")
+        if streaming and args.resume:
+            raise ValueError("--resume cannot be used with stdin/stdout")
+        if streaming and args.recipient:
+            raise ValueError("--recipient cannot be used with stdin/stdout")
+        if streaming and args.volume_size:
+            raise ValueError("--volume-size cannot be used with stdin/stdout")
+        if streaming and args.output and not _is_stream(args.output):
+            # stdin to a file: written and cataloged like any other output
+            key_id = vault.encrypt_stream(sys.stdin.buffer, None, args.password, args.key_name,
+                                          args.cipher, name=Path(args.output).name,
+                                          progress=_progress_callback(args), throttle=_throttle(args),
+                                          output_path=args.output)
+            output_path = args.output
+        elif streaming:
+            with ExitStack() as stack:
+                src, dst, name = _open_streams(stack, vault, args.input, args.output)
+                key_id = vault.encrypt_stream(src, dst, args.password, args.key_name,
+                                              args.cipher, name=name, progress=_progress_callback(args),
+                                              throttle=_throttle(args))
+                dst.flush()
+            output_path = "<stdout>"
+        else:
+            output_path, key_id = vault.encrypt_file(
+                args.input,
+                args.output,
+                args.password,
+                args.key_name,
+                args.cipher,
+                resumable=args.resume,
+                progress=_progress_callback(args),
+                io_mode=args.io_mode,
+                throttle=_throttle(args),
+                recipients=dict(args.recipient) if args.recipient else None,
+                digest=args.digest,
+                volume_size=args.volume_size
+            )
+
+        print(f"[OK] File encrypted: {output_path}", file=log)
+        if args.recipient:
+            print(f"[OK] Shared with: {', '.join(vault.recipients(output_path))}", file=log)
 
         if not args.key_name:
-            keys = vault._load_keys()
-            key_data = keys[key_id]
+            key_data = vault.keystore.get(key_id)
 
             if key_data['type'] == 'key':
                 # Show random key
                 random_key = key_data['key']
-                print(f"[!] Randomly generated key: {random_key}")
-                print(f"[!] IMPORTANT: Save this key! You'll need it to decrypt.")
+                print(f"[!] Randomly generated key: {random_key}", file=log)
+                print(f"[!] IMPORTANT: Save this key! You'll need it to decrypt.", file=log)
 
-            print(f"[OK] Key saved as: {key_id}")
+            print(f"[OK] Key saved as: {key_id}", file=log)
         else:
-            print(f"[OK] Using saved key: {args.key_name}")
+            print(f"[OK] Using saved key: {args.key_name}", file=log)
 
     except Exception as e:
-        print(f"ERROR: {e}")
+        print(f"ERROR: {e}", file=log)
         sys.exit(1)
 
 
 def cmd_decrypt(args, vault: CryptVault):
     """Handle decrypt command."""
+    streaming = _is_stream(args.input) or _is_stream(args.output)
+    log = sys.stderr if streaming else sys.stdout
     try:
         if args.key_name:
-            print(f"[OK] Using saved key: {args.key_name}")
-
-        output_path = vault.decrypt_file(
-            args.input,
-            args.output,
-            args.password,
-            args.key,
-            args.key_name
-        )
-
-        print(f"[OK] File decrypted: {output_path}")
+            print(f"[OK] Using saved key: {args.key_name}", file=log)
+
+        if streaming and args.resume:
+            raise ValueError("--resume cannot be used with stdin/stdout")
+        if streaming:
+            with ExitStack() as stack:
+                src, dst, _ = _open_streams(stack, vault, args.input, args.output,
+                                            encrypted=True, volume_workers=args.volume_workers)
+                name = STREAM_NAME if _is_stream(args.input) else Path(args.input).name
+                vault.decrypt_stream(src, dst, args.password, args.key, args.key_name, name=name,
+                                     progress=_progress_callback(args), throttle=_throttle(args))
+                dst.flush()
+            output_path = args.output if args.output and not _is_stream(args.output) else "<stdout>"
+        else:
+            output_path = vault.decrypt_file(
+                args.input,
+                args.output,
+                args.password,
+                args.key,
+                args.key_name,
+                resumable=args.resume,
+                progress=_progress_callback(args),
+                io_mode=args.io_mode,
+                throttle=_throttle(args),
+                volume_workers=args.volume_workers
+            )
+
+        print(f"[OK] File decrypted: {output_path}", file=log)
 
     except Exception as e:
-        print(f"ERROR: {e}")
+        print(f"ERROR: {e}", file=log)
         sys.exit(1)
 
 
@@ -386,24 +2187,404 @@ def cmd_save_key(args, vault: CryptVault):
 
 def cmd_list_keys(args, vault: CryptVault):
     """Handle list-keys command."""
-    keys = vault.list_keys()
+    filters = {
+        'name': args.name,
+        'key_type': args.type,
+        'created_after': args.created_after,
+    }
+    try:
+        keys = vault.query_keys(limit=args.limit, offset=args.offset, **filters)
+
+        if args.json:
+            # NDJSON: one key per line, flushed as it is read
+            for data in keys:
+                print(json.dumps(data), flush=True)
+            return
+
+        shown = 0
+        for data in keys:
+            if not shown:
+                print("[*] Saved keys:")
+                print("-" * 60)
+            shown += 1
+            print(f"  * {data['name']}")
+            print(f"    Type: {data['type']}")
+            print(f"    Created: {data['created'] or 'N/A'}")
+            print(f"    Used for: {data['files']} files")
+            print()
+        total = vault.keystore.count(**filters)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
-    if not keys:
+    if not shown:
         print("No saved keys found.")
         return
 
-    print("[*] Saved keys:")
     print("-" * 60)
+    if shown < total:
+        print(f"Total: {total} saved keys (showing {args.offset + 1}-{args.offset + shown})")
+    else:
+        print(f"Total: {total} saved keys")
+
+
+def cmd_import_keys(args, vault: CryptVault):
+    """Handle import-keys command."""
+    try:
+        if _is_stream(args.input):
+            count = vault.import_keys(sys.stdin, replace=args.replace)
+        else:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                count = vault.import_keys(f, replace=args.replace)
+        print(f"[OK] Imported {count} keys")
+
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
-    for name, data in keys.items():
-        print(f"  * {name}")
-        print(f"    Type: {data['type']}")
-        print(f"    Created: {data.get('created', 'N/A')}")
-        print(f"    Used for: {len(data.get('files', []))} files")
-        print()
 
+def cmd_export_keys(args, vault: CryptVault):
+    """Handle export-keys command."""
+    streaming = _is_stream(args.output)
+    try:
+        if streaming:
+            count = vault.export_keys(sys.stdout, name=args.name, key_type=args.type,
+                                      legacy=args.legacy)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                count = vault.export_keys(f, name=args.name, key_type=args.type, legacy=args.legacy)
+        print(f"[OK] Exported {count} keys", file=sys.stderr if streaming else sys.stdout)
+
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr if streaming else sys.stdout)
+        sys.exit(1)
+
+
+def cmd_ls(args, vault: CryptVault):
+    """Handle ls command."""
+    filters = {
+        'key_id': args.key,
+        'kind': args.kind,
+        'cipher': args.cipher,
+        'name': args.name,
+    }
+    now = datetime.now()
+    if args.older_than is not None:
+        filters['created_before'] = (now - timedelta(days=args.older_than)).isoformat()
+    if args.newer_than is not None:
+        filters['created_after'] = (now - timedelta(days=args.newer_than)).isoformat()
+
+    try:
+        entries = vault.catalog.query(sort=args.sort, descending=args.reverse,
+                                      limit=args.limit, **filters)
+        summary = vault.catalog.summary(**filters)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    if not args.summary:
+        for entry in entries:
+            print(f"{entry['created'][:19]}  {entry['stored_size']:>12}  "
+                  f"{entry['kind']:<9}  {entry['cipher'] or '-':<17}  "
+                  f"{entry['key_id'] or '-':<28}  {entry['name']}")
+
+    print(f"Total: {summary['count']} files, {summary['total_size']} bytes")
+
+
+def _print_batch_result(result: BatchResult) -> None:
+    if result.ok:
+        print(f"[OK] {result.path} -> {result.output}")
+    else:
+        print(f"[FAIL] {result.path}: {result.error}")
+
+
+def _report_batch(results: List[BatchResult]) -> None:
+    failed = sum(1 for r in results if not r.ok)
     print("-" * 60)
-    print(f"Total: {len(keys)} saved keys")
+    print(f"Total: {len(results)} files, {len(results) - failed} succeeded, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+def cmd_batch_encrypt(args, vault: CryptVault):
+    """Handle batch-encrypt command."""
+    try:
+        results = vault.encrypt_batch(
+            args.inputs, args.output, args.password, args.key_name, args.cipher,
+            pattern=args.pattern, workers=args.workers, memory_budget=args.memory_budget,
+            on_result=_print_batch_result, session=not args.no_session,
+            progress=_progress_callback(args), io_mode=args.io_mode, throttle=_throttle(args),
+            digest=args.digest, volume_size=args.volume_size, autotune=args.autotune,
+        )
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    _report_batch(results)
+
+
+def cmd_batch_decrypt(args, vault: CryptVault):
+    """Handle batch-decrypt command."""
+    try:
+        results = vault.decrypt_batch(
+            args.inputs, args.output, args.password, args.key, args.key_name,
+            pattern=args.pattern, workers=args.workers, memory_budget=args.memory_budget,
+            on_result=_print_batch_result, session=not args.no_session,
+            progress=_progress_callback(args), io_mode=args.io_mode, throttle=_throttle(args),
+            kdf_workers=args.kdf_workers,
+        )
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    _report_batch(results)
+
+
+def cmd_migrate(args, vault: CryptVault):
+    """Handle migrate command."""
+    try:
+        results = vault.migrate(
+            args.inputs, args.password, args.key, args.key_name, args.cipher,
+            pattern=args.pattern, workers=args.workers, memory_budget=args.memory_budget,
+            on_result=_print_batch_result, kdf_workers=args.kdf_workers,
+        )
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if not results:
+        print("[OK] Nothing to migrate: no legacy Fernet files found")
+        return
+    _report_batch(results)
+
+
+def cmd_enqueue(args, vault: CryptVault):
+    """Handle enqueue command."""
+    queue = WorkQueue(args.queue, max_attempts=args.max_attempts)
+    try:
+        added = vault.enqueue(queue, args.inputs, args.output,
+                              'decrypt' if args.decrypt else 'encrypt', args.pattern)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print(f"[OK] Queued {added} files in {args.queue}")
+
+
+def cmd_autotune(args, vault: CryptVault):
+    """Handle autotune command."""
+    try:
+        tuning = vault.autotune(args.sources, args.output, args.sample_size, args.cipher)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print(f"[OK] Tuned {args.output or vault.sandbox_dir}: segment size {tuning.segment_size // 1024} KiB, "
+          f"{tuning.workers} workers ({tuning.throughput / 1024 ** 2:.1f} MiB/s)")
+
+
+def cmd_verify(args, vault: CryptVault):
+    """Handle verify command."""
+    start, end = args.segments
+    checked = corrupted = 0
+    try:
+        for path, _ in walk_files(args.inputs, args.pattern):
+            try:
+                volumes = vault.verify_volumes(str(path), args.workers)
+            except VolumeError as e:
+                corrupted += 1
+                print(f"[CORRUPT] {path}: {e}")
+                continue
+            if volumes is not None:
+                if volumes.ok:
+                    checked += 1
+                    print(f"[OK] {path}: {len(volumes.parts)} parts")
+                    continue
+                corrupted += 1
+                for number in volumes.damaged:
+                    print(f"[CORRUPT] {path}: part {number} ({volumes.parts[number - 1]})")
+                continue
+            try:
+                report = vault.verify_file(str(path), start, end, args.workers)
+            except ContainerError as e:
+                # Header or tree unreadable
+                corrupted += 1
+                print(f"[CORRUPT] {path}: {e}")
+                continue
+            if report is None:
+                print(f"[SKIP] {path}: no Merkle tree")
+                continue
+            checked += 1
+            if report.ok:
+                print(f"[OK] {path}: segments {report.start}-{report.end - 1} of {report.segments}")
+                continue
+            corrupted += 1
+            if not report.tree_ok:
+                print(f"[CORRUPT] {path}: Merkle tree damaged")
+            for index in report.corrupt:
+                first, last = report.plaintext_range(index)
+                print(f"[CORRUPT] {path}: segment {index} (plaintext bytes {first}-{last})")
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print("-" * 60)
+    print(f"Total: {checked + corrupted} files checked, {corrupted} corrupted")
+    if corrupted:
+        sys.exit(1)
+
+
+def cmd_recipients(args, vault: CryptVault):
+    """Handle recipients command."""
+    try:
+        if args.add:
+            name, password = args.add
+            recipients = vault.add_recipient(args.input, name, password,
+                                             args.password, args.key, args.key_name)
+            print(f"[OK] Added recipient: {name}")
+        elif args.remove:
+            recipients = vault.remove_recipient(args.input, args.remove)
+            print(f"[OK] Removed recipient: {args.remove}")
+        else:
+            recipients = vault.recipients(args.input)
+        if recipients:
+            print(f"[OK] Recipients of {args.input}: {', '.join(recipients)}")
+        else:
+            print(f"[OK] {args.input} is not shared (encrypted for a single key)")
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def cmd_watch(args, vault: CryptVault):
+    """Handle watch command."""
+    stop = threading.Event()
+    # Finish the batch in progress, then exit
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    print(f"[*] Watching {args.source} (Ctrl+C to stop)")
+    try:
+        count = vault.watch(
+            args.source, args.output, args.password, args.key_name, args.cipher,
+            pattern=args.pattern, workers=args.workers, memory_budget=args.memory_budget,
+            debounce=args.debounce, poll_interval=args.poll_interval, polling=args.poll,
+            initial_scan=not args.no_initial_scan, stop=stop, on_result=_print_batch_result,
+            progress=_progress_callback(args), io_mode=args.io_mode, throttle=_throttle(args),
+        )
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print(f"[OK] Watch stopped; {count} files encrypted")
+
+
+def _print_queue_report(report: Dict[str, Any]) -> None:
+    statuses = report['statuses']
+    print("-" * 60)
+    print(f"Queue: {report['total']} files")
+    for status, totals in statuses.items():
+        print(f"  {status:<8} {totals['count']:>8} files  {totals['bytes']:>16} bytes")
+    for owner, totals in report['workers'].items():
+        print(f"  worker {owner}: {totals['count']} files, {totals['bytes']} bytes")
+    for failure in report['failures']:
+        print(f"[FAIL] {failure['path']} (attempts: {failure['attempts']}): {failure['error']}")
+
+
+def cmd_worker(args, vault: CryptVault):
+    """Handle worker command."""
+    queue = WorkQueue(args.queue, max_attempts=args.max_attempts)
+    try:
+        if args.retry_failed:
+            print(f"[OK] Requeued {queue.retry_failed()} failed files")
+        if not args.report:
+            def on_task(task, error):
+                if error is None:
+                    print(f"[OK] {task['path']}")
+                else:
+                    print(f"[RETRY] {task['path']} (attempt {task['attempts']}): {error}")
+
+            done = vault.work(queue, args.password, args.key, args.key_name, args.cipher,
+                              threads=args.workers, lease_seconds=args.lease,
+                              wait=not args.no_wait, on_task=on_task,
+                              progress=_progress_callback(args), io_mode=args.io_mode,
+                              throttle=_throttle(args))
+            print(f"[OK] This worker completed {done} files")
+        report = queue.report()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    _print_queue_report(report)
+    if report['failures']:
+        sys.exit(1)
+
+
+def parse_timestamp(value: str) -> str:
+    """Validate an ISO date/timestamp and normalize it for comparisons."""
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date: {value}")
+
+
+def parse_recipient(value: str) -> tuple[str, Optional[str]]:
+    """Parse a NAME[=PASSWORD] recipient argument."""
+    name, _, password = value.partition('=')
+    if not name:
+        raise argparse.ArgumentTypeError(f"invalid recipient '{value}' (expected NAME[=PASSWORD])")
+    return name, password or None
+
+
+def parse_segment_range(value: str) -> tuple[int, Optional[int]]:
+    """Parse START:END (either side may be empty) into a segment range."""
+    first, sep, last = value.partition(':')
+    try:
+        if not sep:
+            return int(first), int(first) + 1
+        return int(first or 0), int(last) if last else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid segment range: {value}")
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte size with an optional K/M/G/T suffix (powers of 1024)."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    value = value.strip().upper().rstrip('B')
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size: {value}")
+
+
+def cmd_gc(args, vault: CryptVault):
+    """Handle gc command."""
+    policy = {
+        'max_age_days': args.max_age,
+        'keep': args.keep,
+        'max_total_size': args.max_size,
+        'prune_unknown': args.prune_unknown,
+        'drop_unused_keys': args.drop_unused_keys,
+    }
+    try:
+        if args.drop_unused_keys and not args.dry_run and not args.yes:
+            doomed = vault.gc(dry_run=True, **policy)['dropped_keys']
+            if doomed:
+                print("[!] These keys will be deleted permanently; files encrypted with them")
+                print("[!] (including copies moved elsewhere) can no longer be decrypted:")
+                for name in doomed:
+                    print(f"  - {name}")
+                try:
+                    answer = input("Delete them? [y/N] ")
+                except EOFError:
+                    answer = ""
+                if answer.strip().lower() not in ('y', 'yes'):
+                    print("Aborted: nothing was changed.")
+                    sys.exit(1)
+        report = vault.gc(dry_run=args.dry_run, **policy)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    verb = "Would remove" if args.dry_run else "Removed"
+    for path in report['removed']:
+        print(f"  - {path}")
+    print(f"[OK] {verb} {len(report['removed'])} files ({report['freed_bytes']} bytes)")
+    print(f"[OK] Pruned {report['pruned_refs']} stale key references, "
+          f"dropped {len(report['dropped_keys'])} unused keys")
 
 
 def main():
@@ -422,12 +2603,49 @@ Examples:
   # Decrypt with password
   %(prog)s decrypt sandbox/document.pdf.encrypted -p MyPassword123
 
+  # Encrypt a directory tree with 8 workers
+  %(prog)s batch-encrypt ~/Documents -o /backup/docs -k work-projects -p MyWorkPass2024 -j 8
+
+  # Keep encrypting new and changed files into a backup directory
+  %(prog)s watch ~/Documents /backup/docs -k work-projects -p MyWorkPass2024
+
+  # Share a file with a second saved key (adds a few hundred bytes)
+  %(prog)s encrypt report.pdf -k work-projects -p MyWorkPass2024 -r audit-team
+  %(prog)s recipients sandbox/report.pdf.encrypted --add legal=LegalPass -n work-projects -p MyWorkPass2024
+
+  # Move an archive of legacy Fernet files to the container format
+  %(prog)s migrate /backup/docs -p MyWorkPass2024 -j 8
+
+  # Scrub an archive for damaged segments (no key needed)
+  %(prog)s verify /backup/docs -j 8
+
+  # Measure the best segment size and concurrency for a backup target once;
+  # later runs writing there use it automatically
+  %(prog)s autotune ~/Documents -o /mnt/nfs/backup
+
+  # Split a large output into 1 GiB parts, check them after a transfer, decrypt 4 at a time
+  %(prog)s encrypt disk.img -o /mnt/usb/disk.img.encrypted -k backup -p BackupPass --volume-size 1G
+  %(prog)s verify /mnt/usb/disk.img.encrypted
+  %(prog)s decrypt /mnt/usb/disk.img.encrypted -o disk.img -k backup -p BackupPass --volume-workers 4
+
   # Save a key
   %(prog)s save-key work-projects -p MyWorkPass2024
 
+  # Stream through a pipeline (no temporary files)
+  tar c dir | %(prog)s encrypt - -k work-projects -p MyWorkPass2024 | ssh host 'cat > dir.tar.encrypted'
+
   # List saved keys
   %(prog)s list-keys
 
+  # Copy saved keys to another sandbox
+  %(prog)s export-keys -o keys.ndjson && %(prog)s --sandbox-dir other import-keys keys.ndjson
+
+  # Remove outputs older than 30 days and compact the key store
+  %(prog)s gc --max-age 30
+
+  # Largest encrypted files older than 30 days
+  %(prog)s ls --kind encrypted --older-than 30 --sort size --reverse
+
 For more help: See docs/USAGE.md
 """
     )
@@ -435,24 +2653,199 @@ For more help: See docs/USAGE.md
     # Global options
     parser.add_argument('--sandbox-dir', default='sandbox',
                         help='Sandbox directory for encrypted files (default: sandbox)')
+    parser.add_argument('--storage', metavar='URL',
+                        help='Store encrypted files in s3://bucket/prefix or dir:///path instead of locally')
+    parser.add_argument('--s3-endpoint', metavar='URL', help='Endpoint for S3-compatible storage')
+    parser.add_argument('--durability', choices=DURABILITY_POLICIES, default=DURABILITY_NONE,
+                        help='fsync policy for outputs: none, file (each file) or batch '
+                             '(one group fsync at the end of the run) (default: none)')
 
     # Subcommands
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
 
     # Encrypt command
     encrypt_parser = subparsers.add_parser('encrypt', help='Encrypt a file')
-    encrypt_parser.add_argument('input', help='Input file to encrypt')
-    encrypt_parser.add_argument('-o', '--output', help='Output file path')
+    encrypt_parser.add_argument('input', help="Input file to encrypt ('-' for stdin)")
+    encrypt_parser.add_argument('-o', '--output', help="Output file path ('-' for stdout)")
     encrypt_parser.add_argument('-p', '--password', help='Password for encryption')
     encrypt_parser.add_argument('-k', '--key-name', help='Name of saved key to use')
+    encrypt_parser.add_argument('-c', '--cipher', choices=(CIPHER_AUTO,) + CIPHERS,
+                                help='Cipher suite (default: auto, fastest AEAD on this host)')
+    encrypt_parser.add_argument('--resume', action='store_true',
+                                help='Checkpoint progress; re-run the same command to continue after an interruption')
+    encrypt_parser.add_argument('-r', '--recipient', action='append', type=parse_recipient,
+                                metavar='NAME[=PASSWORD]',
+                                help='Also encrypt for this saved key (repeatable; the file is stored once)')
+    encrypt_parser.add_argument('--digest', choices=DIGESTS, default=DEFAULT_DIGEST,
+                                help='Plaintext hash stored with the file and checked on decryption (default: sha256)')
+    encrypt_parser.add_argument('--volume-size', type=parse_size, metavar='SIZE',
+                                help='Split the output into parts of SIZE (e.g. 100M) plus an index')
 
     # Decrypt command
     decrypt_parser = subparsers.add_parser('decrypt', help='Decrypt a file')
-    decrypt_parser.add_argument('input', help='Encrypted file to decrypt')
-    decrypt_parser.add_argument('-o', '--output', help='Output file path')
+    decrypt_parser.add_argument('input', help="Encrypted file to decrypt ('-' for stdin)")
+    decrypt_parser.add_argument('-o', '--output', help="Output file path ('-' for stdout)")
     decrypt_parser.add_argument('-p', '--password', help='Password for decryption')
     decrypt_parser.add_argument('-k', '--key', help='Direct encryption key (base64)')
     decrypt_parser.add_argument('-n', '--key-name', help='Name of saved key')
+    decrypt_parser.add_argument('--resume', action='store_true',
+                                help='Checkpoint progress; re-run the same command to continue after an interruption')
+    decrypt_parser.add_argument('--volume-workers', type=int, default=1, metavar='N',
+                                help='Parts of a split file fetched concurrently (default: 1, in order)')
+
+    # Batch commands
+    batch_encrypt_parser = subparsers.add_parser('batch-encrypt', help='Encrypt files and directories concurrently')
+    batch_encrypt_parser.add_argument('inputs', nargs='+', help='Files and/or directories to encrypt')
+    batch_encrypt_parser.add_argument('-o', '--output', help='Output directory (default: sandbox)')
+    batch_encrypt_parser.add_argument('-p', '--password', help='Password for encryption')
+    batch_encrypt_parser.add_argument('-k', '--key-name', help='Name of saved key to use')
+    batch_encrypt_parser.add_argument('-c', '--cipher', choices=(CIPHER_AUTO,) + CIPHERS,
+                                      help='Cipher suite (default: auto)')
+    batch_encrypt_parser.add_argument('--pattern', default='*', help='Filename glob inside directories (default: *)')
+    batch_encrypt_parser.add_argument('--digest', choices=DIGESTS, default=DEFAULT_DIGEST,
+                                      help='Plaintext hash of every file (default: sha256)')
+    batch_encrypt_parser.add_argument('--volume-size', type=parse_size, metavar='SIZE',
+                                      help='Split each output into parts of SIZE plus an index')
+
+    batch_decrypt_parser = subparsers.add_parser('batch-decrypt', help='Decrypt files and directories concurrently')
+    batch_decrypt_parser.add_argument('inputs', nargs='+', help='Encrypted files and/or directories')
+    batch_decrypt_parser.add_argument('-o', '--output', help='Output directory (restores original names)')
+    batch_decrypt_parser.add_argument('-p', '--password', help='Password for decryption')
+    batch_decrypt_parser.add_argument('-k', '--key', help='Direct encryption key (base64)')
+    batch_decrypt_parser.add_argument('-n', '--key-name', help='Name of saved key')
+    batch_decrypt_parser.add_argument('--pattern', default='*.encrypted',
+                                      help='Filename glob inside directories (default: *.encrypted)')
+    batch_decrypt_parser.add_argument('--kdf-workers', type=int, metavar='N',
+                                      help='Processes deriving the password keys of the batch up front '
+                                           '(default: one per CPU)')
+
+    batch_encrypt_parser.add_argument('-j', '--workers', type=int,
+                                      help=f'Concurrent files (default: autotuned for the output, '
+                                           f'else {DEFAULT_WORKERS})')
+    batch_encrypt_parser.add_argument('--autotune', action='store_true',
+                                      help='Benchmark the output first unless it is already tuned')
+    batch_decrypt_parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                                      help=f'Concurrent files (default: {DEFAULT_WORKERS})')
+
+    for batch_parser in (batch_encrypt_parser, batch_decrypt_parser):
+        batch_parser.add_argument('--memory-budget', type=parse_size, default=DEFAULT_MEMORY_BUDGET,
+                                  metavar='SIZE', help='In-flight memory budget (default: 256M)')
+        batch_parser.add_argument('--no-session', action='store_true',
+                                  help='Derive a separate password key (and key entry) per file')
+
+    # Autotune command
+    autotune_parser = subparsers.add_parser('autotune', help='Measure the fastest segment size and worker count '
+                                                             'for a source and output directory')
+    autotune_parser.add_argument('sources', nargs='+', help='Files and/or directories to sample')
+    autotune_parser.add_argument('-o', '--output', help='Output directory to tune (default: sandbox)')
+    autotune_parser.add_argument('-c', '--cipher', choices=(CIPHER_AUTO,) + tuple(AEAD_CIPHERS),
+                                 help='Cipher suite to measure (default: auto)')
+    autotune_parser.add_argument('--sample-size', type=parse_size, default=DEFAULT_SAMPLE_SIZE,
+                                 metavar='SIZE', help='Bytes encrypted per candidate (default: 32M)')
+
+    # Migrate command
+    migrate_parser = subparsers.add_parser('migrate', help='Convert legacy Fernet files to the container format in place')
+    migrate_parser.add_argument('inputs', nargs='+', help='Encrypted files and/or directories')
+    migrate_parser.add_argument('-p', '--password', help='Password for decryption')
+    migrate_parser.add_argument('-k', '--key', help='Direct encryption key (base64)')
+    migrate_parser.add_argument('-n', '--key-name', help='Name of saved key')
+    migrate_parser.add_argument('-c', '--cipher', choices=(CIPHER_AUTO,) + tuple(AEAD_CIPHERS),
+                                help='Container cipher (default: auto, fastest AEAD on this host)')
+    migrate_parser.add_argument('--pattern', default='*.encrypted',
+                                help='Filename glob inside directories (default: *.encrypted)')
+    migrate_parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                                help=f'Concurrent files (default: {DEFAULT_WORKERS})')
+    migrate_parser.add_argument('--memory-budget', type=parse_size, default=DEFAULT_MEMORY_BUDGET,
+                                metavar='SIZE', help='In-flight memory budget (default: 256M)')
+    migrate_parser.add_argument('--kdf-workers', type=int, metavar='N',
+                                help='Processes deriving password keys up front (default: one per CPU)')
+
+    # Distributed queue commands
+    enqueue_parser = subparsers.add_parser('enqueue', help='Add files to a shared work queue')
+    enqueue_parser.add_argument('queue', help='Queue database on shared storage')
+    enqueue_parser.add_argument('inputs', nargs='+', help='Files and/or directories')
+    enqueue_parser.add_argument('-o', '--output', help="Output directory (default: each worker's sandbox)")
+    enqueue_parser.add_argument('-d', '--decrypt', action='store_true', help='Queue decryption instead of encryption')
+    enqueue_parser.add_argument('--pattern', help='Filename glob inside directories')
+
+    worker_parser = subparsers.add_parser('worker', help='Process files from a shared work queue')
+    worker_parser.add_argument('queue', help='Queue database on shared storage')
+    worker_parser.add_argument('-p', '--password', help='Password for encryption/decryption')
+    worker_parser.add_argument('-n', '--key-name', help='Name of saved key')
+    worker_parser.add_argument('--key', help='Direct encryption key (base64, decryption only)')
+    worker_parser.add_argument('-c', '--cipher', choices=(CIPHER_AUTO,) + CIPHERS,
+                               help='Cipher suite for encryption (default: auto)')
+    worker_parser.add_argument('-j', '--workers', type=int, default=1,
+                               help='Files processed concurrently by this worker (default: 1)')
+    worker_parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, metavar='SECONDS',
+                               help=f'Lease length, renewed while working (default: {DEFAULT_LEASE_SECONDS})')
+    worker_parser.add_argument('--no-wait', action='store_true',
+                               help="Exit when nothing is pending instead of waiting for other workers' leases")
+    worker_parser.add_argument('--retry-failed', action='store_true', help='Requeue failed files first')
+    worker_parser.add_argument('--report', action='store_true', help='Only print the merged queue report')
+
+    # Verify command
+    verify_parser = subparsers.add_parser('verify', help='Check encrypted files against their Merkle tree '
+                                                         'and split files part by part (no key needed)')
+    verify_parser.add_argument('inputs', nargs='+', help='Encrypted files and/or directories')
+    verify_parser.add_argument('--segments', type=parse_segment_range, default=(0, None), metavar='START:END',
+                               help='Only check this range of segments (e.g. 0:1000, 1000:)')
+    verify_parser.add_argument('--pattern', default='*.encrypted',
+                               help='Filename glob inside directories (default: *.encrypted)')
+    verify_parser.add_argument('-j', '--workers', type=int, default=DEFAULT_VERIFY_WORKERS,
+                               help=f'Threads hashing segments (default: {DEFAULT_VERIFY_WORKERS})')
+
+    # Recipients command
+    recipients_parser = subparsers.add_parser('recipients', help='List, add or remove the keys a file is shared with')
+    recipients_parser.add_argument('input', help='Encrypted file')
+    recipients_action = recipients_parser.add_mutually_exclusive_group()
+    recipients_action.add_argument('--add', type=parse_recipient, metavar='NAME[=PASSWORD]',
+                                   help='Share with this saved key (rewrites only the header)')
+    recipients_action.add_argument('--remove', metavar='NAME', help='Stop sharing with this key')
+    recipients_parser.add_argument('-p', '--password', help='Password of a current recipient (for --add)')
+    recipients_parser.add_argument('-k', '--key', help='Direct key of a current recipient (for --add)')
+    recipients_parser.add_argument('-n', '--key-name', help='Saved key name of a current recipient (for --add)')
+
+    # Watch command
+    watch_parser = subparsers.add_parser('watch', help='Encrypt new and changed files in a directory continuously')
+    watch_parser.add_argument('source', help='Directory to watch (recursively)')
+    watch_parser.add_argument('output', nargs='?', help='Output directory (default: sandbox)')
+    watch_parser.add_argument('-p', '--password', help='Password for encryption')
+    watch_parser.add_argument('-k', '--key-name', help='Name of saved key to use')
+    watch_parser.add_argument('-c', '--cipher', choices=(CIPHER_AUTO,) + CIPHERS,
+                              help='Cipher suite (default: auto)')
+    watch_parser.add_argument('--pattern', default='*', help='Filename glob of files to encrypt (default: *)')
+    watch_parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                              help=f'Concurrent files (default: {DEFAULT_WORKERS})')
+    watch_parser.add_argument('--memory-budget', type=parse_size, default=DEFAULT_MEMORY_BUDGET,
+                              metavar='SIZE', help='In-flight memory budget (default: 256M)')
+    watch_parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE, metavar='SECONDS',
+                              help=f'Wait until a file is unchanged this long (default: {DEFAULT_DEBOUNCE})')
+    watch_parser.add_argument('--poll', action='store_true',
+                              help='Scan for changes instead of using inotify (e.g. on network filesystems)')
+    watch_parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, metavar='SECONDS',
+                              help=f'Seconds between scans when polling (default: {DEFAULT_POLL_INTERVAL})')
+    watch_parser.add_argument('--no-initial-scan', action='store_true',
+                              help='Only encrypt changes from now on, not existing out-of-date files')
+
+    for queue_parser in (enqueue_parser, worker_parser):
+        queue_parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                                  help=f'Attempts per file before it fails (default: {DEFAULT_MAX_ATTEMPTS})')
+
+    for progress_parser in (encrypt_parser, decrypt_parser, batch_encrypt_parser,
+                            batch_decrypt_parser, worker_parser, watch_parser):
+        progress_parser.add_argument('--progress', action='store_true',
+                                     help='Report bytes done, rate and ETA on stderr about once per second')
+        progress_parser.add_argument('--io-mode', choices=IO_MODES, default=IO_CACHED,
+                                     help='streaming: large aligned I/O that keeps files out of the '
+                                          'page cache, for bulk backups (default: cached)')
+        progress_parser.add_argument('--io-rate', type=parse_size, metavar='SIZE',
+                                     help='Limit bytes read plus written per second (e.g. 50M)')
+        progress_parser.add_argument('--crypto-workers', type=int, metavar='N',
+                                     help='Threads allowed to encrypt/decrypt at the same time')
+        progress_parser.add_argument('--control-file', metavar='PATH',
+                                     help='JSON file with io_rate/crypto_workers, re-read when it '
+                                          'changes or on SIGHUP, to adjust limits while running')
 
     # Save-key command
     save_key_parser = subparsers.add_parser('save-key', help='Save a key for reuse')
@@ -462,6 +2855,54 @@ For more help: See docs/USAGE.md
 
     # List-keys command
     list_keys_parser = subparsers.add_parser('list-keys', help='List all saved keys')
+    list_keys_parser.add_argument('--name', help='Key name glob pattern (e.g. "project-*")')
+    list_keys_parser.add_argument('--type', choices=('password', 'key'), help='Only keys of this type')
+    list_keys_parser.add_argument('--created-after', type=parse_timestamp, metavar='DATE',
+                                  help='Only keys created on or after DATE (ISO format)')
+    list_keys_parser.add_argument('--limit', type=int, help='Maximum number of keys')
+    list_keys_parser.add_argument('--offset', type=int, default=0, help='Skip the first N matching keys')
+    list_keys_parser.add_argument('--json', action='store_true', help='Output one JSON object per key (NDJSON)')
+
+    # Import-keys command
+    import_keys_parser = subparsers.add_parser('import-keys', help='Add saved keys from NDJSON in one write')
+    import_keys_parser.add_argument('input', help='NDJSON file (- for stdin)')
+    import_keys_parser.add_argument('--replace', action='store_true',
+                                    help='Overwrite existing keys of the same name')
+
+    # Export-keys command
+    export_keys_parser = subparsers.add_parser('export-keys', help='Write saved keys (with secrets) as NDJSON')
+    export_keys_parser.add_argument('-o', '--output', default='-', help='Output file (default: - for stdout)')
+    export_keys_parser.add_argument('--name', help='Key name glob pattern (e.g. "project-*")')
+    export_keys_parser.add_argument('--type', choices=('password', 'key'), help='Only keys of this type')
+    export_keys_parser.add_argument('--legacy', action='store_true',
+                                    help='Write a .keys.json with files lists for earlier versions')
+
+    # Gc command
+    gc_parser = subparsers.add_parser('gc', help='Remove expired outputs and compact the key store')
+    gc_parser.add_argument('--max-age', type=float, metavar='DAYS', help='Remove outputs older than DAYS')
+    gc_parser.add_argument('--keep', type=int, metavar='N', help='Keep only the newest N outputs')
+    gc_parser.add_argument('--max-size', type=parse_size, metavar='SIZE',
+                           help='Total size budget for outputs (e.g. 500M, 20G)')
+    gc_parser.add_argument('--prune-unknown', action='store_true',
+                           help='Also prune key references unknown to the catalog and sandbox')
+    gc_parser.add_argument('--dry-run', action='store_true', help='Show what would be removed')
+    gc_parser.add_argument('--drop-unused-keys', action='store_true',
+                           help='Also delete auto-generated keys left without files (asks first)')
+    gc_parser.add_argument('-y', '--yes', action='store_true',
+                           help='Do not ask before deleting keys')
+
+    # Ls command
+    ls_parser = subparsers.add_parser('ls', help='Query the sandbox catalog')
+    ls_parser.add_argument('--key', help='Only files using this key ID')
+    ls_parser.add_argument('--kind', choices=('encrypted', 'decrypted'), help='Only this kind of file')
+    ls_parser.add_argument('--cipher', choices=CIPHERS, help='Only files using this cipher')
+    ls_parser.add_argument('--name', help='Filename glob pattern (e.g. "*.pdf.encrypted")')
+    ls_parser.add_argument('--older-than', type=float, metavar='DAYS', help='Created more than DAYS ago')
+    ls_parser.add_argument('--newer-than', type=float, metavar='DAYS', help='Created within the last DAYS')
+    ls_parser.add_argument('--sort', choices=tuple(SORT_COLUMNS), default='created', help='Sort field (default: created)')
+    ls_parser.add_argument('-r', '--reverse', action='store_true', help='Sort descending')
+    ls_parser.add_argument('--limit', type=int, help='Maximum number of entries')
+    ls_parser.add_argument('--summary', action='store_true', help='Only print count and total size')
 
     args = parser.parse_args()
 
@@ -470,17 +2911,50 @@ For more help: See docs/USAGE.md
         sys.exit(1)
 
     # Initialize vault
-    vault = CryptVault(args.sandbox_dir)
+    try:
+        vault = CryptVault(args.sandbox_dir, storage=storage_from_url(args.storage, args.s3_endpoint),
+                           durability=args.durability)
+    except (ImportError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
     # Route to command handler
     if args.command == 'encrypt':
         cmd_encrypt(args, vault)
     elif args.command == 'decrypt':
         cmd_decrypt(args, vault)
+    elif args.command == 'batch-encrypt':
+        cmd_batch_encrypt(args, vault)
+    elif args.command == 'batch-decrypt':
+        cmd_batch_decrypt(args, vault)
+    elif args.command == 'migrate':
+        cmd_migrate(args, vault)
+    elif args.command == 'enqueue':
+        cmd_enqueue(args, vault)
+    elif args.command == 'worker':
+        cmd_worker(args, vault)
+    elif args.command == 'verify':
+        cmd_verify(args, vault)
+    elif args.command == 'autotune':
+        cmd_autotune(args, vault)
+    elif args.command == 'recipients':
+        cmd_recipients(args, vault)
+    elif args.command == 'watch':
+        cmd_watch(args, vault)
     elif args.command == 'save-key':
         cmd_save_key(args, vault)
     elif args.command == 'list-keys':
         cmd_list_keys(args, vault)
+    elif args.command == 'import-keys':
+        cmd_import_keys(args, vault)
+    elif args.command == 'export-keys':
+        cmd_export_keys(args, vault)
+    elif args.command == 'ls':
+        cmd_ls(args, vault)
+    elif args.command == 'gc':
+        cmd_gc(args, vault)
+
+    vault.sync()
 
 
 if __name__ == '__main__':
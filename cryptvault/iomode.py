@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Page-Cache Friendly I/O
+Streaming I/O mode for bulk jobs that should not evict other workloads' data.
+
+In ``streaming`` mode inputs are read and outputs written in large chunks
+aligned to file offsets, the kernel is told the input is read sequentially
+(more read-ahead), and pages are dropped with ``POSIX_FADV_DONTNEED`` once
+they are behind the current position. Written pages are dirty when first
+advised, so each drop covers the previous window as well: the first call
+starts writeback, the next one evicts the (by then clean) pages.
+
+Where ``posix_fadvise`` is unavailable (macOS, Windows, object storage) the
+mode still batches I/O into large chunks and the hints are skipped.
+"""
+
+import os
+import io
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Tuple
+
+
+IO_CACHED = "cached"
+IO_STREAMING = "streaming"
+IO_MODES = (IO_CACHED, IO_STREAMING)
+
+# Bytes per read/write call in streaming mode (a multiple of the page size)
+STREAMING_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Pages are dropped in steps of this many bytes behind the current position
+DROP_WINDOW = 16 * 1024 * 1024
+
+
+def check_io_mode(io_mode: str) -> str:
+    """Validate an I/O mode name."""
+    if io_mode not in IO_MODES:
+        raise ValueError(f"Invalid I/O mode '{io_mode}'. Choose from: {', '.join(IO_MODES)}")
+    return io_mode
+
+
+def _tell(stream: BinaryIO) -> int:
+    """Current position of a stream that may not support tell()."""
+    try:
+        return stream.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return 0
+
+
+def _advise(stream: BinaryIO, offset: int, length: int, advice: str) -> None:
+    """posix_fadvise on a stream's descriptor; a no-op where unsupported."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(stream.fileno(), offset, length, getattr(os, advice))
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+
+
+class StreamingReader:
+    """Reads through large aligned chunks and drops consumed pages."""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._buffer = memoryview(b'')
+        self._file_position = _tell(stream)
+        self._dropped = self._file_position
+        _advise(stream, 0, 0, 'POSIX_FADV_SEQUENTIAL')
+
+    def _fill(self) -> None:
+        # Realign to the chunk grid after a seek
+        size = STREAMING_BUFFER_SIZE - self._file_position % STREAMING_BUFFER_SIZE
+        self._buffer = memoryview(self._stream.read(size))
+        self._file_position += len(self._buffer)
+        if self._file_position - self._dropped >= DROP_WINDOW:
+            _advise(self._stream, self._dropped, self._file_position - self._dropped,
+                    'POSIX_FADV_DONTNEED')
+            self._dropped = self._file_position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = bytes(self._buffer) + self._stream.read()
+            self._file_position += len(data) - len(self._buffer)
+            self._buffer = memoryview(b'')
+            return data
+        chunks = []
+        while size > 0:
+            if not self._buffer:
+                self._fill()
+                if not self._buffer:
+                    break
+            chunk = self._buffer[:size]
+            self._buffer = self._buffer[len(chunk):]
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def tell(self) -> int:
+        return self._file_position - len(self._buffer)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset, whence = self.tell() + offset, os.SEEK_SET
+        self._buffer = memoryview(b'')
+        self._file_position = self._stream.seek(offset, whence)
+        return self._file_position
+
+    def finish(self) -> None:
+        """Drop every cached page of the input."""
+        _advise(self._stream, 0, 0, 'POSIX_FADV_DONTNEED')
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+class StreamingWriter:
+    """Writes in large aligned chunks and drops written pages behind itself."""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._buffer = bytearray()
+        self._start = _tell(stream)
+        self._dropped = self._start
+
+    def _drain(self, everything: bool = False) -> None:
+        end = self._start + len(self._buffer)
+        count = len(self._buffer) if everything else len(self._buffer) - end % STREAMING_BUFFER_SIZE
+        if count <= 0:
+            return
+        self._stream.write(self._buffer[:count])
+        del self._buffer[:count]
+        self._start += count
+        if self._start - self._dropped >= DROP_WINDOW:
+            self._stream.flush()
+            _advise(self._stream, self._dropped, self._start - self._dropped, 'POSIX_FADV_DONTNEED')
+            # Revisit the window just advised: its pages were still dirty
+            self._dropped = max(self._dropped, self._start - DROP_WINDOW)
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        if len(self._buffer) >= STREAMING_BUFFER_SIZE:
+            self._drain()
+        return len(data)
+
+    def flush(self) -> None:
+        self._drain(everything=True)
+        self._stream.flush()
+
+    def seekable(self) -> bool:
+        seekable = getattr(self._stream, 'seekable', None)
+        return bool(seekable and seekable())
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self._drain(everything=True)
+        self._start = self._stream.seek(offset, whence)
+        return self._start
+
+    def truncate(self, size: int) -> int:
+        self._drain(everything=True)
+        return self._stream.truncate(size)
+
+    def finish(self) -> None:
+        """Write out the buffer and drop the pages of the whole output."""
+        self.flush()
+        _advise(self._stream, 0, 0, 'POSIX_FADV_DONTNEED')
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+@contextmanager
+def io_streams(src: BinaryIO, dst: BinaryIO, io_mode: str = IO_CACHED) -> Iterator[Tuple[BinaryIO, BinaryIO]]:
+    """Wrap an operation's input and output for the given I/O mode.
+
+    The output buffer is written out when the block exits normally, so it
+    must be used inside the block that owns (and later closes) ``dst``.
+    """
+    if check_io_mode(io_mode) == IO_CACHED:
+        yield src, dst
+        return
+    reader, writer = StreamingReader(src), StreamingWriter(dst)
+    yield reader, writer
+    writer.finish()
+    reader.finish()
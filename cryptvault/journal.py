@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Checkpoint Journal
+Lets long encrypt/decrypt operations resume after an interruption.
+
+Output is written to a staging file next to the destination and progress is
+checkpointed to a small JSON journal every few segments (after the staged
+data is fsynced). Re-running the same operation continues from the last
+checkpoint; on completion the staging file is renamed into place atomically.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO
+
+from .storage import fsync_path
+
+
+# Bytes of output between checkpoints
+CHECKPOINT_BYTES = 64 * 1024 * 1024
+
+
+def source_fingerprint(path: Path) -> Dict[str, Any]:
+    """Identify an input file so a resume can detect that it changed."""
+    stat = Path(path).stat()
+    return {
+        'path': str(Path(path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+class Journal:
+    """Checkpoint journal and staging file for one output path."""
+
+    SUFFIX = ".cvjournal"
+    STAGING_SUFFIX = ".cvpart"
+
+    def __init__(self, output_path: Path):
+        """Initialize journal for an output file.
+
+        Args:
+            output_path: Final destination of the operation
+        """
+        self.output_path = Path(output_path)
+        self.path = self.output_path.with_name(self.output_path.name + self.SUFFIX)
+        self.staging = self.output_path.with_name(self.output_path.name + self.STAGING_SUFFIX)
+
+    def load(self, operation: str, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the saved state if it belongs to the same operation and input.
+
+        Stale or unreadable journals (different input, missing staging file)
+        are discarded so the operation starts over.
+        """
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            state = None
+        if (not state or state.get('operation') != operation
+                or state.get('fingerprint') != fingerprint or not self.staging.exists()):
+            self.discard()
+            return None
+        return state
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """Atomically write the journal."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def open_staging(self, offset: int) -> BinaryIO:
+        """Open the staging file positioned at ``offset`` (0 starts fresh)."""
+        if offset:
+            f = open(self.staging, 'r+b')
+            f.truncate(offset)
+            f.seek(offset)
+            return f
+        return open(self.staging, 'wb')
+
+    def checkpointer(self, state: Dict[str, Any], staging: BinaryIO, segment_bytes: int):
+        """Build an ``on_segment`` callback that checkpoints periodically."""
+        interval = max(1, CHECKPOINT_BYTES // segment_bytes)
+
+        def on_segment(index: int, final: bool) -> None:
+            if final or (index + 1) % interval:
+                return
+            staging.flush()
+            os.fsync(staging.fileno())
+            state['segments_done'] = index + 1
+            self.save(state)
+
+        return on_segment
+
+    def finalize(self) -> None:
+        """Move the completed staging file into place and drop the journal."""
+        fsync_path(self.staging)
+        os.replace(self.staging, self.output_path)
+        fsync_path(self.output_path.parent)
+        self.path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        """Remove the journal and any staged output."""
+        self.path.unlink(missing_ok=True)
+        self.staging.unlink(missing_ok=True)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Key Derivation
+PBKDF2 password keys, one at a time or many at once across processes.
+
+A PBKDF2 derivation is a long chain of sequential hash rounds, so one key
+keeps one core busy and threads gain nothing. When a batch needs many
+distinct keys (files encrypted under many password entries), they are
+derived up front in a process pool, one key per core at a time, and the
+batch then runs on the cached results.
+"""
+
+import os
+import base64
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Iterable
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+
+def pbkdf2_key(password: str, salt: bytes, iterations: int) -> bytes:
+    """Derive a Fernet-style (urlsafe base64) key from a password and salt."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=iterations,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+
+
+def derive_keys(password: str, salts: Iterable[bytes], iterations: int,
+                workers: Optional[int] = None) -> Dict[bytes, bytes]:
+    """Derive the key of a password for every distinct salt.
+
+    Args:
+        password: User password
+        salts: Salts to derive keys for (duplicates are derived once)
+        iterations: PBKDF2 iterations
+        workers: Processes deriving concurrently (default: one per CPU);
+            a single key, or one worker, is derived in this process
+
+    Returns:
+        Key per salt
+    """
+    salts = list(dict.fromkeys(salts))
+    workers = min(workers or os.cpu_count() or 1, len(salts))
+    if workers <= 1:
+        return {salt: pbkdf2_key(password, salt, iterations) for salt in salts}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        keys = pool.map(pbkdf2_key, repeat(password), salts, repeat(iterations))
+        return dict(zip(salts, keys))
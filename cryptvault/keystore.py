@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Key Store
+Compact, lazily loaded storage for saved keys and their file references.
+
+Key records hold only the key metadata (type, salt or key, creation
+time), so loading them stays cheap however many files were encrypted. The
+file references live in a small indexed SQLite database next to
+``.keys.json`` and are read only when a caller actually asks for a key's
+``files``. The same database mirrors the key metadata (name, type,
+creation time) so listings can be filtered and paged without parsing
+``.keys.json``; the mirror is rebuilt whenever the JSON file changes
+behind its back.
+
+``.keys.json`` holds only that metadata; recording a new reference is a
+single insert instead of a rewrite of the whole store. Stores written by
+earlier versions (with ``files`` lists inside the JSON) are migrated the
+first time they are loaded. For tools and earlier versions that expect
+those lists, ``write_legacy`` streams the old layout on request.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, List, Iterable, Iterator, TextIO
+
+from .storage import DURABILITY_FILE, TEMP_SUFFIX, LocalStorage
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    key_id TEXT NOT NULL,
+    file TEXT NOT NULL,
+    UNIQUE (key_id, file)
+);
+CREATE INDEX IF NOT EXISTS idx_refs_file ON refs(file);
+CREATE TABLE IF NOT EXISTS keys (
+    name TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    created TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_keys_created ON keys(created);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_SECRET_FIELDS = {'password': 'salt', 'key': 'key'}
+
+
+class KeyRecord(Mapping):
+    """Read-only view of one saved key.
+
+    Behaves like the dictionaries earlier versions returned from
+    ``list_keys`` (``record['type']``, ``record.get('created')``, ...), but
+    stores its fields in slots and fetches ``files`` from the reference
+    index on access.
+    """
+
+    __slots__ = ('name', 'type', 'secret', 'created', 'extra', '_store')
+
+    def __init__(self, name: str, fields: Dict[str, Any], store: 'KeyStore'):
+        self.name = name
+        self.type = fields['type']
+        self.secret = fields.get(_SECRET_FIELDS.get(self.type, 'key'))
+        self.created = fields.get('created')
+        extra = {k: v for k, v in fields.items()
+                 if k not in ('type', 'salt', 'key', 'created', 'files')}
+        self.extra = extra or None
+        self._store = store
+
+    def _fields(self) -> List[str]:
+        fields = ['type', _SECRET_FIELDS.get(self.type, 'key')]
+        if self.created is not None:
+            fields.append('created')
+        if self.extra:
+            fields.extend(self.extra)
+        fields.append('files')
+        return fields
+
+    def __getitem__(self, field: str) -> Any:
+        if field == 'type':
+            return self.type
+        if field == _SECRET_FIELDS.get(self.type, 'key'):
+            return self.secret
+        if field == 'created' and self.created is not None:
+            return self.created
+        if field == 'files':
+            return self._store.files(self.name)
+        if self.extra and field in self.extra:
+            return self.extra[field]
+        raise KeyError(field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields())
+
+    def __len__(self) -> int:
+        return len(self._fields())
+
+    def __repr__(self) -> str:
+        return f"KeyRecord({self.name!r}, type={self.type!r})"
+
+    def file_count(self) -> int:
+        """Number of files recorded for this key (without loading them)."""
+        return self._store.file_count(self.name)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Metadata as stored in .keys.json (without file references)."""
+        data = {'type': self.type, _SECRET_FIELDS.get(self.type, 'key'): self.secret}
+        if self.created is not None:
+            data['created'] = self.created
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+class KeyStore:
+    """Saved keys (``.keys.json``) plus their file-reference index."""
+
+    FILENAME = ".keys.json"
+    REFS_FILENAME = ".keyrefs.db"
+
+    def __init__(self, sandbox_dir: Path, local: Optional[LocalStorage] = None):
+        """Initialize key store (files are read on first use).
+
+        Args:
+            sandbox_dir: Directory holding the key store
+            local: Local storage whose durability policy applies to writes
+        """
+        self.path = Path(sandbox_dir) / self.FILENAME
+        self.refs_path = Path(sandbox_dir) / self.REFS_FILENAME
+        self.local = local or LocalStorage()
+        self._records: Optional[Dict[str, KeyRecord]] = None
+        self._conn = None
+        # Serializes read-modify-write cycles across batch worker threads
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = self._open()
+        # Legacy file lists are migrated (and the metadata mirror rebuilt)
+        # on load, so an out-of-date index means the records must be read
+        if self._records is None and not self._index_fresh():
+            self.records()
+        return conn
+
+    def _stamp(self) -> str:
+        """Identify the current .keys.json contents by size and mtime."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return ""
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _index_fresh(self) -> bool:
+        row = self._open().execute("SELECT value FROM meta WHERE name = 'source'").fetchone()
+        return row is not None and row[0] == self._stamp()
+
+    def _sync_index(self, records: Dict[str, KeyRecord]) -> None:
+        """Mirror the key metadata into the index after .keys.json changed."""
+        conn = self._open()
+        with conn:
+            conn.execute("DELETE FROM keys")
+            conn.executemany("INSERT INTO keys (name, type, created) VALUES (?, ?, ?)",
+                             [(name, r.type, r.created) for name, r in records.items()])
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('source', ?)",
+                         (self._stamp(),))
+
+    def _open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.refs_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            synchronous = "FULL" if self.local.durability == DURABILITY_FILE else "NORMAL"
+            self._conn.execute(f"PRAGMA synchronous={synchronous}")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        """Close the reference index."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def records(self) -> Dict[str, KeyRecord]:
+        """Load (once) and return all key records by name."""
+        with self._lock:
+            if self._records is None:
+                self._records = self._load()
+            return self._records
+
+    def _load(self) -> Dict[str, KeyRecord]:
+        data = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"WARNING: Error loading keys file: {e}")
+                return {}
+
+        legacy = [(name, entry.pop('files')) for name, entry in data.items() if 'files' in entry]
+        records = {name: KeyRecord(name, entry, self) for name, entry in data.items()}
+        if legacy:
+            # Move file lists written by earlier versions into the index
+            conn = self._open()
+            with conn:
+                for name, files in legacy:
+                    conn.executemany("INSERT OR IGNORE INTO refs (key_id, file) VALUES (?, ?)",
+                                     [(name, f) for f in files])
+            self._write(records)
+        elif not self._index_fresh():
+            self._sync_index(records)
+        return records
+
+    def _write(self, records: Dict[str, KeyRecord]) -> None:
+        """Atomically rewrite .keys.json from the records."""
+        try:
+            # Replace atomically so a crash never leaves a truncated key store
+            tmp_file = self.path.with_name(self.path.name + TEMP_SUFFIX)
+            with open(tmp_file, 'w') as f:
+                json.dump({name: record.to_json() for name, record in records.items()}, f, indent=2)
+                if self.local.durability == DURABILITY_FILE:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_file, self.path)
+            self.local._committed(self.path)
+            self._sync_index(records)
+        except IOError as e:
+            print(f"ERROR: Failed to save keys: {e}")
+            raise
+
+    def get(self, name: str) -> Optional[KeyRecord]:
+        """Return a key record, or None if unknown."""
+        return self.records().get(name)
+
+    def put(self, name: str, fields: Dict[str, Any], files: Iterable[str] = ()) -> KeyRecord:
+        """Create or replace a key; replacing forgets its old file references.
+
+        Args:
+            name: Key name
+            fields: Metadata (type, salt or key, created, ...)
+            files: Initial file references
+
+        Returns:
+            The new record
+        """
+        with self._lock:
+            records = dict(self.records())
+            records[name] = record = KeyRecord(name, fields, self)
+            with self.conn:
+                self.conn.execute("DELETE FROM refs WHERE key_id = ?", (name,))
+                self.conn.executemany("INSERT OR IGNORE INTO refs (key_id, file) VALUES (?, ?)",
+                                      [(name, f) for f in files])
+            self._write(records)
+            self._records = records
+            return record
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Create or replace many keys with a single rewrite of the store.
+
+        Replaced keys forget their old file references, as with put().
+
+        Args:
+            entries: Metadata by key name
+        """
+        if not entries:
+            return
+        with self._lock:
+            records = dict(self.records())
+            replaced = [(name,) for name in entries if name in records]
+            records.update((name, KeyRecord(name, fields, self)) for name, fields in entries.items())
+            with self.conn:
+                self.conn.executemany("DELETE FROM refs WHERE key_id = ?", replaced)
+            self._write(records)
+            self._records = records
+
+    def create(self, fields: Dict[str, Any], files: Iterable[str] = ()) -> str:
+        """Add an auto-named ``key_<timestamp>`` entry.
+
+        Returns:
+            The new key ID (unique within the store)
+        """
+        with self._lock:
+            records = self.records()
+            key_id = f"key_{datetime.now().isoformat()}"
+            while key_id in records:
+                key_id = f"key_{datetime.now().isoformat()}"
+            self.put(key_id, fields, files)
+            return key_id
+
+    def delete(self, names: Iterable[str]) -> None:
+        """Remove keys and their file references."""
+        names = set(names)
+        if not names:
+            return
+        with self._lock:
+            records = {name: record for name, record in self.records().items() if name not in names}
+            with self.conn:
+                self.conn.executemany("DELETE FROM refs WHERE key_id = ?", [(name,) for name in names])
+            self._write(records)
+            self._records = records
+
+    def _refresh(self) -> None:
+        """Reload if another process rewrote .keys.json since it was indexed."""
+        with self._lock:
+            if not self._index_fresh():
+                self._records = None
+                self.records()
+
+    def _where(self, name: Optional[str] = None, key_type: Optional[str] = None,
+               created_after: Optional[str] = None) -> tuple[str, list]:
+        clauses, params = [], []
+        if name is not None:
+            clauses.append("name GLOB ?")
+            params.append(name)
+        if key_type is not None:
+            clauses.append("type = ?")
+            params.append(key_type)
+        if created_after is not None:
+            clauses.append("created >= ?")
+            params.append(created_after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, limit: Optional[int] = None, offset: int = 0, batch_size: int = 1000,
+              **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Stream key summaries from the index without loading .keys.json.
+
+        Args:
+            limit: Maximum number of keys
+            offset: Number of matching keys to skip
+            batch_size: Rows fetched per round trip
+            **filters: name (glob), key_type, created_after (ISO timestamp)
+
+        Yields:
+            Dictionaries with name, type, created and files (reference count)
+        """
+        self._refresh()
+        where, params = self._where(**filters)
+        sql = (f"SELECT name, type, created, "
+               f"(SELECT COUNT(*) FROM refs WHERE refs.key_id = keys.name) AS files "
+               f"FROM keys{where} ORDER BY created, name LIMIT ? OFFSET ?")
+        remaining = -1 if limit is None else limit
+        while remaining:
+            size = batch_size if remaining < 0 else min(batch_size, remaining)
+            with self._lock:
+                rows = self.conn.execute(sql, params + [size, offset]).fetchall()
+            for name, key_type, created, files in rows:
+                yield {'name': name, 'type': key_type, 'created': created, 'files': files}
+            if len(rows) < size:
+                return
+            offset += size
+            remaining = remaining - size if remaining > 0 else remaining
+
+    def count(self, **filters: Any) -> int:
+        """Number of keys matching the query filters."""
+        self._refresh()
+        where, params = self._where(**filters)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM keys{where}", params).fetchone()[0]
+
+    def add_file(self, name: str, file: str) -> None:
+        """Record that ``file`` was encrypted with key ``name``."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO refs (key_id, file) VALUES (?, ?)", (name, file))
+
+    def files(self, name: str) -> List[str]:
+        """File references of a key, oldest first."""
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT file FROM refs WHERE key_id = ? ORDER BY rowid", (name,))]
+
+    def file_count(self, name: str) -> int:
+        """Number of file references of a key."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM refs WHERE key_id = ?", (name,)).fetchone()[0]
+
+    def owners(self, file: str) -> List[str]:
+        """Keys that reference ``file``, most recent reference first."""
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT key_id FROM refs WHERE file = ? ORDER BY rowid DESC", (file,))]
+
+    def iter_refs(self, batch_size: int = 10000) -> Iterator[tuple[str, str]]:
+        """Stream all (key_id, file) references in bounded batches."""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT rowid, key_id, file FROM refs WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, batch_size)).fetchall()
+            if not rows:
+                return
+            for _, key_id, file in rows:
+                yield key_id, file
+            last = rows[-1][0]
+
+    def remove_refs(self, refs: Iterable[tuple[str, str]]) -> None:
+        """Drop (key_id, file) references in one transaction."""
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM refs WHERE key_id = ? AND file = ?", list(refs))
+
+    def write_legacy(self, stream: TextIO, names: Iterable[str]) -> int:
+        """Write keys in the earlier .keys.json layout, with ``files`` lists.
+
+        For earlier versions and tools that read the lists from the file.
+        References are streamed from the index as they are written, so the
+        lists are never held in memory.
+
+        Args:
+            stream: Text stream receiving one JSON object
+            names: Keys to write (unknown names are skipped)
+
+        Returns:
+            Number of keys written
+        """
+        count = 0
+        stream.write("{")
+        for name in names:
+            record = self.get(name)
+            if record is None:
+                continue
+            fields = json.dumps(record.to_json())
+            stream.write(f"{',' if count else ''}\n  {json.dumps(name)}: {fields[:-1]}, \"files\": [")
+            with self._lock:
+                cursor = self.conn.execute("SELECT file FROM refs WHERE key_id = ? ORDER BY rowid", (name,))
+                for number, (file,) in enumerate(cursor):
+                    stream.write(f"{', ' if number else ''}{json.dumps(file)}")
+            stream.write("]}")
+            count += 1
+        stream.write("\n}\n")
+        return count
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Merkle Tree
+Hash tree over the ciphertext segments of a container.
+
+Leaves are SHA-256 hashes of the sealed segments (ciphertext plus tag) and
+every parent hashes its two children; an odd node at the end of a level is
+carried up unchanged. Leaves and inner nodes are domain-separated so a node
+can never be passed off as a segment. The tree is stored level by level,
+leaves first and the root last, which lets a reader check any range of
+segments against the root by reading only that range's leaves and a few
+sibling nodes per level. No key is needed: the tree detects damage (bit
+rot, truncation, bad copies), while authenticity still comes from the AEAD.
+"""
+
+import hashlib
+from typing import List, BinaryIO
+
+
+HASH_NAME = "sha256"
+NODE_SIZE = 32
+
+_LEAF = b'\x00'
+_NODE = b'\x01'
+
+
+def leaf_hash(sealed: bytes) -> bytes:
+    """Hash of one sealed segment."""
+    return hashlib.sha256(_LEAF + sealed).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash of an inner node."""
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def level_sizes(count: int) -> List[int]:
+    """Node counts per level, leaves first, for ``count`` leaves."""
+    sizes = [count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def tree_size(count: int) -> int:
+    """Bytes taken by the stored tree of ``count`` leaves."""
+    return sum(level_sizes(count)) * NODE_SIZE
+
+
+def parents(nodes: List[bytes]) -> List[bytes]:
+    """The level above ``nodes`` (an odd last node is carried up)."""
+    level = [node_hash(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+    if len(nodes) % 2:
+        level.append(nodes[-1])
+    return level
+
+
+def encode_tree(leaves: List[bytes]) -> bytes:
+    """Serialize the full tree over ``leaves``, leaves first."""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        levels.append(parents(levels[-1]))
+    return b''.join(b''.join(level) for level in levels)
+
+
+class StoredTree:
+    """Random access to a tree stored at ``offset`` in a stream."""
+
+    def __init__(self, stream: BinaryIO, offset: int, count: int):
+        """Initialize reader.
+
+        Args:
+            stream: Seekable stream holding the tree
+            offset: Stream offset of the first leaf
+            count: Number of leaves
+        """
+        self.stream = stream
+        self.count = count
+        self.sizes = level_sizes(count)
+        self._starts = []
+        position = offset
+        for size in self.sizes:
+            self._starts.append(position)
+            position += size * NODE_SIZE
+
+    def nodes(self, level: int, start: int, end: int) -> List[bytes]:
+        """Nodes ``start`` to ``end`` (exclusive) of a level."""
+        self.stream.seek(self._starts[level] + start * NODE_SIZE)
+        data = self.stream.read((end - start) * NODE_SIZE)
+        if len(data) < (end - start) * NODE_SIZE:
+            raise ValueError("Truncated Merkle tree")
+        return [data[i:i + NODE_SIZE] for i in range(0, len(data), NODE_SIZE)]
+
+    @property
+    def root(self) -> bytes:
+        return self.nodes(len(self.sizes) - 1, 0, 1)[0]
+
+    def consistent(self, start: int, end: int) -> bool:
+        """Check that the stored leaves ``start:end`` hash up to the stored root.
+
+        Reads the range's leaves plus at most two siblings per level.
+        """
+        nodes = self.nodes(0, start, end)
+        for level, size in enumerate(self.sizes[:-1]):
+            # Widen the range to whole sibling pairs
+            if start % 2:
+                nodes.insert(0, self.nodes(level, start - 1, start)[0])
+                start -= 1
+            if end % 2 and end < size:
+                nodes.append(self.nodes(level, end, end + 1)[0])
+                end += 1
+            nodes = parents(nodes)
+            start, end = start // 2, (end + 1) // 2
+            if nodes != self.nodes(level + 1, start, end):
+                return False
+        return True
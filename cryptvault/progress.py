@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Progress Reporting
+Throughput-aware progress callbacks for long encrypt/decrypt operations.
+
+Progress is measured on the input side: a thin wrapper counts the bytes the
+engine reads, so no cipher loop needs to know about it. Updates arrive once
+per segment, but the callback only fires when ``interval`` seconds have
+passed (plus once at the end), so reporting costs one clock read per segment
+however often the caller polls.
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Optional, Callable, BinaryIO
+
+
+DEFAULT_INTERVAL = 1.0
+
+
+@dataclass
+class Progress:
+    """Snapshot of a running operation."""
+
+    done: int
+    total: Optional[int]
+    rate: float
+    eta: Optional[float]
+    elapsed: float
+    name: Optional[str] = None
+    finished: bool = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Completed fraction (None when the total is unknown)."""
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class ProgressTracker:
+    """Accumulates processed bytes and emits rate-limited Progress updates.
+
+    Safe to share between batch worker threads; the total may grow while
+    running (batches discover files lazily).
+    """
+
+    def __init__(self, callback: ProgressCallback, total: Optional[int] = None,
+                 name: Optional[str] = None, interval: float = DEFAULT_INTERVAL):
+        """Initialize tracker.
+
+        Args:
+            callback: Receives Progress snapshots
+            total: Expected number of bytes (None if unknown, e.g. stdin)
+            name: Label passed through to the callback
+            interval: Minimum seconds between callbacks
+        """
+        self.callback = callback
+        self.total = total
+        self.name = name
+        self.interval = interval
+        self.done = 0
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_time = self._start
+        self._last_done = 0
+        self._last_rate = 0.0
+
+    def add_total(self, size: int) -> None:
+        """Grow the expected total."""
+        with self._lock:
+            self.total = (self.total or 0) + size
+
+    def update(self, count: int) -> None:
+        """Record ``count`` more processed bytes (negative after a rewind)."""
+        with self._lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self._last_time < self.interval:
+                return
+            snapshot = self._snapshot(now)
+        self.callback(snapshot)
+
+    def _snapshot(self, now: float, finished: bool = False) -> Progress:
+        # Rate over the last interval reacts to stalls quickly; the ETA uses
+        # the average rate so it does not jump around
+        window = now - self._last_time
+        if window > 0:
+            self._last_rate = (self.done - self._last_done) / window
+        self._last_time, self._last_done = now, self.done
+        elapsed = now - self._start
+        eta = None
+        if self.total is not None and elapsed > 0 and self.done:
+            average = self.done / elapsed
+            eta = max(0.0, (self.total - self.done) / average)
+        return Progress(self.done, self.total, self._last_rate, eta, elapsed, self.name, finished)
+
+    def finish(self) -> None:
+        """Emit the final update."""
+        with self._lock:
+            snapshot = self._snapshot(time.monotonic(), finished=True)
+            if snapshot.elapsed > 0:
+                snapshot.rate = snapshot.done / snapshot.elapsed
+        self.callback(snapshot)
+
+
+class ProgressReader:
+    """Read-only stream wrapper that reports consumed bytes to a tracker.
+
+    Seeks (resumed operations skip completed segments) move the tracker by
+    the distance travelled, so one tracker can aggregate a whole batch.
+    """
+
+    def __init__(self, stream: BinaryIO, tracker: ProgressTracker):
+        self._stream = stream
+        self._tracker = tracker
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        if data:
+            self._position += len(data)
+            self._tracker.update(len(data))
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        position = self._stream.seek(offset, whence)
+        self._tracker.update(position - self._position)
+        self._position = position
+        return position
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+def track(stream: BinaryIO, tracker: Optional[ProgressTracker]) -> BinaryIO:
+    """Wrap ``stream`` so reads advance ``tracker`` (no-op without a tracker)."""
+    if tracker is None:
+        return stream
+    return ProgressReader(stream, tracker)
+
+
+def format_progress(progress: Progress) -> str:
+    """Human-readable one-line rendering used by the CLI."""
+    def size(value: float) -> str:
+        for unit in ('B', 'KiB', 'MiB', 'GiB'):
+            if value < 1024:
+                return f"{value:.1f} {unit}"
+            value /= 1024
+        return f"{value:.1f} TiB"
+
+    parts = [size(progress.done)]
+    if progress.total is not None:
+        parts[0] += f" / {size(progress.total)}"
+        if progress.fraction is not None:
+            parts.append(f"({progress.fraction * 100:.1f}%)")
+    parts.append(f"{size(progress.rate)}/s")
+    if progress.finished:
+        parts.append(f"done in {progress.elapsed:.1f}s")
+    elif progress.eta is not None:
+        minutes, seconds = divmod(int(progress.eta), 60)
+        parts.append(f"ETA {minutes // 60}:{minutes % 60:02d}:{seconds:02d}")
+    label = f"{progress.name}: " if progress.name else ""
+    return f"[PROGRESS] {label}{' '.join(parts)}"
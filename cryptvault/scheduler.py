@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Batch Scheduler
+Runs many file operations concurrently under a global memory budget.
+
+Tasks are pulled lazily from the directory walker into a bounded window
+(backpressure), the largest task in the window is started first so big
+files do not straggle at the end, and a task only starts when its memory
+estimate fits in the remaining budget. A task larger than the whole budget
+runs on its own.
+"""
+
+import os
+import bisect
+import fnmatch
+from pathlib import Path
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Iterable, Iterator, Callable, List, Any
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+DEFAULT_WINDOW = 1024
+
+# Thread pool ceiling; threads are created lazily, so only as many as the
+# (adjustable) worker count are ever started
+MAX_WORKERS = 256
+
+
+@dataclass
+class BatchTask:
+    """One unit of batch work."""
+
+    path: Path
+    size: int
+    cost: int = 0
+    output: Optional[Path] = None
+    extra: dict = field(default_factory=dict)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one batch task."""
+
+    path: str
+    output: Optional[str] = None
+    ok: bool = True
+    error: Optional[str] = None
+    value: Any = None
+
+
+def walk_files(inputs: Iterable[str], pattern: str = "*") -> Iterator[tuple[Path, Path]]:
+    """Lazily yield (file, root) pairs for files and directory trees.
+
+    Args:
+        inputs: Files and/or directories
+        pattern: Filename glob that files inside directories must match
+
+    Yields:
+        Tuple of (file_path, root) where root is the directory the file was
+        found under (or the file's parent for explicit files)
+    """
+    for entry in inputs:
+        entry = Path(entry)
+        if entry.is_file():
+            yield entry, entry.parent
+            continue
+        if not entry.is_dir():
+            raise FileNotFoundError(f"Input not found: {entry}")
+        stack = [entry]
+        while stack:
+            current = stack.pop()
+            with os.scandir(current) as it:
+                for item in sorted(it, key=lambda e: e.name):
+                    if item.is_dir(follow_symlinks=False):
+                        stack.append(Path(item.path))
+                    elif item.is_file() and fnmatch.fnmatch(item.name, pattern):
+                        yield Path(item.path), entry
+
+
+class BatchScheduler:
+    """Memory-budgeted, largest-first executor for batch operations."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 window: int = DEFAULT_WINDOW, executor: Optional[Executor] = None):
+        """Initialize scheduler.
+
+        Args:
+            workers: Maximum concurrent tasks (may be changed while running)
+            memory_budget: Maximum summed memory estimate of running tasks
+            window: Maximum tasks pulled from the walker ahead of execution
+            executor: Long-lived pool shared by successive runs (default: a
+                pool per run); it must allow ``workers`` concurrent tasks
+        """
+        if not 1 <= workers <= MAX_WORKERS:
+            raise ValueError(f"workers must be between 1 and {MAX_WORKERS}")
+        self.workers = workers
+        self.memory_budget = memory_budget
+        self.window = window
+        self.executor = executor
+        self.peak_in_flight_bytes = 0
+
+    def run(self, tasks: Iterable[BatchTask], fn: Callable[[BatchTask], BatchResult],
+            on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+        """Execute tasks and collect their results.
+
+        Args:
+            tasks: Task iterable (consumed lazily)
+            fn: Function executing one task
+            on_result: Optional callback invoked as each task finishes
+
+        Returns:
+            List of results in completion order
+        """
+        source = iter(tasks)
+        exhausted = False
+        pending_sizes: List[int] = []
+        pending: List[BatchTask] = []
+        in_flight = {}
+        used = 0
+        results = []
+
+        with ExitStack() as stack:
+            pool = self.executor or stack.enter_context(
+                ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="cryptvault-batch"))
+            while True:
+                # Backpressure: only walk ahead while the window has room
+                while not exhausted and len(pending) < self.window:
+                    try:
+                        task = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    index = bisect.bisect(pending_sizes, task.size)
+                    pending_sizes.insert(index, task.size)
+                    pending.insert(index, task)
+
+                # Largest first; wait for budget rather than letting small
+                # tasks overtake it indefinitely
+                while pending and len(in_flight) < self.workers:
+                    cost = pending[-1].cost
+                    if in_flight and used + cost > self.memory_budget:
+                        break
+                    pending_sizes.pop()
+                    task = pending.pop()
+                    used += cost
+                    self.peak_in_flight_bytes = max(self.peak_in_flight_bytes, used)
+                    in_flight[pool.submit(self._execute, fn, task)] = task
+
+                if not in_flight:
+                    if exhausted and not pending:
+                        break
+                    continue
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    used -= task.cost
+                    result = future.result()
+                    results.append(result)
+                    if on_result is not None:
+                        on_result(result)
+
+        return results
+
+    @staticmethod
+    def _execute(fn: Callable[[BatchTask], BatchResult], task: BatchTask) -> BatchResult:
+        try:
+            return fn(task)
+        except Exception as e:
+            return BatchResult(str(task.path), str(task.output) if task.output else None,
+                               ok=False, error=str(e))
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Sparse File Support
+Encrypt only the data extents of sparse files and recreate the holes on decrypt.
+
+The extent map of the input is read with ``SEEK_DATA``/``SEEK_HOLE`` and
+stored in the container header. The container then holds the data extents
+back to back (the "data space"), so holes cost neither CPU nor ciphertext.
+Decryption writes each data piece at its original offset and leaves the
+gaps unwritten, which the filesystem turns back into holes.
+"""
+
+import os
+import errno
+import bisect
+from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO, Iterator, List, Tuple
+
+
+# Holes smaller than this are read and encrypted as data: they save little
+# and would bloat the extent map of fragmented files
+MIN_HOLE_SIZE = 64 * 1024
+
+_ZEROS = memoryview(bytes(1024 * 1024))
+
+
+class ExtentMap:
+    """Data extents of a sparse file, addressable by data-space offset."""
+
+    def __init__(self, extents: List[Tuple[int, int]], size: int):
+        """Initialize extent map.
+
+        Args:
+            extents: Sorted, non-overlapping (offset, length) data extents
+            size: Logical file size (may end in a hole)
+        """
+        self.extents = [(int(offset), int(length)) for offset, length in extents]
+        self.size = int(size)
+        self._starts = []
+        position = 0
+        for offset, length in self.extents:
+            if offset < 0 or length <= 0 or offset + length > self.size:
+                raise ValueError("Invalid sparse extent map")
+            self._starts.append(position)
+            position += length
+        self.data_size = position
+
+    @classmethod
+    def from_header(cls, header: Dict[str, Any]) -> Optional['ExtentMap']:
+        """Extent map stored in a container header (None for dense files)."""
+        sparse = header.get('sparse')
+        if sparse is None:
+            return None
+        return cls(sparse['extents'], sparse['size'])
+
+    def to_header(self) -> Dict[str, Any]:
+        """Header fields describing this map."""
+        return {'sparse': {'size': self.size, 'extents': [list(e) for e in self.extents]}}
+
+    def logical_offset(self, data_offset: int) -> int:
+        """File offset of a data-space offset."""
+        if data_offset >= self.data_size:
+            if not self.extents:
+                return 0
+            offset, length = self.extents[-1]
+            return offset + length
+        index = bisect.bisect_right(self._starts, data_offset) - 1
+        return self.extents[index][0] + data_offset - self._starts[index]
+
+    def pieces(self, data_offset: int, length: int) -> Iterator[Tuple[int, int]]:
+        """Split a data-space range into (file offset, length) pieces."""
+        if length <= 0 or data_offset >= self.data_size:
+            return
+        index = bisect.bisect_right(self._starts, data_offset) - 1
+        while length > 0 and index < len(self.extents):
+            offset, extent_length = self.extents[index]
+            skip = data_offset - self._starts[index]
+            n = min(length, extent_length - skip)
+            yield offset + skip, n
+            data_offset += n
+            length -= n
+            index += 1
+
+
+def data_extents(path: Path, min_hole: int = MIN_HOLE_SIZE) -> Optional[ExtentMap]:
+    """Read the extent map of a file.
+
+    Args:
+        path: Local file
+        min_hole: Holes smaller than this are merged into the data
+
+    Returns:
+        ExtentMap, or None when the file has no holes worth skipping or the
+        platform/filesystem does not report them
+    """
+    if not hasattr(os, 'SEEK_DATA'):
+        return None
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        extents: List[Tuple[int, int]] = []
+        offset = 0
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:
+                    break
+                raise
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            if extents and start - (extents[-1][0] + extents[-1][1]) < min_hole:
+                extents[-1] = (extents[-1][0], end - extents[-1][0])
+            else:
+                extents.append((start, end - start))
+            offset = end
+    except OSError:
+        # EINVAL: filesystem without hole reporting
+        return None
+    finally:
+        os.close(fd)
+
+    extent_map = ExtentMap(extents, size)
+    if size - extent_map.data_size < min_hole:
+        return None
+    return extent_map
+
+
+class SparseReader:
+    """Reads the data extents of a file as one contiguous stream."""
+
+    def __init__(self, stream: BinaryIO, extent_map: ExtentMap):
+        self._stream = stream
+        self._map = extent_map
+        self._position = 0
+        self._file_position = None
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._map.data_size - self._position
+        chunks = []
+        for offset, length in self._map.pieces(self._position, size):
+            if offset != self._file_position:
+                self._stream.seek(offset)
+            chunk = self._stream.read(length)
+            if len(chunk) < length:
+                raise ValueError("Sparse input changed while it was read")
+            chunks.append(chunk)
+            self._position += length
+            self._file_position = offset + length
+        return b''.join(chunks)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence != 0:
+            raise ValueError("SparseReader only supports absolute seeks")
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+
+def _hash_zeros(hasher: Any, count: int) -> None:
+    while count > 0:
+        n = min(count, len(_ZEROS))
+        hasher.update(_ZEROS[:n])
+        count -= n
+
+
+class ExtentHasher:
+    """Hashes data-space bytes as the full file, holes included.
+
+    Keeps plaintext hashes identical for sparse and dense copies of a file.
+    """
+
+    def __init__(self, hasher: Any, extent_map: ExtentMap, data_offset: int = 0):
+        """Initialize adapter.
+
+        Args:
+            hasher: hashlib object receiving the logical file content
+            extent_map: Extent map of the file
+            data_offset: Data-space position already hashed (when resuming,
+                everything before its file offset must have been hashed)
+        """
+        self.hasher = hasher
+        self._map = extent_map
+        self._position = data_offset
+        # From the start, a leading hole still lies ahead
+        self._cursor = extent_map.logical_offset(data_offset) if data_offset else 0
+
+    def update(self, data: bytes) -> None:
+        view = memoryview(data)
+        for offset, length in self._map.pieces(self._position, len(view)):
+            _hash_zeros(self.hasher, offset - self._cursor)
+            self.hasher.update(view[:length])
+            view = view[length:]
+            self._position += length
+            self._cursor = offset + length
+
+    def finish(self) -> None:
+        """Hash the trailing hole."""
+        _hash_zeros(self.hasher, self._map.size - self._cursor)
+        self._cursor = self._map.size
+
+    @property
+    def name(self) -> str:
+        return self.hasher.name
+
+    def digest(self) -> bytes:
+        return self.hasher.digest()
+
+
+class SparseWriter:
+    """Writes data-space bytes at their file offsets, leaving holes.
+
+    Destinations that cannot seek (pipes) get the holes as written zeros.
+    """
+
+    def __init__(self, stream: BinaryIO, extent_map: ExtentMap, data_offset: int = 0,
+                 seek_holes: bool = True):
+        """Initialize writer.
+
+        Args:
+            stream: Destination positioned at the file offset of ``data_offset``
+            extent_map: Extent map of the file
+            data_offset: Data-space position of the first write
+            seek_holes: Seek over holes when the destination supports it
+                (False always writes zeros, e.g. for stdout in append mode)
+        """
+        self._stream = stream
+        self._map = extent_map
+        self._position = data_offset
+        # From the start, a leading hole still lies ahead
+        self._cursor = extent_map.logical_offset(data_offset) if data_offset else 0
+        seekable = getattr(stream, 'seekable', None)
+        self._seekable = bool(seek_holes and seekable and seekable())
+
+    def _skip(self, count: int) -> None:
+        if count <= 0:
+            return
+        if self._seekable:
+            self._stream.seek(count, os.SEEK_CUR)
+        else:
+            while count > 0:
+                n = min(count, len(_ZEROS))
+                self._stream.write(_ZEROS[:n])
+                count -= n
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        for offset, length in self._map.pieces(self._position, len(view)):
+            self._skip(offset - self._cursor)
+            self._stream.write(view[:length])
+            view = view[length:]
+            self._position += length
+            self._cursor = offset + length
+        if len(view):
+            raise ValueError("Sparse data exceeds the extent map")
+        return len(data)
+
+    def finish(self) -> None:
+        """Recreate the trailing hole and check that all data arrived."""
+        if self._position != self._map.data_size:
+            raise ValueError("Sparse data is shorter than the extent map")
+        if self._seekable:
+            self._stream.truncate(self._map.size)
+            self._stream.seek(self._map.size)
+        else:
+            self._skip(self._map.size - self._cursor)
+        self._cursor = self._map.size
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Storage Backends
+Where encrypted outputs are written: the local filesystem (default), an
+S3-compatible object store, or a directory that emulates one for tests.
+
+Object-store backends receive ciphertext as it is produced: writes are cut
+into parts that upload concurrently while encryption continues, so a file
+is encrypted and shipped in a single streaming pass.
+"""
+
+import os
+import uuid
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, BinaryIO, Any
+from urllib.parse import urlparse
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_UPLOAD_WORKERS = 4
+# Multipart limits of S3 (and compatible stores): parts per upload, bytes per part
+MAX_PARTS = 10000
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+# The part size doubles every this many parts, so uploads of unknown length
+# stay under MAX_PARTS (8 MiB parts reach about 8 TB) while small ones keep
+# small parts and little memory
+PART_GROWTH_INTERVAL = 1000
+
+# Durability policies for local outputs
+DURABILITY_NONE = "none"
+DURABILITY_FILE = "file"
+DURABILITY_BATCH = "batch"
+DURABILITY_POLICIES = (DURABILITY_NONE, DURABILITY_FILE, DURABILITY_BATCH)
+
+# Suffix of in-progress local outputs (renamed into place on completion)
+TEMP_SUFFIX = ".cvtmp"
+
+
+def fsync_path(path: Path) -> None:
+    """fsync a file or directory by path (directories are skipped on Windows)."""
+    if os.name == 'nt' and Path(path).is_dir():
+        return
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StorageBackend:
+    """Interface for encrypted output storage."""
+
+    # Whether object names are local filesystem paths
+    is_local = False
+
+    def writer(self, name: str) -> Any:
+        """Open a writer for an object; commit on close, discard on error.
+
+        Use as a context manager; the object only becomes visible once the
+        block exits without an exception.
+        """
+        raise NotImplementedError
+
+    def reader(self, name: str) -> BinaryIO:
+        """Open an object for reading."""
+        raise NotImplementedError
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, name: str) -> int:
+        raise NotImplementedError
+
+    def delete(self, name: str) -> None:
+        raise NotImplementedError
+
+    def uri(self, name: str) -> str:
+        """Location string recorded in the catalog for an object."""
+        raise NotImplementedError
+
+    def sync(self) -> None:
+        """Make completed writes durable (no-op unless writes are batched)."""
+
+
+class _FileWriter:
+    """Writes a local file via a temporary name and renames it into place.
+
+    Readers never observe a truncated output: the destination either keeps
+    its previous content or holds the complete new file.
+    """
+
+    def __init__(self, storage: 'LocalStorage', path: Path):
+        self.storage = storage
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}{TEMP_SUFFIX}")
+        self._file = open(self.tmp, 'wb')
+
+    def write(self, data: bytes) -> int:
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def truncate(self, size: Optional[int] = None) -> int:
+        return self._file.truncate(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._file.close()
+            self.tmp.unlink(missing_ok=True)
+            return False
+        try:
+            if self.storage.durability == DURABILITY_FILE:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self.tmp, self.path)
+        except BaseException:
+            self._file.close()
+            self.tmp.unlink(missing_ok=True)
+            raise
+        self.storage._committed(self.path)
+        return False
+
+
+class LocalStorage(StorageBackend):
+    """Local filesystem storage; object names are file paths.
+
+    Outputs are written to a temporary file and atomically renamed. The
+    durability policy decides when data reaches stable storage:
+
+    * ``none``  - leave flushing to the OS (fastest)
+    * ``file``  - fsync each file before the rename and its directory after
+    * ``batch`` - group commit: fsync every file and directory written since
+      the last ``sync()`` in one pass, paying the latency once per batch
+    """
+
+    is_local = True
+
+    def __init__(self, root: str = ".", durability: str = DURABILITY_NONE):
+        """Initialize local storage.
+
+        Args:
+            root: Directory that relative names are resolved against
+            durability: 'none', 'file' or 'batch'
+        """
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Invalid durability policy '{durability}'. "
+                             f"Choose from: {', '.join(DURABILITY_POLICIES)}")
+        self.root = Path(root)
+        self.durability = durability
+        self._pending_files = {}
+        self._pending_dirs = set()
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        return self.root / name
+
+    def _committed(self, path: Path) -> None:
+        """Record a renamed output according to the durability policy."""
+        if self.durability == DURABILITY_FILE:
+            fsync_path(path.parent)
+        elif self.durability == DURABILITY_BATCH:
+            with self._lock:
+                self._pending_files[path] = None
+                self._pending_dirs.add(path.parent)
+
+    def sync(self) -> None:
+        """Group commit: fsync all files and directories written in this batch."""
+        with self._lock:
+            files, self._pending_files = self._pending_files, {}
+            dirs, self._pending_dirs = self._pending_dirs, set()
+        for path in files:
+            if path.exists():
+                fsync_path(path)
+        for directory in dirs:
+            fsync_path(directory)
+
+    def writer(self, name: str) -> _FileWriter:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return _FileWriter(self, path)
+
+    def reader(self, name: str) -> BinaryIO:
+        return open(self._path(name), 'rb')
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).exists()
+
+    def size(self, name: str) -> int:
+        return self._path(name).stat().st_size
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def uri(self, name: str) -> str:
+        return str(self._path(name).resolve())
+
+
+class MultipartWriter:
+    """Buffers a stream into parts and uploads them concurrently.
+
+    At most ``max_workers * 2`` parts are buffered or in flight, so memory
+    stays bounded and a slow upload applies backpressure to the producer.
+    Parts start at ``part_size`` and double every PART_GROWTH_INTERVAL
+    parts (up to MAX_PART_SIZE), since the total length is not known up
+    front and an upload may have at most MAX_PARTS parts.
+    """
+
+    def __init__(self, backend: 'MultipartStorage', name: str,
+                 part_size: int, max_workers: int):
+        self.backend = backend
+        self.name = name
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._futures = []
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        self._max_workers = max_workers
+
+    def _submit(self, data: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.backend._create_upload(self.name)
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers,
+                                            thread_name_prefix="cryptvault-upload")
+        number = len(self._futures) + 1
+        if number > MAX_PARTS:
+            raise ValueError(f"{self.name} needs more than {MAX_PARTS} parts, the limit of a "
+                             f"multipart upload; use a larger part size")
+        self._slots.acquire()
+        future = self._pool.submit(self.backend._upload_part, self.name, self._upload_id, number, data)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _next_part_size(self) -> int:
+        doublings = len(self._futures) // PART_GROWTH_INTERVAL
+        return min(self.part_size << doublings, MAX_PART_SIZE)
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        size = self._next_part_size()
+        while len(self._buffer) >= size:
+            part = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self._submit(part)
+            size = self._next_part_size()
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _commit(self) -> None:
+        if self._upload_id is None:
+            # Small object: a single request is cheaper than a multipart upload
+            self.backend._put(self.name, bytes(self._buffer))
+            return
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        parts = [future.result() for future in self._futures]
+        self.backend._complete_upload(self.name, self._upload_id, parts)
+
+    def _abort(self) -> None:
+        if self._upload_id is not None:
+            for future in self._futures:
+                future.cancel()
+            self._pool.shutdown(wait=True)
+            self.backend._abort_upload(self.name, self._upload_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                try:
+                    self._commit()
+                except BaseException:
+                    self._abort()
+                    raise
+            else:
+                self._abort()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+        return False
+
+
+class MultipartStorage(StorageBackend):
+    """Base class for object stores with multipart uploads."""
+
+    def __init__(self, part_size: int = DEFAULT_PART_SIZE,
+                 max_workers: int = DEFAULT_UPLOAD_WORKERS):
+        self.part_size = part_size
+        self.max_workers = max_workers
+
+    def writer(self, name: str) -> MultipartWriter:
+        return MultipartWriter(self, name, self.part_size, self.max_workers)
+
+    def _put(self, name: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _create_upload(self, name: str) -> str:
+        raise NotImplementedError
+
+    def _upload_part(self, name: str, upload_id: str, number: int, data: bytes) -> dict:
+        raise NotImplementedError
+
+    def _complete_upload(self, name: str, upload_id: str, parts: List[dict]) -> None:
+        raise NotImplementedError
+
+    def _abort_upload(self, name: str, upload_id: str) -> None:
+        raise NotImplementedError
+
+
+class DirectoryStorage(MultipartStorage):
+    """Object store emulated in a local directory (stand-in for tests).
+
+    Parts are staged under ``.uploads/<upload id>/`` and only assembled into
+    the final object on completion, mirroring object-store visibility rules.
+    """
+
+    def __init__(self, root: str, part_size: int = DEFAULT_PART_SIZE,
+                 max_workers: int = DEFAULT_UPLOAD_WORKERS):
+        super().__init__(part_size, max_workers)
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.uploads_dir = self.root / ".uploads"
+
+    def _path(self, name: str) -> Path:
+        return self.root / name.lstrip('/')
+
+    def _publish(self, name: str, chunks) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+
+    def _put(self, name: str, data: bytes) -> None:
+        self._publish(name, [data])
+
+    def _create_upload(self, name: str) -> str:
+        upload_id = uuid.uuid4().hex
+        (self.uploads_dir / upload_id).mkdir(parents=True)
+        return upload_id
+
+    def _upload_part(self, name: str, upload_id: str, number: int, data: bytes) -> dict:
+        (self.uploads_dir / upload_id / f"{number:05d}.part").write_bytes(data)
+        return {'PartNumber': number, 'ETag': hashlib.md5(data).hexdigest()}
+
+    def _complete_upload(self, name: str, upload_id: str, parts: List[dict]) -> None:
+        upload_dir = self.uploads_dir / upload_id
+        part_files = [upload_dir / f"{part['PartNumber']:05d}.part" for part in parts]
+        self._publish(name, (p.read_bytes() for p in part_files))
+        self._abort_upload(name, upload_id)
+
+    def _abort_upload(self, name: str, upload_id: str) -> None:
+        upload_dir = self.uploads_dir / upload_id
+        if upload_dir.exists():
+            for part in upload_dir.iterdir():
+                part.unlink()
+            upload_dir.rmdir()
+
+    def reader(self, name: str) -> BinaryIO:
+        return open(self._path(name), 'rb')
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).exists()
+
+    def size(self, name: str) -> int:
+        return self._path(name).stat().st_size
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def uri(self, name: str) -> str:
+        return f"dir://{self._path(name).resolve()}"
+
+
+class S3Storage(MultipartStorage):
+    """S3-compatible object storage (AWS S3, MinIO, Ceph RGW, ...)."""
+
+    # S3 rejects non-final parts smaller than 5 MiB
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 client: Any = None, part_size: int = DEFAULT_PART_SIZE,
+                 max_workers: int = DEFAULT_UPLOAD_WORKERS):
+        """Initialize S3 storage.
+
+        Args:
+            bucket: Bucket name
+            prefix: Key prefix for all objects
+            endpoint_url: Endpoint for S3-compatible services
+            client: Pre-configured boto3 S3 client (optional)
+            part_size: Multipart part size in bytes (minimum 5 MiB)
+            max_workers: Concurrent part uploads per object
+        """
+        super().__init__(max(part_size, self.MIN_PART_SIZE), max_workers)
+        if client is None:
+            if boto3 is None:
+                raise ImportError("S3 storage requires boto3. Install with: pip install boto3")
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def _key(self, name: str) -> str:
+        name = name.lstrip('/')
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def _put(self, name: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(name), Body=data)
+
+    def _create_upload(self, name: str) -> str:
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self._key(name))
+        return response['UploadId']
+
+    def _upload_part(self, name: str, upload_id: str, number: int, data: bytes) -> dict:
+        response = self.client.upload_part(Bucket=self.bucket, Key=self._key(name),
+                                           UploadId=upload_id, PartNumber=number, Body=data)
+        return {'PartNumber': number, 'ETag': response['ETag']}
+
+    def _complete_upload(self, name: str, upload_id: str, parts: List[dict]) -> None:
+        self.client.complete_multipart_upload(Bucket=self.bucket, Key=self._key(name),
+                                              UploadId=upload_id,
+                                              MultipartUpload={'Parts': parts})
+
+    def _abort_upload(self, name: str, upload_id: str) -> None:
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(name),
+                                           UploadId=upload_id)
+
+    def reader(self, name: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(name))['Body']
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+            return True
+        except Exception:
+            return False
+
+    def size(self, name: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._key(name))['ContentLength']
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def uri(self, name: str) -> str:
+        return f"s3://{self.bucket}/{self._key(name)}"
+
+
+def storage_from_url(url: Optional[str],
+                     endpoint_url: Optional[str] = None) -> Optional[StorageBackend]:
+    """Create a storage backend from a URL.
+
+    Args:
+        url: None for local files, ``s3://bucket/prefix`` or ``dir:///path``
+        endpoint_url: Endpoint for S3-compatible services
+
+    Returns:
+        Storage backend instance, or None for local files (CryptVault then
+        writes through its own LocalStorage, which carries the durability
+        policy)
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 's3':
+        return S3Storage(parsed.netloc, parsed.path, endpoint_url=endpoint_url)
+    if parsed.scheme == 'dir':
+        return DirectoryStorage(parsed.netloc + parsed.path)
+    raise ValueError(f"Unsupported storage URL: {url}")
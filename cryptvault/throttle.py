@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Throttling
+Bandwidth and CPU limits for background encryption jobs.
+
+A token bucket meters the bytes read and written by every file of a run
+(shared across batch threads), and an adjustable concurrency limit caps how
+many threads run the cipher at once. Both can be changed while the job runs
+by editing a small JSON control file, which is checked at most once per
+second and immediately after SIGHUP:
+
+    {"io_rate": 52428800, "crypto_workers": 2}
+
+``io_rate`` is in bytes per second; 0 or null lifts a limit.
+"""
+
+import json
+import time
+import signal
+import threading
+from pathlib import Path
+from typing import Optional, BinaryIO, Dict, Any
+
+
+CONTROL_POLL_INTERVAL = 1.0
+
+# Longest single sleep while waiting for tokens, so rate changes apply quickly
+MAX_SLEEP = 0.25
+
+
+class TokenBucket:
+    """Thread-safe token bucket; consumers may go into debt and then wait."""
+
+    def __init__(self, rate: Optional[float] = None):
+        """Initialize bucket.
+
+        Args:
+            rate: Tokens (bytes) per second, None for unlimited; the burst
+                size is one second worth of tokens
+        """
+        self._lock = threading.Lock()
+        self._rate = None
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        """Change the rate (takes effect for waiting consumers too)."""
+        with self._lock:
+            self._refill()
+            self._rate = float(rate) if rate else None
+            if self._rate is not None:
+                self._tokens = min(self._tokens, self._rate)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._rate is not None:
+            self._tokens = min(self._rate, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def consume(self, count: int) -> None:
+        """Take ``count`` tokens, blocking while the bucket is in debt."""
+        with self._lock:
+            if self._rate is None:
+                return
+            self._refill()
+            self._tokens -= count
+        while True:
+            with self._lock:
+                if self._rate is None:
+                    self._tokens = 0.0
+                    return
+                self._refill()
+                if self._tokens >= 0:
+                    return
+                wait = -self._tokens / self._rate
+            time.sleep(min(wait, MAX_SLEEP))
+
+
+class ConcurrencyLimit:
+    """Semaphore whose limit can be changed while threads hold it."""
+
+    def __init__(self, limit: Optional[int] = None):
+        """Initialize limit (None for unlimited)."""
+        self._cond = threading.Condition()
+        self._limit = None
+        self.active = 0
+        self.set_limit(limit)
+
+    @property
+    def limit(self) -> Optional[int]:
+        return self._limit
+
+    def set_limit(self, limit: Optional[int]) -> None:
+        if limit is not None and limit < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        with self._cond:
+            self._limit = limit
+            self._cond.notify_all()
+
+    def __enter__(self):
+        with self._cond:
+            while self._limit is not None and self.active >= self._limit:
+                self._cond.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+        return False
+
+
+class Throttle:
+    """I/O rate and crypto concurrency limits for one run."""
+
+    def __init__(self, io_rate: Optional[float] = None, crypto_workers: Optional[int] = None,
+                 control_file: Optional[str] = None):
+        """Initialize throttle.
+
+        Args:
+            io_rate: Bytes per second read plus written, None for unlimited
+            crypto_workers: Threads allowed to run the cipher at once
+            control_file: JSON file whose settings override these while the
+                run is in progress (read now if it exists)
+        """
+        self.io = TokenBucket(io_rate)
+        self.crypto = ConcurrencyLimit(crypto_workers)
+        self.control_file = Path(control_file) if control_file else None
+        self._control_mtime = None
+        self._next_check = 0.0
+        self._poll_lock = threading.Lock()
+        self.poll()
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        """Apply settings ('io_rate' and/or 'crypto_workers')."""
+        if 'io_rate' in settings:
+            self.io.set_rate(settings['io_rate'])
+        if 'crypto_workers' in settings:
+            self.crypto.set_limit(settings['crypto_workers'] or None)
+
+    def poll(self) -> None:
+        """Re-read the control file if it changed (at most once per interval)."""
+        if self.control_file is None or time.monotonic() < self._next_check:
+            return
+        # One thread checks; the others carry on with the current limits
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + CONTROL_POLL_INTERVAL
+            try:
+                mtime = self.control_file.stat().st_mtime_ns
+            except OSError:
+                return
+            if mtime == self._control_mtime:
+                return
+            self._control_mtime = mtime
+            try:
+                self.configure(json.loads(self.control_file.read_text()))
+            except (OSError, ValueError, TypeError, AttributeError):
+                # Half-written or invalid: keep the current limits and
+                # retry when the file changes again
+                pass
+        finally:
+            self._poll_lock.release()
+
+    def request_reload(self) -> None:
+        """Check the control file on the next I/O (safe from signal handlers)."""
+        self._control_mtime = None
+        self._next_check = 0.0
+
+    def consume(self, count: int) -> None:
+        """Account for ``count`` bytes of I/O, waiting if over the rate."""
+        self.poll()
+        self.io.consume(count)
+
+    def reader(self, stream: BinaryIO) -> BinaryIO:
+        return ThrottledReader(stream, self)
+
+    def writer(self, stream: BinaryIO) -> BinaryIO:
+        return ThrottledWriter(stream, self)
+
+    def install_signal_handler(self, signum: int = getattr(signal, 'SIGHUP', 0)) -> None:
+        """Reload the control file on ``signum`` (main thread only)."""
+        if signum:
+            signal.signal(signum, lambda *_: self.request_reload())
+
+
+class ThrottledReader:
+    """Stream wrapper that meters bytes read."""
+
+    def __init__(self, stream: BinaryIO, throttle: Throttle):
+        self._stream = stream
+        self._throttle = throttle
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._throttle.consume(len(data))
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+class ThrottledWriter:
+    """Stream wrapper that meters bytes written."""
+
+    def __init__(self, stream: BinaryIO, throttle: Throttle):
+        self._stream = stream
+        self._throttle = throttle
+
+    def write(self, data: bytes) -> int:
+        self._throttle.consume(len(data))
+        return self._stream.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Autotuning
+Segment size and worker count measured against a real source and target.
+
+The fastest segment size and number of concurrent files depend on the
+storage at both ends: local NVMe peaks with small segments and many
+workers, while network mounts and object stores favour large writes and
+fewer streams. benchmark() encrypts data read from the source into
+scratch objects on the target with each candidate setting. The result is
+cached per host and target in the sandbox (TuningCache) and used by later
+runs that write there.
+"""
+
+import os
+import json
+import uuid
+import base64
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, BinaryIO
+
+from .container import encrypt_stream
+
+KIB = 1024
+MIB = 1024 * KIB
+
+SEGMENT_SIZES = (256 * KIB, MIB, 4 * MIB, 16 * MIB)
+WORKER_COUNTS = (1, 2, 4, 8, 16)
+DEFAULT_SAMPLE_SIZE = 32 * MIB
+# Settings within this fraction of the fastest count as equally fast; the
+# cheaper one (smaller segments, fewer workers) is kept
+TOLERANCE = 0.05
+
+
+@dataclass
+class Tuning:
+    """Measured settings for writing to one target from one host."""
+
+    segment_size: int
+    workers: int
+    throughput: float
+    measured: str
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'Tuning':
+        return cls(data['segment_size'], data['workers'], data['throughput'], data['measured'])
+
+
+class _Limited:
+    """Reads at most ``remaining`` bytes of a stream."""
+
+    def __init__(self, stream: BinaryIO, remaining: int):
+        self._stream = stream
+        self._remaining = remaining
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def _run(source: Path, storage: Any, prefix: str, cipher: str, sample_size: int,
+         segment_size: int, workers: int) -> float:
+    """Throughput (bytes/s) of ``workers`` files sharing ``sample_size`` bytes."""
+    key = base64.urlsafe_b64encode(os.urandom(32))
+    share = max(1, sample_size // workers)
+    names = [f"{prefix}.cvtune-{uuid.uuid4().hex}" for _ in range(workers)]
+
+    def encrypt(name: str) -> None:
+        with open(source, 'rb') as raw, storage.writer(name) as dst:
+            encrypt_stream(_Limited(raw, share), dst, key, cipher, segment_size)
+            dst.flush()
+            # Time the device, not the page cache
+            try:
+                os.fsync(dst.fileno())
+            except (AttributeError, OSError):
+                pass
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(encrypt, names))
+        elapsed = time.perf_counter() - start
+    finally:
+        for name in names:
+            storage.delete(name)
+    return share * workers / max(elapsed, 1e-9)
+
+
+def _cheapest(timings: Dict[int, float]) -> int:
+    """Smallest candidate within TOLERANCE of the fastest."""
+    best = max(timings.values())
+    return min(candidate for candidate, rate in timings.items() if rate >= best * (1 - TOLERANCE))
+
+
+def benchmark(source: Path, storage: Any, prefix: str, cipher: str,
+              sample_size: int = DEFAULT_SAMPLE_SIZE,
+              segment_sizes: Iterable[int] = SEGMENT_SIZES,
+              worker_counts: Iterable[int] = WORKER_COUNTS) -> Tuning:
+    """Find the fastest segment size and worker count for a source and target.
+
+    Segment sizes are compared first with a few workers, then worker counts
+    with the chosen segment size. Every run encrypts ``sample_size`` bytes in
+    total (split among its workers) into scratch objects that are deleted
+    afterwards.
+
+    Args:
+        source: File read as the benchmark input (shorter files are read whole)
+        storage: StorageBackend of the target
+        prefix: Name prefix of the scratch objects (the target directory
+            with a trailing separator for local storage)
+        cipher: AEAD cipher to encrypt with
+        sample_size: Bytes encrypted per run
+        segment_sizes: Candidate segment sizes
+        worker_counts: Candidate numbers of concurrent files
+
+    Returns:
+        Chosen Tuning
+    """
+    sample_size = min(sample_size, source.stat().st_size) or 1
+    sizes = [size for size in segment_sizes if size <= sample_size] or [min(segment_sizes)]
+    probe_workers = min(4, max(worker_counts))
+    by_size = {size: _run(source, storage, prefix, cipher, sample_size, size, probe_workers)
+               for size in sizes}
+    segment_size = _cheapest(by_size)
+    by_workers = {count: _run(source, storage, prefix, cipher, sample_size, segment_size, count)
+                  for count in worker_counts}
+    workers = _cheapest(by_workers)
+    return Tuning(segment_size, workers, by_workers[workers], datetime.now().isoformat())
+
+
+class TuningCache:
+    """Tuning results per host and target, kept in the sandbox."""
+
+    FILENAME = ".tuning.json"
+
+    def __init__(self, sandbox_dir: Path, local: Any):
+        """Initialize cache.
+
+        Args:
+            sandbox_dir: Sandbox holding the cache file
+            local: LocalStorage the file is written through
+        """
+        self.path = Path(sandbox_dir) / self.FILENAME
+        self.local = local
+        self._entries: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _key(target: str) -> str:
+        return f"{socket.gethostname()}|{target}"
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def lookup(self, target: str) -> Optional[Tuning]:
+        """Tuning for a target, or for the nearest tuned parent of a local directory."""
+        entries = self._load()
+        candidates = [target]
+        if '://' not in target:
+            candidates += [str(parent) for parent in Path(target).parents]
+        for candidate in candidates:
+            entry = entries.get(self._key(candidate))
+            if entry is not None:
+                return Tuning.from_json(entry)
+        return None
+
+    def store(self, target: str, tuning: Tuning) -> None:
+        entries = self._load()
+        entries[self._key(target)] = tuning.to_json()
+        with self.local.writer(str(self.path)) as f:
+            f.write(json.dumps(entries, indent=2).encode('utf-8'))
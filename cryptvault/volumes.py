@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Split Volumes
+Encrypted output written as fixed-size part files plus a small index.
+
+A volume set replaces one large output with numbered parts
+(``name.0001``, ``name.0002``, ...) and an index stored under the output
+name itself, so key lookups by file name keep working. The index lists
+the size and SHA-256 of every part: each part can be checked on its own
+without the key, and only damaged parts need to be transferred again.
+
+The parts concatenate to an ordinary container (or Fernet token), which
+stays authenticated by its own cipher; the part hashes only locate
+damage. Parts are committed before the index, so an index never points
+at parts that were not written. Rewriting a set puts the new parts under
+the next generation's names (``name.g1.0001``, ...) and removes the old
+parts only once the new index is in place, so a failed rewrite leaves
+the previous set intact.
+"""
+
+import os
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, BinaryIO, Iterator
+
+# Marks an index (same length as the container magic)
+VOLUME_MAGIC = b"CVVL"
+VOLUME_VERSION = 1
+# Indexes of later generations name their parts differently
+GENERATION_VERSION = 2
+# Bytes hashed per read while streaming a part
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class VolumeError(ValueError):
+    """Raised when a volume index is malformed or a part is missing or damaged."""
+
+
+def is_volume_index(prefix: bytes) -> bool:
+    """Whether the first bytes of a file are those of a volume index."""
+    return prefix.startswith(VOLUME_MAGIC)
+
+
+def part_name(name: str, number: int, generation: int = 0) -> str:
+    """Storage name of part ``number`` (1-based) of the volume set ``name``."""
+    if generation:
+        return f"{name}.g{generation}.{number:04d}"
+    return f"{name}.{number:04d}"
+
+
+def part_path(name: str, part: Dict[str, Any]) -> str:
+    """Storage name of a part listed in the index stored under ``name``."""
+    return os.path.join(os.path.dirname(name), part['name'])
+
+
+def read_index(stream: BinaryIO) -> Dict[str, Any]:
+    """Parse a volume index from a stream positioned at its start."""
+    if not is_volume_index(stream.read(len(VOLUME_MAGIC))):
+        raise VolumeError("Not a volume index")
+    try:
+        index = json.loads(stream.read().decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        raise VolumeError("Volume index is corrupted")
+    if index.get('version') not in (VOLUME_VERSION, GENERATION_VERSION):
+        raise VolumeError(f"Unsupported volume index version: {index.get('version')}")
+    if not index.get('parts') or sum(part['size'] for part in index['parts']) != index['size']:
+        raise VolumeError("Volume index is inconsistent")
+    return index
+
+
+def _damaged(name: str, number: int, part: Dict[str, Any]) -> VolumeError:
+    return VolumeError(f"Volume part {number} ({part['name']}) of {name} is missing or damaged; "
+                       f"fetch it again")
+
+
+class VolumeWriter:
+    """Writes a byte stream as parts of ``part_size`` bytes and an index.
+
+    Use as a context manager: the index is written when the block exits
+    cleanly; on an exception the parts written so far are deleted. Parts
+    of a set already stored under ``name`` are only removed after the new
+    index replaced it.
+    """
+
+    def __init__(self, storage: Any, name: str, part_size: int):
+        """Initialize writer.
+
+        Args:
+            storage: StorageBackend receiving the parts and the index
+            name: Storage name of the index (parts get numbered suffixes)
+            part_size: Bytes per part (the last part may be shorter)
+        """
+        if part_size <= 0:
+            raise ValueError("Volume size must be positive")
+        self.storage = storage
+        self.name = name
+        self.part_size = part_size
+        self.parts: List[Dict[str, Any]] = []
+        self.size = 0
+        self._writer = None
+        self._hasher = None
+        self._filled = 0
+        self._previous = self._stored_index()
+        self.generation = self._previous.get('generation', 0) + 1 if self._previous else 0
+
+    def _stored_index(self) -> Dict[str, Any]:
+        """Index of the set currently stored under the name, if any."""
+        if not self.storage.exists(self.name):
+            return {}
+        try:
+            with self.storage.reader(self.name) as f:
+                return read_index(f)
+        except (OSError, VolumeError):
+            return {}
+
+    def _open_part(self) -> None:
+        self._writer = self.storage.writer(part_name(self.name, len(self.parts) + 1, self.generation))
+        self._writer.__enter__()
+        self._hasher = hashlib.sha256()
+        self._filled = 0
+
+    def _close_part(self) -> None:
+        self._writer.__exit__(None, None, None)
+        name = part_name(self.name, len(self.parts) + 1, self.generation)
+        self.parts.append({
+            'name': os.path.basename(name),
+            'size': self._filled,
+            'sha256': self._hasher.hexdigest(),
+        })
+        self._writer = None
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while len(view):
+            if self._writer is None:
+                self._open_part()
+            piece = view[:self.part_size - self._filled]
+            self._writer.write(piece)
+            self._hasher.update(piece)
+            self._filled += len(piece)
+            self.size += len(piece)
+            view = view[len(piece):]
+            if self._filled == self.part_size:
+                self._close_part()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        index = {
+            'version': GENERATION_VERSION if self.generation else VOLUME_VERSION,
+            'part_size': self.part_size,
+            'size': self.size,
+            'parts': self.parts,
+        }
+        if self.generation:
+            index['generation'] = self.generation
+        return index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            if self._writer is not None:
+                self._writer.__exit__(exc_type, exc, tb)
+            # Only this generation's parts: the stored set stays readable
+            for part in self.parts:
+                self.storage.delete(part_path(self.name, part))
+            return False
+        if self._writer is not None or not self.parts:
+            # An empty input still gets one (empty) part
+            if self._writer is None:
+                self._open_part()
+            self._close_part()
+        with self.storage.writer(self.name) as out:
+            out.write(VOLUME_MAGIC + b"\n" + json.dumps(self.index, indent=1).encode('utf-8'))
+        # The replaced set, and parts left over from a longer set of this generation
+        current = {part['name'] for part in self.parts}
+        for part in self._previous.get('parts', ()):
+            if part['name'] not in current:
+                self.storage.delete(part_path(self.name, part))
+        number = len(self.parts) + 1
+        while self.storage.exists(part_name(self.name, number, self.generation)):
+            self.storage.delete(part_name(self.name, number, self.generation))
+            number += 1
+        return False
+
+
+class VolumeReader:
+    """Reads the parts of a volume set as one stream, checking each part.
+
+    With one worker the parts are streamed in order (a damaged part is
+    reported when its end is reached); with more, the next ``workers``
+    parts are fetched and checked concurrently, holding up to that many
+    parts in memory.
+    """
+
+    def __init__(self, storage: Any, name: str, index: Dict[str, Any], workers: int = 1):
+        """Initialize reader.
+
+        Args:
+            storage: StorageBackend holding the parts
+            name: Storage name of the index
+            index: Parsed index (see read_index)
+            workers: Parts fetched concurrently
+        """
+        self.storage = storage
+        self.name = name
+        self.index = index
+        self.workers = max(1, workers)
+        self._chunks = self._prefetched() if self.workers > 1 else self._streamed()
+        self._buffer = memoryview(b'')
+
+    def _streamed(self) -> Iterator[memoryview]:
+        for number, part in enumerate(self.index['parts'], 1):
+            hasher = hashlib.sha256()
+            size = 0
+            try:
+                src = self.storage.reader(part_path(self.name, part))
+            except FileNotFoundError:
+                raise _damaged(self.name, number, part)
+            with src:
+                for chunk in iter(lambda: src.read(READ_CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    yield memoryview(chunk)
+            if size != part['size'] or hasher.hexdigest() != part['sha256']:
+                raise _damaged(self.name, number, part)
+
+    def _fetch(self, number: int) -> bytes:
+        part = self.index['parts'][number - 1]
+        try:
+            with self.storage.reader(part_path(self.name, part)) as src:
+                data = src.read()
+        except FileNotFoundError:
+            raise _damaged(self.name, number, part)
+        if len(data) != part['size'] or hashlib.sha256(data).hexdigest() != part['sha256']:
+            raise _damaged(self.name, number, part)
+        return data
+
+    def _prefetched(self) -> Iterator[memoryview]:
+        numbers = iter(range(1, len(self.index['parts']) + 1))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque(pool.submit(self._fetch, number)
+                            for _, number in zip(range(self.workers), numbers))
+            try:
+                while pending:
+                    data = pending.popleft().result()
+                    number = next(numbers, None)
+                    if number is not None:
+                        pending.append(pool.submit(self._fetch, number))
+                    yield memoryview(data)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while size != 0:
+            if not len(self._buffer):
+                self._buffer = next(self._chunks, memoryview(b''))
+                if not len(self._buffer):
+                    break
+            piece = self._buffer if size < 0 else self._buffer[:size]
+            chunks.append(bytes(piece))
+            self._buffer = self._buffer[len(piece):]
+            if size > 0:
+                size -= len(piece)
+        return b''.join(chunks)
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._chunks.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+@dataclass
+class VolumeReport:
+    """Result of checking the parts of a volume set against its index."""
+
+    parts: List[str]
+    damaged: List[int] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.damaged
+
+
+def verify_volumes(storage: Any, name: str, index: Dict[str, Any],
+                   workers: int = 4) -> VolumeReport:
+    """Check every part of a volume set against its index (no key needed).
+
+    Args:
+        storage: StorageBackend holding the parts
+        name: Storage name of the index
+        index: Parsed index (see read_index)
+        workers: Parts hashed concurrently
+
+    Returns:
+        VolumeReport listing missing or damaged part numbers (1-based)
+    """
+    def intact(number: int) -> bool:
+        part = index['parts'][number - 1]
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with storage.reader(part_path(name, part)) as src:
+                for chunk in iter(lambda: src.read(READ_CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    size += len(chunk)
+        except FileNotFoundError:
+            return False
+        return size == part['size'] and hasher.hexdigest() == part['sha256']
+
+    numbers = range(1, len(index['parts']) + 1)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(intact, numbers))
+    return VolumeReport([part['name'] for part in index['parts']],
+                        [number for number, ok in zip(numbers, results) if not ok])
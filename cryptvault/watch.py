@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Watch Mode
+Notices new and changed files below a directory and hands them out in batches.
+
+On Linux the kernel's inotify interface is used (through ctypes, no extra
+dependency); elsewhere, or when inotify is unavailable, the tree is polled
+by comparing size and modification time. Every change restarts a per-file
+debounce timer, so a file is only reported once it has been quiet for a
+while, and files that become quiet together are coalesced into one batch.
+"""
+
+import os
+import time
+import errno
+import fnmatch
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from pathlib import Path
+from typing import Optional, Dict, List, Iterable, Iterator, Tuple
+
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 5.0
+MAX_BATCH = 256
+
+# Longest wait for events, so a stop request is noticed promptly
+_TICK = 0.5
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+class _Filter:
+    """Decides which files below the root are reported."""
+
+    def __init__(self, pattern: str, exclude: Iterable[Path], ignore_suffixes: Iterable[str]):
+        self.pattern = pattern
+        self.exclude = [Path(p).resolve() for p in exclude]
+        self.ignore_suffixes = tuple(ignore_suffixes)
+
+    def directory(self, path: Path) -> bool:
+        resolved = path.resolve()
+        return not any(resolved == p or p in resolved.parents for p in self.exclude)
+
+    def file(self, path: Path) -> bool:
+        return (fnmatch.fnmatch(path.name, self.pattern)
+                and not path.name.endswith(self.ignore_suffixes)
+                and self.directory(path.parent))
+
+
+def _scan(root: Path, selected: _Filter) -> Iterator[Tuple[Path, os.stat_result]]:
+    """Yield (path, stat) for the reported files below ``root``."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            path = Path(entry.path)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if selected.directory(path):
+                        stack.append(path)
+                elif entry.is_file() and selected.file(path):
+                    yield path, entry.stat()
+            except OSError:
+                continue
+
+
+class PollingSource:
+    """Change source that rescans the tree every ``interval`` seconds."""
+
+    def __init__(self, root: Path, selected: _Filter, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.selected = selected
+        self.interval = interval
+        self._snapshot = self._take()
+        self._next_scan = time.monotonic() + interval
+
+    def _take(self) -> Dict[Path, Tuple[int, int]]:
+        return {path: (st.st_size, st.st_mtime_ns) for path, st in _scan(self.root, self.selected)}
+
+    def changes(self, timeout: float) -> List[Path]:
+        """Files that appeared or changed, waiting at most ``timeout`` seconds."""
+        wait = self._next_scan - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if wait > timeout:
+                return []
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._take()
+        changed = [path for path, state in snapshot.items() if self._snapshot.get(path) != state]
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifySource:
+    """Change source backed by Linux inotify watches on every directory."""
+
+    def __init__(self, root: Path, selected: _Filter):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.selected = selected
+        self._watches: Dict[int, Path] = {}
+        self._watch_tree(root)
+
+    @classmethod
+    def available(cls) -> bool:
+        return hasattr(os, 'uname') and os.uname().sysname == 'Linux'
+
+    def _watch_tree(self, top: Path) -> List[Path]:
+        """Watch ``top`` and its subdirectories; returns files already inside."""
+        found = []
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+            self._watches[wd] = directory
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    if self.selected.directory(path):
+                        stack.append(path)
+                elif entry.is_file() and self.selected.file(path):
+                    found.append(path)
+        return found
+
+    def changes(self, timeout: float) -> List[Path]:
+        """Files written, closed or moved in, waiting at most ``timeout`` seconds."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+            offset += _EVENT.size + length
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost: report everything, callers skip what is current
+                changed.extend(path for path, _ in _scan(self.root, self.selected))
+                continue
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and self.selected.directory(path):
+                    changed.extend(self._watch_tree(path))
+            elif self.selected.file(path):
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Debouncer:
+    """Holds paths back until they have been quiet for ``delay`` seconds."""
+
+    def __init__(self, delay: float = DEFAULT_DEBOUNCE):
+        self.delay = delay
+        self._pending: Dict[Path, float] = {}
+
+    def add(self, paths: Iterable[Path], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            self._pending[path] = now
+
+    def ready(self, now: Optional[float] = None) -> List[Path]:
+        """Remove and return the paths whose quiet period has passed."""
+        now = time.monotonic() if now is None else now
+        ready = [path for path, seen in self._pending.items() if now - seen >= self.delay]
+        for path in ready:
+            del self._pending[path]
+        return ready
+
+    def next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return min(self._pending.values()) + self.delay
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class Watcher:
+    """Turns file-system changes below a root into debounced batches."""
+
+    def __init__(self, root: str, pattern: str = "*", debounce: float = DEFAULT_DEBOUNCE,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, polling: bool = False,
+                 exclude: Iterable[str] = (), ignore_suffixes: Iterable[str] = (),
+                 max_batch: int = MAX_BATCH):
+        """Initialize watcher (watches are set up by batches()).
+
+        Args:
+            root: Directory to watch recursively
+            pattern: Filename glob of reported files
+            debounce: Seconds a file must be quiet before it is reported
+            poll_interval: Seconds between scans when polling
+            polling: Poll even where inotify is available
+            exclude: Directories below root to ignore (e.g. the output)
+            ignore_suffixes: Filename suffixes to ignore (temporary files)
+            max_batch: Maximum files per batch
+        """
+        self.root = Path(root)
+        if not self.root.is_dir():
+            raise FileNotFoundError(f"Directory not found: {root}")
+        self.selected = _Filter(pattern, exclude, ignore_suffixes)
+        self.debouncer = Debouncer(debounce)
+        self.poll_interval = poll_interval
+        self.polling = polling or not InotifySource.available()
+        self.max_batch = max_batch
+        self.backend = None
+
+    def _open(self):
+        if not self.polling:
+            try:
+                source = InotifySource(self.root, self.selected)
+                self.backend = 'inotify'
+                return source
+            except OSError:
+                # e.g. the inotify watch limit was reached
+                pass
+        self.backend = 'polling'
+        return PollingSource(self.root, self.selected, self.poll_interval)
+
+    def files(self) -> Iterator[Path]:
+        """Files currently matching the watch (for a catch-up pass)."""
+        for path, _ in _scan(self.root, self.selected):
+            yield path
+
+    def batches(self, stop: threading.Event, initial: Iterable[Path] = ()) -> Iterator[List[Path]]:
+        """Yield batches of quiet files until ``stop`` is set.
+
+        Args:
+            stop: Event that ends the watch
+            initial: Files to report first, without debouncing
+
+        Yields:
+            Lists of at most ``max_batch`` paths
+        """
+        source = self._open()
+        try:
+            batch = []
+            for path in initial:
+                batch.append(path)
+                if len(batch) >= self.max_batch:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+            while not stop.is_set():
+                deadline = self.debouncer.next_deadline()
+                timeout = _TICK if deadline is None else min(_TICK, max(0.0, deadline - time.monotonic()))
+                self.debouncer.add(source.changes(timeout))
+                ready = self.debouncer.ready()
+                for start in range(0, len(ready), self.max_batch):
+                    yield ready[start:start + self.max_batch]
+        finally:
+            source.close()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CryptVault - Distributed Work Queue
+SQLite lease queue that lets several processes or hosts share one batch.
+
+The queue database lives on shared storage. Workers lease one file at a time
+(largest first) inside an immediate transaction, renew the lease while they
+work, and mark the task done or failed. A lease that is not renewed expires
+and the task goes back to the pool, so a crashed worker's files are picked
+up by the others; tasks that keep failing are given up after a few attempts.
+No broker is involved, only SQLite's file locking.
+"""
+
+import os
+import time
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Callable
+
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    operation TEXT NOT NULL,
+    path TEXT NOT NULL,
+    output TEXT,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    result TEXT,
+    key_id TEXT,
+    started REAL,
+    finished REAL,
+    UNIQUE (operation, path)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, size);
+"""
+
+
+def worker_id() -> str:
+    """Identify this process across hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """Lease queue of file tasks stored in a shared SQLite database."""
+
+    def __init__(self, db_path: Path, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """Initialize queue (the database is created on first use).
+
+        Args:
+            db_path: Path to the queue database on shared storage
+            max_attempts: Leases per task before it is marked failed
+        """
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per operation keeps worker threads and
+        # processes independent. The default rollback journal is used because
+        # WAL needs shared memory, which network filesystems do not provide.
+        conn = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return value
+        finally:
+            conn.close()
+
+    def enqueue(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """Add tasks; tasks already queued for the same operation and path are skipped.
+
+        Args:
+            tasks: Dictionaries with operation, path, output and size
+
+        Returns:
+            Number of tasks added
+        """
+        rows = [(t['operation'], t['path'], t.get('output'), t['size']) for t in tasks]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (operation, path, output, size) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def lease(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """Take the largest available task.
+
+        Pending tasks and tasks whose lease expired are available. A task
+        that has used up its attempts is marked failed instead of leased.
+
+        Returns:
+            Task dictionary, or None if nothing is available right now
+        """
+        def take(conn):
+            now = time.time()
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM tasks WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                    "ORDER BY size DESC, id LIMIT 1",
+                    (STATUS_PENDING, STATUS_LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE tasks SET status = ?, owner = NULL, finished = ?, "
+                        "error = COALESCE(error, 'lease expired') WHERE id = ?",
+                        (STATUS_FAILED, now, row['id']),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE tasks SET status = ?, owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, started = ? WHERE id = ?",
+                    (STATUS_LEASED, owner, now + lease_seconds, now, row['id']),
+                )
+                task = dict(row)
+                task['attempts'] += 1
+                return task
+
+        return self._transaction(take)
+
+    def renew(self, task_id: int, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease; returns False if the lease was lost to another worker."""
+        def extend(conn):
+            return conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + lease_seconds, task_id, owner, STATUS_LEASED),
+            ).rowcount == 1
+
+        return self._transaction(extend)
+
+    def complete(self, task_id: int, owner: str, result: Optional[str] = None,
+                 key_id: Optional[str] = None) -> bool:
+        """Mark a leased task done; returns False if the lease was lost."""
+        def finish(conn):
+            return conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, key_id = ?, error = NULL, "
+                "lease_expires = NULL, finished = ? WHERE id = ? AND owner = ? AND status = ?",
+                (STATUS_DONE, result, key_id, time.time(), task_id, owner, STATUS_LEASED),
+            ).rowcount == 1
+
+        return self._transaction(finish)
+
+    def fail(self, task_id: int, owner: str, error: str) -> bool:
+        """Release a task after an error; it is retried until attempts run out."""
+        def release(conn):
+            row = conn.execute("SELECT attempts FROM tasks WHERE id = ? AND owner = ? AND status = ?",
+                               (task_id, owner, STATUS_LEASED)).fetchone()
+            if row is None:
+                return False
+            status = STATUS_FAILED if row['attempts'] >= self.max_attempts else STATUS_PENDING
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, lease_expires = NULL, finished = ? "
+                "WHERE id = ?",
+                (status, error, time.time(), task_id),
+            )
+            return True
+
+        return self._transaction(release)
+
+    def retry_failed(self) -> int:
+        """Put failed tasks back in the queue with fresh attempts."""
+        def reset(conn):
+            return conn.execute(
+                "UPDATE tasks SET status = ?, attempts = 0, owner = NULL WHERE status = ?",
+                (STATUS_PENDING, STATUS_FAILED),
+            ).rowcount
+
+        return self._transaction(reset)
+
+    def report(self) -> Dict[str, Any]:
+        """Merged report of the whole batch across all workers.
+
+        Returns:
+            Dictionary with per-status counts and bytes, per-worker totals
+            and the list of failed tasks
+        """
+        conn = self._connect()
+        try:
+            statuses = {status: {'count': 0, 'bytes': 0}
+                        for status in (STATUS_PENDING, STATUS_LEASED, STATUS_DONE, STATUS_FAILED)}
+            for row in conn.execute("SELECT status, COUNT(*), COALESCE(SUM(size), 0) "
+                                    "FROM tasks GROUP BY status"):
+                statuses[row[0]] = {'count': row[1], 'bytes': row[2]}
+            workers = {
+                row['owner']: {'count': row['n'], 'bytes': row['bytes']}
+                for row in conn.execute(
+                    "SELECT owner, COUNT(*) AS n, SUM(size) AS bytes FROM tasks "
+                    "WHERE status = ? GROUP BY owner ORDER BY owner", (STATUS_DONE,))
+            }
+            failures = [dict(row) for row in conn.execute(
+                "SELECT path, attempts, error FROM tasks WHERE status = ? ORDER BY path",
+                (STATUS_FAILED,))]
+        finally:
+            conn.close()
+        return {
+            'total': sum(s['count'] for s in statuses.values()),
+            'statuses': statuses,
+            'workers': workers,
+            'failures': failures,
+        }
+
+    def operations(self) -> set:
+        """Operations that still have pending or leased tasks."""
+        conn = self._connect()
+        try:
+            return {row[0] for row in conn.execute(
+                "SELECT DISTINCT operation FROM tasks WHERE status IN (?, ?)",
+                (STATUS_PENDING, STATUS_LEASED))}
+        finally:
+            conn.close()
+
+    def drained(self) -> bool:
+        """True when no task is pending or leased."""
+        statuses = self.report()['statuses']
+        return not statuses[STATUS_PENDING]['count'] and not statuses[STATUS_LEASED]['count']
+
+
+def run_worker(queue: WorkQueue, handler: Callable[[Dict[str, Any]], tuple],
+               owner: Optional[str] = None, threads: int = 1,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS, wait: bool = True,
+               poll_interval: float = POLL_INTERVAL,
+               on_task: Optional[Callable[[Dict[str, Any], Optional[str]], None]] = None) -> int:
+    """Process queue tasks until the queue is drained.
+
+    Args:
+        queue: Shared work queue
+        handler: Called with a task; returns (result, key_id) or raises
+        owner: Worker identity (default: host:pid)
+        threads: Tasks processed concurrently by this worker
+        lease_seconds: Lease length; leases are renewed at a third of it
+        wait: Keep polling while other workers still hold leases (their
+            tasks come back if those workers die) instead of exiting as
+            soon as nothing is pending
+        poll_interval: Seconds between polls while waiting
+        on_task: Callback invoked with (task, error) after each task
+
+    Returns:
+        Number of tasks completed by this worker
+    """
+    owner = owner or worker_id()
+    completed = []
+
+    def heartbeat(task_id: int, thread_owner: str, stop: threading.Event) -> None:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.renew(task_id, thread_owner, lease_seconds):
+                return
+
+    def loop(index: int) -> None:
+        thread_owner = f"{owner}/{index}" if threads > 1 else owner
+        while True:
+            task = queue.lease(thread_owner, lease_seconds)
+            if task is None:
+                if wait and not queue.drained():
+                    time.sleep(poll_interval)
+                    continue
+                return
+            stop = threading.Event()
+            beat = threading.Thread(target=heartbeat, args=(task['id'], thread_owner, stop), daemon=True)
+            beat.start()
+            error = None
+            try:
+                result, key_id = handler(task)
+            except Exception as e:
+                error = str(e)
+            finally:
+                stop.set()
+                beat.join()
+            if error is None:
+                if queue.complete(task['id'], thread_owner, result, key_id):
+                    completed.append(task['id'])
+            else:
+                queue.fail(task['id'], thread_owner, error)
+            if on_task is not None:
+                on_task(task, error)
+
+    pool = [threading.Thread(target=loop, args=(i,), name=f"cryptvault-worker-{i}")
+            for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return len(completed)
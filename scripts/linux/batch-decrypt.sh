@@ -86,27 +86,21 @@ if [[ ! $REPLY =~ ^[Yy]$ ]]; then
 fi
 echo ""
 
-# Decrypt files
-FILE_COUNT=0
-SUCCESS_COUNT=0
-FAIL_COUNT=0
+# Decrypt all matched files in one batch run: each distinct password key
+# is derived once, in parallel, instead of once per file
+FILE_COUNT=${#matched_files[@]}
 
-for file in "${matched_files[@]}"; do
-    FILE_COUNT=$((FILE_COUNT + 1))
-    filename=$(basename "$file")
-    
-    echo "[$FILE_COUNT/${#matched_files[@]}] Decrypting: $filename"
-    
-    # Decrypt file
-    if python "$CRYPTVAULT_PATH/src/file_encryption_sandbox.py" decrypt "$file" \
-        -p "$PASSWORD" 2>/dev/null; then
-        SUCCESS_COUNT=$((SUCCESS_COUNT + 1))
-        echo "    ✅ Success"
-    else
-        FAIL_COUNT=$((FAIL_COUNT + 1))
-        echo "    ❌ Failed"
-    fi
-done
+BATCH_OUTPUT=$(python "$CRYPTVAULT_PATH/src/file_encryption_sandbox.py" batch-decrypt \
+    "${matched_files[@]}" -p "$PASSWORD" 2>/dev/null)
+while IFS= read -r line; do
+    case "$line" in
+        "[OK] "*)   echo "    ✅ ${line#\[OK\] }" ;;
+        "[FAIL] "*) echo "    ❌ ${line#\[FAIL\] }" ;;
+    esac
+done <<< "$BATCH_OUTPUT"
+
+SUCCESS_COUNT=$(grep -c '^\[OK\] ' <<< "$BATCH_OUTPUT")
+FAIL_COUNT=$((FILE_COUNT - SUCCESS_COUNT))
 
 echo ""
 echo "=============================================="
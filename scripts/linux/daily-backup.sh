@@ -75,7 +75,7 @@ for file in "$BACKUP_DIR"/*; do
         
         # Encrypt file
         if python "$CRYPTVAULT_PATH/src/file_encryption_sandbox.py" encrypt "$file" \
-            -k "$KEY_NAME" -p "$PASSWORD" \
+            -k "$KEY_NAME" -p "$PASSWORD" --io-mode streaming \
             -o "$DEST/$filename.enc" 2>/dev/null; then
             SUCCESS_COUNT=$((SUCCESS_COUNT + 1))
             echo "    ✅ Success"
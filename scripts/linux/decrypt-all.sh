@@ -98,38 +98,31 @@ if [[ ! $REPLY =~ ^[Yy]$ ]]; then
 fi
 echo ""
 
-# Decrypt files
-FILE_COUNT=0
-SUCCESS_COUNT=0
-FAIL_COUNT=0
-
-for file in "${encrypted_files[@]}"; do
-    FILE_COUNT=$((FILE_COUNT + 1))
-    filename=$(basename "$file")
-    
-    echo "[$FILE_COUNT/${#encrypted_files[@]}] Decrypting: $filename"
-    
-    # Build decrypt command
-    DECRYPT_CMD=(
-        python "$CRYPTVAULT_PATH/src/file_encryption_sandbox.py"
-        decrypt "$file"
-        -p "$PASSWORD"
-    )
-    
-    # Add key-name if specified
-    if [ -n "$KEY_NAME" ]; then
-        DECRYPT_CMD+=(-n "$KEY_NAME")
-    fi
-    
-    # Decrypt file
-    if "${DECRYPT_CMD[@]}" 2>/dev/null; then
-        SUCCESS_COUNT=$((SUCCESS_COUNT + 1))
-        echo "    ✅ Success"
-    else
-        FAIL_COUNT=$((FAIL_COUNT + 1))
-        echo "    ❌ Failed"
-    fi
-done
+# Decrypt all files in one batch run: each distinct password key is
+# derived once, in parallel, instead of once per file
+FILE_COUNT=${#encrypted_files[@]}
+
+DECRYPT_CMD=(
+    python "$CRYPTVAULT_PATH/src/file_encryption_sandbox.py"
+    batch-decrypt "${encrypted_files[@]}"
+    -p "$PASSWORD"
+)
+
+# Add key-name if specified
+if [ -n "$KEY_NAME" ]; then
+    DECRYPT_CMD+=(-n "$KEY_NAME")
+fi
+
+BATCH_OUTPUT=$("${DECRYPT_CMD[@]}" 2>/dev/null)
+while IFS= read -r line; do
+    case "$line" in
+        "[OK] "*)   echo "    ✅ ${line#\[OK\] }" ;;
+        "[FAIL] "*) echo "    ❌ ${line#\[FAIL\] }" ;;
+    esac
+done <<< "$BATCH_OUTPUT"
+
+SUCCESS_COUNT=$(grep -c '^\[OK\] ' <<< "$BATCH_OUTPUT")
+FAIL_COUNT=$((FILE_COUNT - SUCCESS_COUNT))
 
 echo ""
 echo "=============================================="
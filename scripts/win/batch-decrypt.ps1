@@ -70,38 +70,23 @@ if ($Confirmation -ne 'y' -and $Confirmation -ne 'Y') {
 
 Write-Host ""
 
-# Decrypt files
-$FileCount = 0
-$SuccessCount = 0
-$FailCount = 0
+# Decrypt all matched files in one batch run: each distinct password key
+# is derived once, in parallel, instead of once per file
+$FileCount = $MatchedFiles.Count
+$PythonScript = Join-Path $CryptVaultPath "src\file_encryption_sandbox.py"
+$Arguments = @($PythonScript, "batch-decrypt") + @($MatchedFiles | ForEach-Object { $_.FullName }) + @("-p", $Password)
 
-foreach ($File in $MatchedFiles) {
-    $FileCount++
-    $FileName = $File.Name
-    
-    Write-Host "[$FileCount/$($MatchedFiles.Count)] Decrypting: $FileName"
-    
-    # Build command
-    $PythonScript = Join-Path $CryptVaultPath "src\file_encryption_sandbox.py"
-    $Arguments = @(
-        $PythonScript,
-        "decrypt",
-        $File.FullName,
-        "-p", $Password
-    )
-    
-    # Execute decryption
-    $Process = Start-Process -FilePath "python" -ArgumentList $Arguments `
-        -NoNewWindow -Wait -PassThru -RedirectStandardError "$env:TEMP\crypt_err.txt"
-    
-    if ($Process.ExitCode -eq 0) {
+$BatchOutput = & python @Arguments 2>$null
+$SuccessCount = 0
+foreach ($Line in $BatchOutput) {
+    if ($Line.StartsWith("[OK] ")) {
         $SuccessCount++
-        Write-Host "    ✅ Success" -ForegroundColor Green
-    } else {
-        $FailCount++
-        Write-Host "    ❌ Failed" -ForegroundColor Red
+        Write-Host "    ✅ $($Line.Substring(5))" -ForegroundColor Green
+    } elseif ($Line.StartsWith("[FAIL] ")) {
+        Write-Host "    ❌ $($Line.Substring(7))" -ForegroundColor Red
     }
 }
+$FailCount = $FileCount - $SuccessCount
 
 # Summary
 Write-Host ""
@@ -70,43 +70,28 @@ if ($Confirmation -ne 'y' -and $Confirmation -ne 'Y') {
 
 Write-Host ""
 
-# Decrypt files
-$FileCount = 0
-$SuccessCount = 0
-$FailCount = 0
+# Decrypt all files in one batch run: each distinct password key is
+# derived once, in parallel, instead of once per file
+$FileCount = $EncryptedFiles.Count
+$PythonScript = Join-Path $CryptVaultPath "src\file_encryption_sandbox.py"
+$Arguments = @($PythonScript, "batch-decrypt") + @($EncryptedFiles | ForEach-Object { $_.FullName }) + @("-p", $Password)
 
-foreach ($File in $EncryptedFiles) {
-    $FileCount++
-    $FileName = $File.Name
-    
-    Write-Host "[$FileCount/$($EncryptedFiles.Count)] Decrypting: $FileName"
-    
-    # Build command
-    $PythonScript = Join-Path $CryptVaultPath "src\file_encryption_sandbox.py"
-    $Arguments = @(
-        $PythonScript,
-        "decrypt",
-        $File.FullName,
-        "-p", $Password
-    )
-    
-    # Add key-name if specified
-    if ($KeyName) {
-        $Arguments += @("-n", $KeyName)
-    }
-    
-    # Execute decryption
-    $Process = Start-Process -FilePath "python" -ArgumentList $Arguments `
-        -NoNewWindow -Wait -PassThru -RedirectStandardError "$env:TEMP\crypt_err.txt"
-    
-    if ($Process.ExitCode -eq 0) {
+# Add key-name if specified
+if ($KeyName) {
+    $Arguments += @("-n", $KeyName)
+}
+
+$BatchOutput = & python @Arguments 2>$null
+$SuccessCount = 0
+foreach ($Line in $BatchOutput) {
+    if ($Line.StartsWith("[OK] ")) {
         $SuccessCount++
-        Write-Host "    ✅ Success" -ForegroundColor Green
-    } else {
-        $FailCount++
-        Write-Host "    ❌ Failed" -ForegroundColor Red
+        Write-Host "    ✅ $($Line.Substring(5))" -ForegroundColor Green
+    } elseif ($Line.StartsWith("[FAIL] ")) {
+        Write-Host "    ❌ $($Line.Substring(7))" -ForegroundColor Red
     }
 }
+$FailCount = $FileCount - $SuccessCount
 
 # Summary
 Write-Host ""
@@ -50,6 +50,9 @@ setup(
     keywords="encryption, cryptography, security, aes, fernet, file-encryption",
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "s3": ["boto3>=1.26.0"],
+    },
     entry_points={
         "console_scripts": [
             "cryptvault=cryptvault.file_encryption_sandbox:main",
@@ -0,0 +1,97 @@
+"""
+CryptVault Test Suite - Catalog Tests
+
+Tests for the SQLite sandbox catalog and the ls command.
+"""
+
+import sys
+import hashlib
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.file_encryption_sandbox import main
+
+
+class TestCatalogRecords:
+    """Test that encrypt/decrypt keep the catalog up to date."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance with temporary sandbox."""
+        sandbox = tmp_path / "sandbox"
+        return CryptVault(sandbox_dir=str(sandbox))
+
+    def test_encrypt_records_entry(self, vault, tmp_path):
+        """Test that encryption records sizes, key, cipher and hash."""
+        source = tmp_path / "report.txt"
+        source.write_bytes(b"Quarterly numbers")
+
+        encrypted_path, key_id = vault.encrypt_file(str(source), cipher="aes-256-gcm")
+        entries = vault.catalog.query()
+
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry['path'] == str(Path(encrypted_path).resolve())
+        assert entry['kind'] == 'encrypted'
+        assert entry['key_id'] == key_id
+        assert entry['cipher'] == 'aes-256-gcm'
+        assert entry['plaintext_size'] == len(b"Quarterly numbers")
+        assert entry['stored_size'] == Path(encrypted_path).stat().st_size
+        assert entry['plaintext_hash'] == hashlib.sha256(b"Quarterly numbers").hexdigest()
+
+    def test_decrypt_records_entry(self, vault, tmp_path):
+        """Test that decryption records the plaintext output."""
+        source = tmp_path / "notes.txt"
+        source.write_bytes(b"Meeting notes")
+        vault.save_key("notes-key", password="NotesPass123")
+
+        encrypted_path, _ = vault.encrypt_file(str(source), key_name="notes-key", password="NotesPass123")
+        vault.decrypt_file(encrypted_path, key_name="notes-key", password="NotesPass123")
+
+        decrypted = vault.catalog.query(kind='decrypted')
+        assert len(decrypted) == 1
+        assert decrypted[0]['key_id'] == "notes-key"
+        assert decrypted[0]['plaintext_hash'] == hashlib.sha256(b"Meeting notes").hexdigest()
+
+    def test_filters_and_summary(self, vault, tmp_path):
+        """Test filtering by key and the size summary."""
+        vault.save_key("team-a", password="TeamAPass")
+        for i in range(3):
+            source = tmp_path / f"a{i}.txt"
+            source.write_bytes(b"x" * (i + 1) * 100)
+            vault.encrypt_file(str(source), key_name="team-a", password="TeamAPass")
+        other = tmp_path / "b.txt"
+        other.write_bytes(b"other")
+        vault.encrypt_file(str(other))
+
+        team_a = vault.catalog.query(key_id="team-a", sort='size', descending=True)
+        assert [e['name'] for e in team_a] == ["a2.txt.encrypted", "a1.txt.encrypted", "a0.txt.encrypted"]
+
+        summary = vault.catalog.summary(key_id="team-a")
+        assert summary['count'] == 3
+        assert summary['total_size'] == sum(e['stored_size'] for e in team_a)
+
+    def test_invalid_sort(self, vault):
+        """Test that unknown sort fields are rejected."""
+        with pytest.raises(ValueError, match="Invalid sort field"):
+            vault.catalog.query(sort='color')
+
+
+class TestLsCommand:
+    """Test the ls CLI command."""
+
+    def test_ls_output(self, tmp_path, monkeypatch, capsys):
+        """Test that ls prints matching entries and totals."""
+        sandbox = tmp_path / "sandbox"
+        vault = CryptVault(sandbox_dir=str(sandbox))
+        source = tmp_path / "photo.jpg"
+        source.write_bytes(b"jpeg")
+        vault.encrypt_file(str(source), password="PhotoPass")
+
+        monkeypatch.setattr(sys, 'argv', ['cryptvault', '--sandbox-dir', str(sandbox),
+                                          'ls', '--name', '*.jpg.encrypted'])
+        main()
+
+        out = capsys.readouterr().out
+        assert "photo.jpg.encrypted" in out
+        assert "Total: 1 files" in out
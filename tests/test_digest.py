@@ -0,0 +1,153 @@
+"""
+CryptVault Test Suite - Plaintext Digest Tests
+
+Tests for the plaintext digest computed during encryption, stored in the
+container and checked on decryption.
+"""
+
+import io
+import os
+import base64
+import hashlib
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.container import (
+    DigestError, build_header, decrypt_stream, encrypt_stream, merkle_header, read_header,
+)
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Create a two-segment plaintext file."""
+    path = tmp_path / "data.bin"
+    path.write_bytes(os.urandom(MIB + 500))
+    return path
+
+
+def _header(path: str) -> dict:
+    with open(path, 'rb') as f:
+        return read_header(f)[0]
+
+
+class TestDigestOnEncrypt:
+    """Test the digest recorded while encrypting."""
+
+    def test_default_sha256(self, vault, source):
+        """Test that the stored and catalogued digest is the SHA-256 of the source."""
+        path, _ = vault.encrypt_file(str(source), password="DigestPass")
+
+        assert _header(path)['digest'] == 'sha256'
+        entry = vault.catalog.get(Path(path))
+        assert entry['plaintext_hash'] == hashlib.sha256(source.read_bytes()).hexdigest()
+
+    def test_blake2b_round_trip(self, vault, source):
+        """Test that a BLAKE2b file records a labelled hash and decrypts."""
+        path, _ = vault.encrypt_file(str(source), password="DigestPass", digest="blake2b")
+
+        assert _header(path)['digest'] == 'blake2b'
+        expected = hashlib.blake2b(source.read_bytes()).hexdigest()
+        assert vault.catalog.get(Path(path))['plaintext_hash'] == f"blake2b:{expected}"
+        decrypted = vault.decrypt_file(path, password="DigestPass")
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+        assert vault.catalog.get(Path(decrypted))['plaintext_hash'] == f"blake2b:{expected}"
+
+    def test_sparse_digest_matches_dense(self, vault, tmp_path):
+        """Test that holes are hashed as zeros, like the dense file."""
+        source = tmp_path / "disk.img"
+        with open(source, 'wb') as f:
+            f.seek(3 * MIB)
+            f.write(b"tail data")
+        path, _ = vault.encrypt_file(str(source), password="DigestPass", digest="blake2b")
+
+        expected = hashlib.blake2b(source.read_bytes()).hexdigest()
+        assert vault.catalog.get(Path(path))['plaintext_hash'] == f"blake2b:{expected}"
+        decrypted = vault.decrypt_file(path, password="DigestPass")
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_unknown_digest_refused(self, vault, source):
+        """Test that unsupported algorithms are rejected up front."""
+        with pytest.raises(ValueError, match="Unsupported digest"):
+            vault.encrypt_file(str(source), password="DigestPass", digest="md5")
+
+
+class TestDigestOnDecrypt:
+    """Test the digest check at the end of decryption."""
+
+    def _encrypt(self, data: bytes, digest_of: bytes):
+        key = base64.urlsafe_b64encode(bytes(32))
+        header = build_header('aes-256-gcm', digest='sha256', **merkle_header(len(data)))
+        out = io.BytesIO()
+        encrypt_stream(io.BytesIO(data), out, key, 'aes-256-gcm', header=header,
+                       hasher=_Fixed(hashlib.sha256(digest_of)))
+        return key, out.getvalue()
+
+    def test_mismatch_raises(self):
+        """Test that a sealed digest that disagrees with the data is reported."""
+        key, container = self._encrypt(b"actual data", b"other data")
+
+        with pytest.raises(DigestError, match="sha256 digest"):
+            decrypt_stream(io.BytesIO(container), io.BytesIO(), key)
+
+    def test_other_hasher_checked_alongside(self):
+        """Test that a caller hashing with another algorithm still gets the check."""
+        key, container = self._encrypt(b"actual data", b"actual data")
+        hasher = hashlib.blake2b()
+
+        decrypt_stream(io.BytesIO(container), io.BytesIO(), key, hasher=hasher)
+
+        assert hasher.digest() == hashlib.blake2b(b"actual data").digest()
+
+    def test_mismatch_fails_decrypt_file(self, vault, source, monkeypatch):
+        """Test that decrypt_file reports a digest mismatch as a failure."""
+        path, _ = vault.encrypt_file(str(source), password="DigestPass")
+
+        def mismatch(*args, **kwargs):
+            raise DigestError("Decrypted data does not match its sha256 digest")
+        monkeypatch.setattr('cryptvault.file_encryption_sandbox.decrypt_stream', mismatch)
+
+        with pytest.raises(ValueError, match="Decryption failed: Decrypted data does not match"):
+            vault.decrypt_file(path, password="DigestPass")
+
+
+class _Fixed:
+    """Hasher stand-in reporting a preset digest."""
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.name = hasher.name
+
+    def update(self, data: bytes) -> None:
+        pass
+
+    def digest(self) -> bytes:
+        return self.hasher.digest()
+
+
+class TestDigestCLI:
+    """Test the --digest option."""
+
+    def test_encrypt_with_blake2b(self, source, tmp_path):
+        """Test that the option reaches the stored header."""
+        root = Path(__file__).resolve().parent.parent
+        output = tmp_path / "out.encrypted"
+
+        result = subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(tmp_path / "sandbox"), "encrypt", str(source),
+             "-o", str(output), "-p", "DigestPass", "--digest", "blake2b"],
+            capture_output=True, text=True, cwd=root,
+        )
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert _header(str(output))['digest'] == 'blake2b'
@@ -0,0 +1,124 @@
+"""
+CryptVault Test Suite - Durability Tests
+
+Tests for atomic outputs and the fsync durability policies.
+"""
+
+import os
+import sys
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault import storage as storage_module
+from cryptvault.file_encryption_sandbox import main
+from cryptvault.container import SegmentCipher
+
+
+@pytest.fixture
+def fsync_calls(monkeypatch):
+    """Count fsync calls made by the storage layer."""
+    calls = []
+    real_fsync = os.fsync
+
+    def counting(fd):
+        calls.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(storage_module.os, 'fsync', counting)
+    return calls
+
+
+def _sources(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_bytes(f"document {i}".encode())
+        paths.append(path)
+    return paths
+
+
+class TestAtomicOutputs:
+    """Test write-to-temp-and-rename outputs."""
+
+    def test_failed_encrypt_keeps_previous_output(self, tmp_path, monkeypatch):
+        """Test that a failed run never leaves a truncated file behind."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        source = tmp_path / "doc.txt"
+        source.write_bytes(b"first version")
+        encrypted, _ = vault.encrypt_file(str(source), password="AtomicPass")
+        previous = Path(encrypted).read_bytes()
+
+        def crash(self, index, data, final):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(SegmentCipher, 'encrypt_segment', crash)
+        with pytest.raises(OSError):
+            vault.encrypt_file(str(source), password="AtomicPass")
+
+        assert Path(encrypted).read_bytes() == previous
+        assert not list(vault.sandbox_dir.glob("*.cvtmp"))
+
+
+class TestDurabilityPolicies:
+    """Test none/file/batch fsync policies."""
+
+    def test_none_never_fsyncs(self, tmp_path, fsync_calls):
+        """Test that the default policy leaves flushing to the OS."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        for source in _sources(tmp_path, 3):
+            vault.encrypt_file(str(source))
+        vault.sync()
+
+        assert fsync_calls == []
+
+    def test_file_policy_fsyncs_each_output(self, tmp_path, fsync_calls):
+        """Test that per-file durability syncs file and directory every time."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"), durability="file")
+        for source in _sources(tmp_path, 3):
+            vault.encrypt_file(str(source))
+
+        # Output and key store, each with its directory, per file
+        assert len(fsync_calls) == 12
+
+    def test_batch_policy_group_commit(self, tmp_path, fsync_calls):
+        """Test that batch durability defers all fsyncs to sync()."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"), durability="batch")
+        for source in _sources(tmp_path, 3):
+            vault.encrypt_file(str(source))
+        assert fsync_calls == []
+
+        vault.sync()
+        # Three outputs and the key store, plus their single shared directory
+        assert len(fsync_calls) == 5
+
+        vault.sync()
+        assert len(fsync_calls) == 5
+
+    def test_invalid_policy(self, tmp_path):
+        """Test that unknown policies are rejected."""
+        with pytest.raises(ValueError, match="Invalid durability policy"):
+            CryptVault(sandbox_dir=str(tmp_path / "sandbox"), durability="sometimes")
+
+
+class TestDurabilityCLI:
+    """Test that --durability reaches the encrypted outputs."""
+
+    @pytest.mark.parametrize("policy", ["file", "batch"])
+    def test_encrypt_syncs_output(self, tmp_path, monkeypatch, policy):
+        """Test that the ciphertext itself is fsynced, not only .keys.json."""
+        synced = set()
+        real_fsync = os.fsync
+
+        def recording(fd):
+            synced.add(os.fstat(fd).st_ino)
+            real_fsync(fd)
+        monkeypatch.setattr(storage_module.os, 'fsync', recording)
+        source = _sources(tmp_path, 1)[0]
+        output = tmp_path / "doc0.txt.encrypted"
+
+        monkeypatch.setattr(sys, 'argv', ['cryptvault', '--sandbox-dir', str(tmp_path / "sandbox"),
+                                          '--durability', policy, 'encrypt', str(source),
+                                          '-o', str(output), '-p', 'DurablePass'])
+        main()
+
+        assert output.stat().st_ino in synced
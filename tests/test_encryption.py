@@ -241,3 +241,95 @@ class TestFileNaming:
         decrypted_path = vault.decrypt_file(encrypted_path, password="test")
 
         assert decrypted_path.endswith(".decrypted")
+
+
+class TestCipherSuites:
+    """Test AEAD cipher suites and legacy Fernet compatibility."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance with temporary sandbox."""
+        sandbox = tmp_path / "sandbox"
+        return CryptVault(sandbox_dir=str(sandbox))
+
+    @pytest.mark.parametrize("cipher", ["aes-256-gcm", "chacha20-poly1305", "fernet"])
+    def test_roundtrip_each_cipher(self, vault, tmp_path, cipher):
+        """Test that every cipher suite round-trips data."""
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        source = tmp_path / "data.bin"
+        source.write_bytes(data)
+
+        encrypted_path, key_id = vault.encrypt_file(str(source), cipher=cipher)
+        direct_key = vault.list_keys()[key_id]['key']
+        decrypted_path = vault.decrypt_file(encrypted_path, key=direct_key)
+
+        assert Path(decrypted_path).read_bytes() == data
+
+    def test_cipher_recorded_in_header(self, vault, tmp_path):
+        """Test that the cipher suite is recorded in the file header."""
+        from cryptvault.container import read_header
+
+        source = tmp_path / "test.txt"
+        source.write_text("Header content")
+        encrypted_path, _ = vault.encrypt_file(str(source), cipher="chacha20-poly1305")
+
+        with open(encrypted_path, 'rb') as f:
+            header, _ = read_header(f)
+
+        assert header['cipher'] == "chacha20-poly1305"
+
+    def test_auto_selects_aead(self, vault):
+        """Test that auto-selection picks an AEAD cipher."""
+        assert vault.cipher in ("aes-256-gcm", "chacha20-poly1305")
+
+    def test_empty_file(self, vault, tmp_path):
+        """Test encryption of an empty file."""
+        source = tmp_path / "empty.txt"
+        source.write_bytes(b"")
+
+        encrypted_path, _ = vault.encrypt_file(str(source), password="EmptyPass")
+        decrypted_path = vault.decrypt_file(encrypted_path, password="EmptyPass")
+
+        assert Path(decrypted_path).read_bytes() == b""
+
+    def test_legacy_fernet_file(self, vault, tmp_path):
+        """Test that files produced by the Fernet-only format still decrypt."""
+        key = Fernet.generate_key()
+        legacy = tmp_path / "legacy.txt.encrypted"
+        legacy.write_bytes(Fernet(key).encrypt(b"Legacy content"))
+
+        import base64
+        decrypted_path = vault.decrypt_file(str(legacy), key=base64.b64encode(key).decode())
+
+        assert Path(decrypted_path).read_bytes() == b"Legacy content"
+
+    def test_tampered_segment_rejected(self, vault, tmp_path):
+        """Test that modified ciphertext fails authentication."""
+        source = tmp_path / "test.txt"
+        source.write_text("Tamper content")
+        encrypted_path, _ = vault.encrypt_file(str(source), password="TamperPass")
+
+        raw = bytearray(Path(encrypted_path).read_bytes())
+        raw[-1] ^= 0x01
+        Path(encrypted_path).write_bytes(bytes(raw))
+
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(encrypted_path, password="TamperPass")
+        assert not (vault.sandbox_dir / "test.txt.decrypted").exists()
+
+    def test_truncated_container_rejected(self, vault, tmp_path):
+        """Test that dropping trailing segments is detected."""
+        source = tmp_path / "data.bin"
+        source.write_bytes(os.urandom(2 * 1024 * 1024 + 5))
+        encrypted_path, _ = vault.encrypt_file(str(source), password="TruncPass")
+
+        raw = Path(encrypted_path).read_bytes()
+        Path(encrypted_path).write_bytes(raw[:-(5 + 16)])
+
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(encrypted_path, password="TruncPass")
+
+    def test_invalid_cipher(self, tmp_path):
+        """Test that unknown cipher names are rejected."""
+        with pytest.raises(ValueError, match="Unsupported cipher"):
+            CryptVault(sandbox_dir=str(tmp_path / "sandbox"), cipher="rot13")
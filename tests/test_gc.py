@@ -0,0 +1,154 @@
+"""
+CryptVault Test Suite - Garbage Collection Tests
+
+Tests for sandbox retention policies and key-store compaction.
+"""
+
+import os
+import time
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+
+
+class TestGarbageCollection:
+    """Test gc retention policies and key-store pruning."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance with temporary sandbox."""
+        sandbox = tmp_path / "sandbox"
+        return CryptVault(sandbox_dir=str(sandbox))
+
+    def _encrypt(self, vault, tmp_path, name, size=100, **kwargs):
+        source = tmp_path / name
+        source.write_bytes(b"x" * size)
+        return vault.encrypt_file(str(source), **kwargs)
+
+    def test_keep_newest(self, vault, tmp_path):
+        """Test that only the newest N outputs are kept."""
+        paths = []
+        for i in range(4):
+            paths.append(self._encrypt(vault, tmp_path, f"f{i}.txt")[0])
+            time.sleep(0.01)
+
+        report = vault.gc(keep=2)
+
+        assert sorted(report['removed']) == sorted(str(Path(p).resolve()) for p in paths[:2])
+        assert not Path(paths[0]).exists()
+        assert Path(paths[3]).exists()
+        assert vault.catalog.summary()['count'] == 2
+
+    def test_size_budget(self, vault, tmp_path):
+        """Test that the size budget drops the oldest outputs."""
+        first, _ = self._encrypt(vault, tmp_path, "old.txt", size=4000)
+        time.sleep(0.01)
+        second, _ = self._encrypt(vault, tmp_path, "new.txt", size=4000)
+
+        vault.gc(max_total_size=Path(second).stat().st_size + 10)
+
+        assert not Path(first).exists()
+        assert Path(second).exists()
+
+    def test_max_age_uses_mtime_for_uncatalogued(self, vault, tmp_path):
+        """Test that outputs missing from the catalog age by mtime."""
+        legacy = vault.sandbox_dir / "legacy.txt.encrypted"
+        legacy.write_bytes(b"old token")
+        old = time.time() - 40 * 86400
+        os.utime(legacy, (old, old))
+
+        report = vault.gc(max_age_days=30)
+
+        assert report['removed'] == [str(legacy.resolve())]
+        assert not legacy.exists()
+
+    def test_prunes_refs_but_keeps_keys(self, vault, tmp_path):
+        """Test that stale references are pruned while every key is kept."""
+        vault.save_key("shared", password="SharedPass")
+        kept, _ = self._encrypt(vault, tmp_path, "a.txt", key_name="shared", password="SharedPass")
+        time.sleep(0.01)
+        self._encrypt(vault, tmp_path, "b.txt", key_name="shared", password="SharedPass")
+        Path(kept).unlink()
+        moved, auto_key = self._encrypt(vault, tmp_path, "c.txt")
+        offsite = tmp_path / "offsite.encrypted"
+        os.replace(moved, offsite)
+
+        report = vault.gc()
+
+        keys = CryptVault(sandbox_dir=str(vault.sandbox_dir)).list_keys()
+        assert keys["shared"]["files"] == ["b.txt.encrypted"]
+        assert auto_key in keys
+        assert report['dropped_keys'] == []
+        assert report['pruned_refs'] == 2
+        decrypted = vault.decrypt_file(str(offsite), str(tmp_path / "back.txt"), key_name=auto_key)
+        assert Path(decrypted).read_bytes() == b"x" * 100
+
+    def test_drop_unused_keys_opt_in(self, vault, tmp_path):
+        """Test that auto keys without files are deleted only when asked."""
+        vault.save_key("named", password="NamedPass")
+        self._encrypt(vault, tmp_path, "n.txt", key_name="named", password="NamedPass")
+        (vault.sandbox_dir / "n.txt.encrypted").unlink()
+        _, auto_key = self._encrypt(vault, tmp_path, "c.txt")
+        (vault.sandbox_dir / "c.txt.encrypted").unlink()
+
+        preview = vault.gc(drop_unused_keys=True, dry_run=True)
+        assert preview['dropped_keys'] == [auto_key]
+        assert auto_key in vault.list_keys()
+
+        report = vault.gc(drop_unused_keys=True)
+
+        keys = vault.list_keys()
+        assert report['dropped_keys'] == [auto_key]
+        assert auto_key not in keys
+        assert "named" in keys
+
+    def test_same_name_under_other_key_kept(self, vault, tmp_path):
+        """Test that removing one output leaves a same-named file of another key alone."""
+        vault.save_key("other", password="OtherPass")
+        vault.keystore.add_file("other", "dup.txt.encrypted")
+        path, _ = self._encrypt(vault, tmp_path, "dup.txt", password="Own")
+
+        vault.gc(keep=0)
+
+        assert not Path(path).exists()
+        assert vault.list_keys()["other"]["files"] == ["dup.txt.encrypted"]
+
+    def test_cli_drop_unused_keys_asks_first(self, vault, tmp_path, monkeypatch, capsys):
+        """Test that the CLI deletes keys only after confirmation."""
+        import sys
+        from cryptvault.file_encryption_sandbox import main
+        _, auto_key = self._encrypt(vault, tmp_path, "c.txt")
+        (vault.sandbox_dir / "c.txt.encrypted").unlink()
+        argv = ["cryptvault", "--sandbox-dir", str(vault.sandbox_dir), "gc", "--drop-unused-keys"]
+        monkeypatch.setattr(sys, "argv", argv)
+
+        monkeypatch.setattr("builtins.input", lambda prompt: "n")
+        with pytest.raises(SystemExit):
+            main()
+        assert "Aborted" in capsys.readouterr().out
+        assert auto_key in CryptVault(sandbox_dir=str(vault.sandbox_dir)).list_keys()
+
+        monkeypatch.setattr("builtins.input", lambda prompt: "y")
+        main()
+        assert auto_key not in CryptVault(sandbox_dir=str(vault.sandbox_dir)).list_keys()
+
+    def test_unknown_refs_kept_by_default(self, vault):
+        """Test that references unknown to the catalog survive unless requested."""
+        vault.save_key("legacy", password="LegacyPass")
+        vault.keystore.add_file("legacy", "elsewhere.encrypted")
+
+        vault.gc()
+        assert vault.list_keys()["legacy"]["files"] == ["elsewhere.encrypted"]
+
+        vault.gc(prune_unknown=True)
+        assert vault.list_keys()["legacy"]["files"] == []
+
+    def test_dry_run(self, vault, tmp_path):
+        """Test that dry runs do not delete anything."""
+        path, _ = self._encrypt(vault, tmp_path, "keep.txt")
+
+        report = vault.gc(keep=0, dry_run=True)
+
+        assert report['removed'] == [str(Path(path).resolve())]
+        assert Path(path).exists()
+        assert vault.catalog.summary()['count'] == 1
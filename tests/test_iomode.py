@@ -0,0 +1,137 @@
+"""
+CryptVault Test Suite - I/O Mode Tests
+
+Tests for the page-cache friendly streaming I/O mode.
+"""
+
+import io
+import os
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault import iomode, journal
+from cryptvault.iomode import StreamingWriter, StreamingReader
+
+KIB = 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def small_windows(monkeypatch):
+    """Shrink buffers and drop windows so small files exercise them."""
+    monkeypatch.setattr(iomode, 'STREAMING_BUFFER_SIZE', 64 * KIB)
+    monkeypatch.setattr(iomode, 'DROP_WINDOW', 256 * KIB)
+
+
+@pytest.fixture
+def advice(monkeypatch):
+    """Record posix_fadvise calls."""
+    calls = []
+    if not hasattr(os, 'posix_fadvise'):
+        pytest.skip("posix_fadvise not available")
+    monkeypatch.setattr(os, 'posix_fadvise', lambda fd, offset, length, adv: calls.append(adv))
+    return calls
+
+
+class _Recorder(io.BytesIO):
+    """BytesIO that records the offset and size of every write."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append((self.tell(), len(data)))
+        return super().write(data)
+
+
+class TestStreamingWrappers:
+    """Test buffering and alignment."""
+
+    def test_writer_issues_aligned_chunks(self, small_windows):
+        """Test that odd-sized writes reach the file as aligned chunks."""
+        target = _Recorder()
+        writer = StreamingWriter(target)
+        data = os.urandom(300 * KIB + 5)
+        for i in range(0, len(data), 1000 + 17):
+            writer.write(data[i:i + 1000 + 17])
+        writer.finish()
+
+        assert target.getvalue() == data
+        assert all(offset % (64 * KIB) == 0 for offset, _ in target.writes)
+
+    def test_reader_seek_and_tell(self, small_windows):
+        """Test that seeks discard the read-ahead buffer."""
+        data = os.urandom(200 * KIB)
+        reader = StreamingReader(io.BytesIO(data))
+
+        assert reader.read(10) == data[:10]
+        reader.seek(100 * KIB)
+        assert reader.tell() == 100 * KIB
+        assert reader.read(70 * KIB) == data[100 * KIB:170 * KIB]
+        assert reader.read() == data[170 * KIB:]
+
+
+class TestStreamingMode:
+    """Test encrypt/decrypt in streaming mode."""
+
+    def test_round_trip_drops_pages(self, vault, tmp_path, small_windows, advice):
+        """Test that streaming mode advises the kernel and stays correct."""
+        source = tmp_path / "backup.tar"
+        source.write_bytes(os.urandom(3 * 1024 * KIB + 7))
+
+        encrypted, _ = vault.encrypt_file(str(source), password="IoPass", io_mode="streaming")
+        decrypted = vault.decrypt_file(encrypted, password="IoPass", io_mode="streaming")
+
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+        assert os.POSIX_FADV_SEQUENTIAL in advice
+        assert advice.count(os.POSIX_FADV_DONTNEED) > 4
+
+    def test_cached_mode_gives_no_advice(self, vault, tmp_path, advice):
+        """Test that the default mode leaves the page cache alone."""
+        source = tmp_path / "doc.txt"
+        source.write_bytes(b"hot data")
+        encrypted, _ = vault.encrypt_file(str(source), password="IoPass")
+        vault.decrypt_file(encrypted, password="IoPass")
+        assert advice == []
+
+    def test_resumable_streaming(self, vault, tmp_path, small_windows, monkeypatch):
+        """Test that checkpoints flush the streaming buffer first."""
+        monkeypatch.setattr(journal, 'CHECKPOINT_BYTES', 1)
+        source = tmp_path / "big.bin"
+        source.write_bytes(os.urandom(3 * 1024 * KIB + 11))
+
+        encrypted, _ = vault.encrypt_file(str(source), password="IoPass", resumable=True,
+                                          io_mode="streaming")
+        decrypted = vault.decrypt_file(encrypted, password="IoPass", resumable=True,
+                                       io_mode="streaming")
+
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_invalid_mode(self, vault, tmp_path):
+        """Test that unknown modes are rejected before any work."""
+        source = tmp_path / "doc.txt"
+        source.write_bytes(b"data")
+        with pytest.raises(ValueError, match="Invalid I/O mode"):
+            vault.encrypt_file(str(source), password="IoPass", io_mode="direct")
+
+    def test_batch_streaming(self, vault, tmp_path, small_windows):
+        """Test that the mode applies to every file of a batch."""
+        src = tmp_path / "src"
+        src.mkdir()
+        for i in range(3):
+            (src / f"f{i}.bin").write_bytes(os.urandom(100 * KIB * (i + 1)))
+
+        results = vault.encrypt_batch([str(src)], str(tmp_path / "enc"), password="IoPass",
+                                      io_mode="streaming")
+        assert all(r.ok for r in results)
+        results = vault.decrypt_batch([str(tmp_path / "enc")], str(tmp_path / "dec"),
+                                      password="IoPass", io_mode="streaming")
+        assert all(r.ok for r in results)
+        for i in range(3):
+            assert (tmp_path / "dec" / f"f{i}.bin").read_bytes() == (src / f"f{i}.bin").read_bytes()
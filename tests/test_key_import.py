@@ -0,0 +1,182 @@
+"""
+CryptVault Test Suite - Key Import/Export Tests
+
+Tests for provisioning saved keys in bulk from NDJSON and exporting them
+in the same format.
+"""
+
+import io
+import sys
+import json
+import base64
+import subprocess
+import pytest
+from pathlib import Path
+from cryptography.fernet import Fernet
+from cryptvault import CryptVault
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+def _lines(*entries) -> list:
+    return [json.dumps(entry) + "\n" for entry in entries]
+
+
+def _direct_key() -> str:
+    return base64.b64encode(Fernet.generate_key()).decode()
+
+
+class TestImportKeys:
+    """Test bulk validation and the single write of an import."""
+
+    def test_password_entries_skip_pbkdf2(self, vault, monkeypatch):
+        """Test that new password keys get a salt without deriving a key."""
+        def forbidden(*args, **kwargs):
+            raise AssertionError("PBKDF2 run during import")
+        monkeypatch.setattr(vault, '_derive_key_from_password', forbidden)
+
+        count = vault.import_keys(_lines(*({"name": f"user-{i}", "password": "Secret"} for i in range(50))))
+
+        assert count == 50
+        record = vault.list_keys()["user-7"]
+        assert record['type'] == 'password'
+        assert len(base64.b64decode(record['salt'])) == vault.SALT_LENGTH
+
+    def test_imported_password_key_decrypts(self, vault, tmp_path):
+        """Test that a key provisioned by import works like one from save-key."""
+        vault.import_keys(_lines({"name": "team", "password": "TeamPass"}))
+        source = tmp_path / "plain.txt"
+        source.write_text("provisioned")
+
+        encrypted, _ = vault.encrypt_file(str(source), password="TeamPass", key_name="team")
+        decrypted = vault.decrypt_file(encrypted, str(tmp_path / "out.txt"), password="TeamPass")
+
+        assert Path(decrypted).read_text() == "provisioned"
+
+    def test_single_write(self, vault, monkeypatch):
+        """Test that the key store is rewritten once for the whole import."""
+        vault.save_key("existing", password="Existing")
+        writes = []
+        original = vault.keystore._write
+        monkeypatch.setattr(vault.keystore, '_write', lambda records: (writes.append(1), original(records)))
+
+        vault.import_keys(_lines(*({"name": f"k{i}", "password": "p"} for i in range(100))))
+
+        assert len(writes) == 1
+        assert len(vault.list_keys()) == 101
+
+    def test_invalid_lines_reject_everything(self, vault):
+        """Test that all problems are reported and nothing is stored."""
+        lines = _lines({"name": "good", "password": "p"},
+                       {"name": "bad-key", "key": "not base64!"},
+                       {"password": "nameless"},
+                       {"name": "good", "password": "again"},
+                       {"name": "odd", "type": "token", "key": "AAAA"})
+        lines.insert(2, "{not json\n")
+
+        with pytest.raises(ValueError) as info:
+            vault.import_keys(lines)
+
+        message = str(info.value)
+        assert message.startswith("5 invalid entries, nothing imported")
+        for expected in ("line 2:", "line 3: not valid JSON", "line 4:",
+                         "line 5: duplicate key 'good'", "line 6: unknown key type"):
+            assert expected in message
+        assert vault.list_keys() == {}
+
+    @pytest.mark.parametrize("entry, problem", [
+        ({"name": "s", "type": "password", "salt": "!!!!"}, "invalid 'salt'"),
+        ({"name": "s", "type": "password", "salt": ""}, "invalid 'salt'"),
+        ({"name": "s", "type": "password", "salt": base64.b64encode(bytes(8)).decode()}, "invalid 'salt'"),
+        ({"name": "s", "type": "password"}, "missing or invalid 'salt'"),
+        ({"name": "k", "key": "!!!!"}, "Invalid key format"),
+        ({"name": "k", "key": base64.b64encode(bytes(32)).decode()}, "Invalid key format"),
+        ({"name": "k", "type": "key", "key": base64.b64encode(b"short").decode()}, "Invalid key format"),
+    ])
+    def test_malformed_secrets_rejected(self, vault, entry, problem):
+        """Test that salts and direct keys are checked strictly, not just decoded."""
+        with pytest.raises(ValueError, match=problem):
+            vault.import_keys(_lines(entry))
+        assert vault.list_keys() == {}
+
+    def test_existing_names_need_replace(self, vault):
+        """Test that existing keys are kept unless --replace is given."""
+        vault.save_key("shared", password="Old")
+        old_salt = vault.list_keys()["shared"]['salt']
+        lines = _lines({"name": "shared", "password": "New"})
+
+        with pytest.raises(ValueError, match="already exists"):
+            vault.import_keys(lines)
+        assert vault.list_keys()["shared"]['salt'] == old_salt
+
+        vault.import_keys(lines, replace=True)
+        assert vault.list_keys()["shared"]['salt'] != old_salt
+
+
+class TestExportKeys:
+    """Test writing keys back out."""
+
+    def test_round_trip(self, vault, tmp_path):
+        """Test that an export imports into another sandbox unchanged."""
+        vault.save_key("pw", password="Password")
+        vault.save_key("direct", key=_direct_key())
+        out = io.StringIO()
+
+        assert vault.export_keys(out) == 2
+
+        other = CryptVault(sandbox_dir=str(tmp_path / "other"))
+        other.import_keys(io.StringIO(out.getvalue()))
+        assert {name: r.to_json() for name, r in other.list_keys().items()} == \
+            {name: r.to_json() for name, r in vault.list_keys().items()}
+
+    def test_filters(self, vault):
+        """Test that the name and type filters select the exported keys."""
+        vault.save_key("project-a", password="a")
+        vault.save_key("project-b", key=_direct_key())
+        vault.save_key("other", password="c")
+        out = io.StringIO()
+
+        vault.export_keys(out, name="project-*", key_type="password")
+
+        assert [json.loads(line)['name'] for line in out.getvalue().splitlines()] == ["project-a"]
+
+    def test_legacy_layout_keeps_files(self, vault, tmp_path):
+        """Test that a legacy export is a .keys.json with its files lists."""
+        source = tmp_path / "doc.txt"
+        source.write_text("legacy reader")
+        encrypted, key_id = vault.encrypt_file(str(source), password="OldPass")
+        other = tmp_path / "other"
+        other.mkdir()
+
+        with open(other / ".keys.json", 'w') as f:
+            assert vault.export_keys(f, legacy=True) == 1
+
+        assert json.loads((other / ".keys.json").read_text())[key_id]['files'] == [Path(encrypted).name]
+        migrated = CryptVault(sandbox_dir=str(other))
+        assert migrated.list_keys()[key_id]['files'] == [Path(encrypted).name]
+
+
+class TestKeyImportCLI:
+    """Test the import-keys and export-keys commands."""
+
+    def test_pipe_between_sandboxes(self, vault, tmp_path):
+        """Test exporting to stdout and importing from stdin."""
+        root = Path(__file__).resolve().parent.parent
+        vault.save_key("cli-key", password="CliPass")
+        base = [sys.executable, "-m", "cryptvault.file_encryption_sandbox"]
+
+        exported = subprocess.run(base + ["--sandbox-dir", str(tmp_path / "sandbox"), "export-keys"],
+                                  capture_output=True, text=True, cwd=root)
+        assert exported.returncode == 0, exported.stderr
+        assert "[OK] Exported 1 keys" in exported.stderr
+
+        imported = subprocess.run(base + ["--sandbox-dir", str(tmp_path / "other"), "import-keys", "-"],
+                                  input=exported.stdout, capture_output=True, text=True, cwd=root)
+        assert imported.returncode == 0, imported.stdout + imported.stderr
+        assert "[OK] Imported 1 keys" in imported.stdout
+        other = CryptVault(sandbox_dir=str(tmp_path / "other"))
+        assert other.list_keys()["cli-key"]['salt'] == vault.list_keys()["cli-key"]['salt']
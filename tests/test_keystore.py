@@ -0,0 +1,235 @@
+"""
+CryptVault Test Suite - Key Store Tests
+
+Tests for the compact key store: slotted records, the file-reference index
+and migration of stores written by earlier versions.
+"""
+
+import io
+import sys
+import json
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.keystore import KeyStore, KeyRecord
+
+
+class TestKeyStore:
+    """Test record model and lazy file references."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create an empty key store."""
+        return KeyStore(tmp_path)
+
+    def test_records_are_slotted_mappings(self, store):
+        """Test that records behave like the old dictionaries without a __dict__."""
+        record = store.put("named", {'type': 'password', 'salt': "c2FsdA==", 'created': "2024-01-01T00:00:00"})
+
+        assert isinstance(record, KeyRecord)
+        assert not hasattr(record, '__dict__')
+        assert record['type'] == "password"
+        assert record['salt'] == "c2FsdA=="
+        assert record.get('key') is None
+        assert 'created' in record
+        assert record['files'] == []
+
+    def test_listing_does_not_load_references(self, store, tmp_path, monkeypatch):
+        """Test that loading keys never reads their file lists."""
+        store.put("named", {'type': 'key', 'key': "a2V5"}, files=["a.encrypted"])
+        store.close()
+
+        reloaded = KeyStore(tmp_path)
+        with monkeypatch.context() as patch:
+            patch.setattr(reloaded, 'files', lambda name: pytest.fail("files loaded"))
+            assert list(reloaded.records()) == ["named"]
+            assert reloaded.records()["named"]['type'] == "key"
+
+        assert reloaded.records()["named"]['files'] == ["a.encrypted"]
+        assert reloaded.records()["named"].file_count() == 1
+
+    def test_references_are_a_set(self, store):
+        """Test that recording the same file twice keeps one reference."""
+        store.put("named", {'type': 'key', 'key': "a2V5"})
+        store.add_file("named", "a.encrypted")
+        store.add_file("named", "a.encrypted")
+        store.add_file("named", "b.encrypted")
+
+        assert store.files("named") == ["a.encrypted", "b.encrypted"]
+
+    def test_owners_newest_first(self, store):
+        """Test reverse lookup from a filename to its keys."""
+        store.put("old", {'type': 'key', 'key': "a2V5"}, files=["a.encrypted"])
+        store.put("new", {'type': 'key', 'key': "a2V5"}, files=["a.encrypted"])
+
+        assert store.owners("a.encrypted") == ["new", "old"]
+        assert store.owners("missing.encrypted") == []
+
+    def test_replacing_key_forgets_references(self, store):
+        """Test that overwriting a key starts with no files, as before."""
+        store.put("named", {'type': 'key', 'key': "a2V5"}, files=["a.encrypted"])
+        store.put("named", {'type': 'key', 'key': "b3RoZXI="})
+
+        assert store.files("named") == []
+
+    def test_json_holds_metadata_only(self, store):
+        """Test that file references are not written to .keys.json."""
+        store.put("named", {'type': 'key', 'key': "a2V5", 'created': "2024-01-01"}, files=["a.encrypted"])
+
+        data = json.loads(store.path.read_text())
+        assert data == {"named": {'type': 'key', 'key': "a2V5", 'created': "2024-01-01"}}
+
+    def test_reference_changes_skip_json(self, store, monkeypatch):
+        """Test that adding and dropping references never rewrites .keys.json."""
+        store.put("named", {'type': 'key', 'key': "a2V5"})
+        monkeypatch.setattr(store, '_write', lambda records: pytest.fail(".keys.json rewritten"))
+
+        for n in range(20):
+            store.add_file("named", f"{n}.encrypted")
+        store.remove_refs([("named", "0.encrypted")])
+
+        assert store.file_count("named") == 19
+
+    def test_write_legacy_layout(self, store):
+        """Test that the legacy export lists each key's files in the old layout."""
+        store.put("named", {'type': 'key', 'key': "a2V5", 'created': "2024-01-01"},
+                  files=["a.encrypted", "b \"quoted\".encrypted"])
+        store.put("empty", {'type': 'password', 'salt': "c2FsdA=="})
+        out = io.StringIO()
+
+        assert store.write_legacy(out, ["named", "missing", "empty"]) == 2
+
+        assert json.loads(out.getvalue()) == {
+            "named": {'type': 'key', 'key': "a2V5", 'created': "2024-01-01",
+                      'files': ["a.encrypted", 'b "quoted".encrypted']},
+            "empty": {'type': 'password', 'salt': "c2FsdA==", 'files': []},
+        }
+
+
+class TestLegacyMigration:
+    """Test loading .keys.json files with embedded file lists."""
+
+    def test_legacy_store_migrated(self, tmp_path):
+        """Test that embedded files lists move into the reference index."""
+        sandbox = tmp_path / "sandbox"
+        sandbox.mkdir()
+        legacy = {
+            "key_2024-01-01T00:00:00": {
+                'type': 'key', 'key': "a2V5", 'created': "2024-01-01T00:00:00",
+                'files': ["a.encrypted", "a.encrypted", "b.encrypted"],
+            },
+            "named": {'type': 'password', 'salt': "c2FsdA==", 'created': "2024-01-02T00:00:00", 'files': []},
+        }
+        (sandbox / ".keys.json").write_text(json.dumps(legacy))
+
+        vault = CryptVault(sandbox_dir=str(sandbox))
+        keys = vault.list_keys()
+
+        assert keys["key_2024-01-01T00:00:00"]['files'] == ["a.encrypted", "b.encrypted"]
+        assert keys["named"]['files'] == []
+        rewritten = json.loads((sandbox / ".keys.json").read_text())
+        assert all('files' not in entry for entry in rewritten.values())
+
+    def test_password_lookup_after_migration(self, tmp_path):
+        """Test that password-only decryption still finds migrated files."""
+        sandbox = tmp_path / "sandbox"
+        source = tmp_path / "doc.txt"
+        source.write_text("legacy data")
+        vault = CryptVault(sandbox_dir=str(sandbox))
+        encrypted, key_id = vault.encrypt_file(str(source), password="OldPass")
+        vault.keystore.close()
+
+        # Rewrite the store the way earlier versions laid it out
+        data = json.loads((sandbox / ".keys.json").read_text())
+        data[key_id]['files'] = ["doc.txt.encrypted"]
+        (sandbox / ".keys.json").write_text(json.dumps(data))
+        (sandbox / ".keyrefs.db").unlink()
+
+        restored = CryptVault(sandbox_dir=str(sandbox))
+        restored.decrypt_file(encrypted, str(tmp_path / "out.txt"), password="OldPass")
+        assert (tmp_path / "out.txt").read_text() == "legacy data"
+
+
+class TestKeyQuery:
+    """Test filtered, paged key listings served from the index."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create a key store with a few keys."""
+        store = KeyStore(tmp_path)
+        for i, (name, key_type) in enumerate([("alpha", "password"), ("beta", "key"),
+                                              ("project-a", "password"), ("project-b", "key")]):
+            fields = {'type': key_type, 'created': f"2024-01-0{i + 1}T00:00:00"}
+            fields['salt' if key_type == 'password' else 'key'] = "c2FsdA=="
+            store.put(name, fields, files=[f"{name}-{n}.encrypted" for n in range(i)])
+        return store
+
+    def test_filters(self, store):
+        """Test name, type and creation filters."""
+        assert [k['name'] for k in store.query(name="project-*")] == ["project-a", "project-b"]
+        assert [k['name'] for k in store.query(key_type="key")] == ["beta", "project-b"]
+        assert [k['name'] for k in store.query(created_after="2024-01-03")] == ["project-a", "project-b"]
+        assert store.count(key_type="password") == 2
+
+    def test_paging_and_counts(self, store):
+        """Test limit/offset paging and per-key file counts."""
+        page = list(store.query(limit=2, offset=1, batch_size=1))
+
+        assert [k['name'] for k in page] == ["beta", "project-a"]
+        assert [k['files'] for k in page] == [1, 2]
+
+    def test_query_skips_json_when_indexed(self, store, tmp_path, monkeypatch):
+        """Test that listings do not parse .keys.json once it is indexed."""
+        store.close()
+        reloaded = KeyStore(tmp_path)
+        monkeypatch.setattr(reloaded, '_load', lambda: pytest.fail(".keys.json parsed"))
+
+        assert len(list(reloaded.query())) == 4
+
+    def test_external_rewrite_reindexed(self, store):
+        """Test that a .keys.json replaced by another process is picked up."""
+        data = json.loads(store.path.read_text())
+        data["copied"] = {'type': 'key', 'key': "a2V5", 'created': "2025-01-01T00:00:00"}
+        store.path.write_text(json.dumps(data))
+
+        assert [k['name'] for k in store.query(created_after="2025-01-01")] == ["copied"]
+
+
+class TestListKeysCLI:
+    """Test list-keys filters and NDJSON output."""
+
+    def _run(self, sandbox, *args):
+        return subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(sandbox), *args],
+            capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        )
+
+    def test_ndjson_page(self, tmp_path):
+        """Test that --json prints one object per matching key."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        for name in ("web-1", "web-2", "db-1"):
+            vault.save_key(name, password="ListPass")
+
+        result = self._run(tmp_path / "sandbox", "list-keys", "--name", "web-*", "--limit", "1", "--json")
+
+        assert result.returncode == 0, result.stderr
+        lines = result.stdout.splitlines()
+        assert len(lines) == 1
+        entry = json.loads(lines[0])
+        assert entry['name'] == "web-1"
+        assert entry['type'] == "password"
+        assert entry['files'] == 0
+        assert 'salt' not in entry
+
+    def test_text_summary(self, tmp_path):
+        """Test the paged text listing footer."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        for name in ("a", "b", "c"):
+            vault.save_key(name, password="ListPass")
+
+        result = self._run(tmp_path / "sandbox", "list-keys", "--offset", "1", "--limit", "1")
+
+        assert "Total: 3 saved keys (showing 2-2)" in result.stdout
@@ -0,0 +1,177 @@
+"""
+CryptVault Test Suite - Merkle Tree Tests
+
+Tests for the per-file Merkle tree: partial and parallel verification
+without the key, and locating corrupted segments.
+"""
+
+import io
+import os
+import hashlib
+import base64
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.container import (
+    ContainerError, TAG_SIZE, build_header, encrypt_stream, merkle_header, read_header,
+)
+from cryptvault.merkle import StoredTree, encode_tree, leaf_hash
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def encrypted(vault, tmp_path):
+    """Encrypt a five-segment file."""
+    source = tmp_path / "archive.tar"
+    source.write_bytes(os.urandom(4 * MIB + 123))
+    path, _ = vault.encrypt_file(str(source), password="MerklePass")
+    return Path(path)
+
+
+def _flip(path: Path, offset: int) -> None:
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0x01]))
+
+
+def _tree_end(path: Path) -> int:
+    """Offset just past the stored tree (before its tag and the digest record)."""
+    return path.stat().st_size - (2 * TAG_SIZE + hashlib.sha256().digest_size)
+
+
+def _segment_offset(path: Path, index: int) -> int:
+    with open(path, 'rb') as f:
+        header, prefix = read_header(f)
+    return len(prefix) + index * (header['segment_size'] + TAG_SIZE)
+
+
+class TestStoredTree:
+    """Test range checks against a stored tree."""
+
+    @pytest.mark.parametrize("count", [1, 2, 5, 8, 13])
+    def test_every_range_consistent(self, count):
+        """Test that every range of an intact tree hashes up to the root."""
+        leaves = [leaf_hash(bytes([i])) for i in range(count)]
+        tree = StoredTree(io.BytesIO(encode_tree(leaves)), 0, count)
+
+        for start in range(count):
+            for end in range(start + 1, count + 1):
+                assert tree.consistent(start, end)
+
+    def test_damaged_node_detected(self):
+        """Test that a flipped inner node breaks ranges below it."""
+        leaves = [leaf_hash(bytes([i])) for i in range(6)]
+        data = bytearray(encode_tree(leaves))
+        # First node of level 1 covers leaves 0 and 1
+        data[6 * 32] ^= 0x01
+        tree = StoredTree(io.BytesIO(bytes(data)), 0, 6)
+
+        assert not tree.consistent(0, 1)
+        assert tree.consistent(4, 6)
+
+
+class TestVerify:
+    """Test keyless verification of encrypted files."""
+
+    def test_intact(self, vault, encrypted):
+        """Test that an intact file verifies in full and by range."""
+        report = vault.verify_file(str(encrypted), workers=3)
+        assert report.ok and report.segments == 5
+
+        report = vault.verify_file(str(encrypted), start=3)
+        assert report.ok and (report.start, report.end) == (3, 5)
+
+    def test_corrupt_segments_located(self, vault, encrypted):
+        """Test that damaged segments are pinpointed and ranges outside them pass."""
+        _flip(encrypted, _segment_offset(encrypted, 1) + 10)
+        _flip(encrypted, _segment_offset(encrypted, 4) + 3)
+
+        report = vault.verify_file(str(encrypted))
+        assert report.corrupt == [1, 4]
+        assert report.tree_ok
+        assert report.plaintext_range(1) == (MIB, 2 * MIB)
+        assert vault.verify_file(str(encrypted), start=2, end=4).ok
+
+    def test_damaged_tree(self, vault, encrypted):
+        """Test that damage to the stored tree itself is reported."""
+        _flip(encrypted, _tree_end(encrypted) - 1)
+
+        report = vault.verify_file(str(encrypted))
+        assert not report.tree_ok
+        assert not report.ok
+
+    def test_without_tree(self, vault, tmp_path):
+        """Test that files without a tree are reported as unverifiable."""
+        source = tmp_path / "doc.txt"
+        source.write_bytes(b"no tree")
+        plain, _ = vault.encrypt_file(str(source), password="MerklePass", merkle=False)
+        legacy, _ = vault.encrypt_file(str(source), str(tmp_path / "legacy.encrypted"),
+                                       password="MerklePass", cipher="fernet")
+
+        assert vault.verify_file(plain) is None
+        assert vault.verify_file(legacy) is None
+        decrypted = vault.decrypt_file(plain, password="MerklePass")
+        assert Path(decrypted).read_bytes() == b"no tree"
+
+
+class TestDecryptDiagnosis:
+    """Test decryption of containers with a tree."""
+
+    def test_corruption_reported_with_location(self, vault, encrypted):
+        """Test that a damaged segment is named instead of blaming the key."""
+        _flip(encrypted, _segment_offset(encrypted, 2) + 5)
+
+        with pytest.raises(ValueError, match=r"segment 2 \(plaintext bytes 2097152-3145728\) is corrupted"):
+            vault.decrypt_file(str(encrypted), password="MerklePass")
+
+    def test_wrong_password_on_intact_file(self, vault, encrypted):
+        """Test that an intact file with the wrong password points at the key."""
+        with pytest.raises(ValueError, match="file is intact. Check your password"):
+            vault.decrypt_file(str(encrypted), password="WrongPass")
+
+    def test_tree_and_trailing_data_authenticated(self, vault, encrypted):
+        """Test that a damaged tree or appended bytes fail decryption."""
+        original = encrypted.read_bytes()
+        _flip(encrypted, _tree_end(encrypted) - 1)
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(str(encrypted), password="MerklePass")
+
+        encrypted.write_bytes(original + b"x")
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(str(encrypted), password="MerklePass")
+
+    def test_size_must_match_header(self):
+        """Test that an input that changes size is rejected."""
+        key = base64.urlsafe_b64encode(bytes(32))
+        header = build_header('aes-256-gcm', **merkle_header(10))
+        with pytest.raises(ContainerError, match="changed size"):
+            encrypt_stream(io.BytesIO(b"x" * 11), io.BytesIO(), key, 'aes-256-gcm', header=header)
+
+
+class TestVerifyCLI:
+    """Test the verify command."""
+
+    def test_reports_corruption(self, tmp_path, encrypted):
+        """Test that a scrub lists damaged segments and exits non-zero."""
+        _flip(encrypted, _segment_offset(encrypted, 3))
+        root = Path(__file__).resolve().parent.parent
+
+        result = subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(tmp_path / "sandbox"), "verify", str(encrypted.parent), "-j", "2"],
+            capture_output=True, text=True, cwd=root,
+        )
+
+        assert result.returncode == 1, result.stdout + result.stderr
+        assert "segment 3 (plaintext bytes" in result.stdout
@@ -0,0 +1,119 @@
+"""
+CryptVault Test Suite - Migration Tests
+
+Tests for converting legacy Fernet files to the container format in place.
+"""
+
+import os
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.container import MAGIC, is_container
+from cryptvault.storage import TEMP_SUFFIX
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def archive(vault, tmp_path):
+    """Three legacy Fernet files (one key entry each) and one container."""
+    archive = tmp_path / "archive"
+    plaintexts = {}
+    for i in range(3):
+        source = tmp_path / f"doc{i}.txt"
+        source.write_bytes(os.urandom(1000 * (i + 1)))
+        output, _ = vault.encrypt_file(str(source), str(archive / f"doc{i}.txt.encrypted"),
+                                       password="ArchivePass", cipher="fernet")
+        plaintexts[Path(output)] = source.read_bytes()
+    source = tmp_path / "new.txt"
+    source.write_bytes(b"already a container")
+    vault.encrypt_file(str(source), str(archive / "new.txt.encrypted"), password="ArchivePass")
+    return archive, plaintexts
+
+
+def _is_container(path: Path) -> bool:
+    with open(path, 'rb') as f:
+        return is_container(f.read(len(MAGIC)))
+
+
+class TestMigrate:
+    """Test in-place migration of legacy files."""
+
+    def test_legacy_files_converted(self, vault, archive, tmp_path):
+        """Test that legacy files become verified containers under the same keys."""
+        archive, plaintexts = archive
+        created = {path: vault.catalog.get(path)['created'] for path in plaintexts}
+        vault._derive_key_from_password = lambda *a: pytest.fail("derived during the batch")
+
+        results = vault.migrate([str(archive)], password="ArchivePass", workers=2, kdf_workers=2)
+
+        assert sorted(r.path for r in results) == sorted(str(p) for p in plaintexts)
+        assert all(r.ok for r in results)
+        for path, plaintext in plaintexts.items():
+            assert _is_container(path)
+            assert vault.verify_file(str(path)).ok
+            entry = vault.catalog.get(path)
+            assert entry['cipher'] != 'fernet' and entry['created'] == created[path]
+            assert entry['key_id'] in vault.keystore.owners(path.name)
+        del vault._derive_key_from_password
+        decrypted = vault.decrypt_file(str(archive / "doc2.txt.encrypted"), password="ArchivePass")
+        assert Path(decrypted).read_bytes() == plaintexts[archive / "doc2.txt.encrypted"]
+
+    def test_rerun_skips_migrated_files(self, vault, archive):
+        """Test that a second run (e.g. after an interruption) only sees legacy files."""
+        archive, plaintexts = archive
+        first = next(iter(plaintexts))
+        vault.migrate([str(first)], password="ArchivePass")
+
+        results = vault.migrate([str(archive)], password="ArchivePass")
+
+        assert len(results) == 2 and first not in {Path(r.path) for r in results}
+        assert vault.migrate([str(archive)], password="ArchivePass") == []
+
+    def test_wrong_password_leaves_files(self, vault, archive):
+        """Test that files that fail to decrypt are reported and left unchanged."""
+        archive, plaintexts = archive
+        before = {path: path.read_bytes() for path in plaintexts}
+
+        results = vault.migrate([str(archive)], password="WrongPass")
+
+        assert len(results) == 3 and not any(r.ok for r in results)
+        assert {path: path.read_bytes() for path in plaintexts} == before
+
+    def test_failed_verification_keeps_original(self, vault, archive, monkeypatch):
+        """Test that a copy that does not read back is discarded before the swap."""
+        archive, plaintexts = archive
+        path = next(iter(plaintexts))
+        original = path.read_bytes()
+        monkeypatch.setattr('cryptvault.file_encryption_sandbox.decrypt_stream',
+                            lambda src, dst, key, hasher: hasher.update(b"garbage"))
+
+        results = vault.migrate([str(path)], password="ArchivePass")
+
+        assert not results[0].ok and "Verification failed" in results[0].error
+        assert path.read_bytes() == original
+        assert not list(path.parent.glob(f"*{TEMP_SUFFIX}"))
+
+
+class TestMigrateCLI:
+    """Test the migrate command."""
+
+    def test_reports_migrated_files(self, archive, tmp_path):
+        """Test that the command migrates a directory and prints a total."""
+        archive, _ = archive
+        root = Path(__file__).resolve().parent.parent
+
+        result = subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(tmp_path / "sandbox"), "migrate", str(archive), "-p", "ArchivePass"],
+            capture_output=True, text=True, cwd=root,
+        )
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "Total: 3 files, 3 succeeded, 0 failed" in result.stdout
@@ -0,0 +1,125 @@
+"""
+CryptVault Test Suite - Progress Reporting Tests
+
+Tests for progress callbacks and the --progress CLI flag.
+"""
+
+import io
+import os
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.progress import Progress, ProgressTracker, ProgressReader, format_progress
+
+
+class TestProgressTracker:
+    """Test rate limiting and the reported numbers."""
+
+    def test_bounded_frequency(self):
+        """Test that updates inside the interval do not invoke the callback."""
+        updates = []
+        tracker = ProgressTracker(updates.append, total=1000, interval=3600)
+        for _ in range(100):
+            tracker.update(10)
+        assert updates == []
+
+        tracker.finish()
+        assert len(updates) == 1
+        assert updates[0].finished
+        assert updates[0].done == 1000
+        assert updates[0].fraction == 1.0
+
+    def test_rate_and_eta(self):
+        """Test that running updates carry a rate and an ETA."""
+        updates = []
+        tracker = ProgressTracker(updates.append, total=100, interval=0)
+        tracker.update(25)
+
+        assert updates[0].done == 25
+        assert updates[0].rate > 0
+        assert updates[0].eta is not None
+
+    def test_reader_seek_moves_tracker(self):
+        """Test that seeking past completed data counts it as done."""
+        tracker = ProgressTracker(lambda p: None, total=100, interval=3600)
+        reader = ProgressReader(io.BytesIO(bytes(100)), tracker)
+        reader.read(10)
+        reader.seek(60)
+        reader.read()
+
+        assert tracker.done == 100
+
+    def test_format_unknown_total(self):
+        """Test rendering when the size is unknown (stdin)."""
+        line = format_progress(Progress(2048, None, 1024.0, None, 2.0, name="<stream>"))
+        assert line == "[PROGRESS] <stream>: 2.0 KiB 1.0 KiB/s"
+
+
+class TestEngineProgress:
+    """Test progress callbacks on file, resumable and batch operations."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance with temporary sandbox."""
+        return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+    def test_encrypt_and_decrypt_report_totals(self, vault, tmp_path):
+        """Test that the final update matches the input sizes."""
+        source = tmp_path / "data.bin"
+        source.write_bytes(os.urandom(3 * 1024 * 1024 + 5))
+        updates = []
+
+        encrypted, key_id = vault.encrypt_file(str(source), password="ProgPass", progress=updates.append)
+        assert updates[-1].finished
+        assert updates[-1].done == updates[-1].total == source.stat().st_size
+
+        updates.clear()
+        vault.decrypt_file(encrypted, password="ProgPass", progress=updates.append)
+        assert updates[-1].done == updates[-1].total == Path(encrypted).stat().st_size
+
+    def test_resumable_progress(self, vault, tmp_path):
+        """Test that resumable mode reports the whole file."""
+        source = tmp_path / "data.bin"
+        source.write_bytes(os.urandom(2 * 1024 * 1024))
+        updates = []
+
+        vault.encrypt_file(str(source), password="ProgPass", resumable=True, progress=updates.append)
+
+        assert updates[-1].done == source.stat().st_size
+
+    def test_batch_aggregates(self, vault, tmp_path):
+        """Test that a batch reports one running total over all files."""
+        sizes = [1000, 200000, 3000]
+        for i, size in enumerate(sizes):
+            (tmp_path / "src").mkdir(exist_ok=True)
+            (tmp_path / "src" / f"f{i}").write_bytes(os.urandom(size))
+        updates = []
+
+        vault.encrypt_batch([str(tmp_path / "src")], str(tmp_path / "enc"),
+                            password="ProgPass", progress=updates.append)
+
+        assert len(updates) == 1
+        assert updates[0].done == updates[0].total == sum(sizes)
+
+
+class TestProgressCLI:
+    """Test the --progress flag."""
+
+    def test_progress_on_stderr_with_streams(self, tmp_path):
+        """Test that progress never pollutes streamed stdout."""
+        sandbox = tmp_path / "sandbox"
+        root = Path(__file__).resolve().parent.parent
+        base = [sys.executable, "-m", "cryptvault.file_encryption_sandbox", "--sandbox-dir", str(sandbox)]
+        subprocess.run(base + ["save-key", "pipe", "-p", "PipePass"], check=True, cwd=root)
+        data = os.urandom(100 * 1024)
+
+        encrypted = subprocess.run(base + ["encrypt", "-", "-k", "pipe", "-p", "PipePass", "--progress"],
+                                   input=data, capture_output=True, cwd=root)
+        assert b"[PROGRESS]" in encrypted.stderr
+        assert encrypted.stdout.startswith(b"CVLT")
+
+        decrypted = subprocess.run(base + ["decrypt", "-", "-n", "pipe", "-p", "PipePass"],
+                                   input=encrypted.stdout, capture_output=True, cwd=root)
+        assert decrypted.stdout == data
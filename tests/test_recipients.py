@@ -0,0 +1,155 @@
+"""
+CryptVault Test Suite - Multi-Recipient Tests
+
+Tests for sharing one container among several keys and changing its
+recipients by rewriting only the header.
+"""
+
+import os
+import sys
+import base64
+import subprocess
+import pytest
+from pathlib import Path
+from cryptography.fernet import Fernet
+from cryptvault import CryptVault
+from cryptvault.container import HEADER_SLACK, read_header
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with saved keys for two teams."""
+    vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+    vault.save_key("team-a", password="TeamAPass")
+    vault.save_key("team-b", key=base64.b64encode(Fernet.generate_key()).decode())
+    return vault
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Create a three-segment plaintext file."""
+    path = tmp_path / "report.bin"
+    path.write_bytes(os.urandom(2 * MIB + 77))
+    return path
+
+
+def _segments(path: Path) -> bytes:
+    with open(path, 'rb') as f:
+        read_header(f)
+        return f.read()
+
+
+class TestSharedEncryption:
+    """Test containers encrypted for several keys."""
+
+    def test_every_recipient_decrypts(self, vault, source, tmp_path):
+        """Test that each recipient key opens the single stored copy."""
+        path, key_id = vault.encrypt_file(str(source), key_name="team-a", password="TeamAPass",
+                                          recipients={"team-b": None})
+
+        assert key_id == "team-a"
+        assert vault.recipients(path) == ["team-a", "team-b"]
+        by_a = vault.decrypt_file(path, str(tmp_path / "a.out"), password="TeamAPass", key_name="team-a")
+        by_b = vault.decrypt_file(path, str(tmp_path / "b.out"), key_name="team-b")
+        assert Path(by_a).read_bytes() == Path(by_b).read_bytes() == source.read_bytes()
+        assert vault.verify_file(path).ok
+
+    def test_sharing_costs_header_bytes_only(self, vault, source, tmp_path):
+        """Test that a shared container is only a header entry larger."""
+        single, _ = vault.encrypt_file(str(source), str(tmp_path / "single.encrypted"),
+                                       key_name="team-a", password="TeamAPass")
+        shared, _ = vault.encrypt_file(str(source), str(tmp_path / "shared.encrypted"),
+                                       key_name="team-a", password="TeamAPass",
+                                       recipients={"team-b": None})
+
+        overhead = Path(shared).stat().st_size - Path(single).stat().st_size
+        assert overhead < HEADER_SLACK + 512
+
+    def test_wrong_key_rejected(self, vault, source):
+        """Test that a key outside the recipient list cannot decrypt."""
+        vault.save_key("team-c", password="TeamCPass")
+        path, _ = vault.encrypt_file(str(source), key_name="team-a", password="TeamAPass",
+                                     recipients={"team-b": None})
+
+        with pytest.raises(ValueError, match="not a recipient"):
+            vault.decrypt_file(path, key_name="team-c", password="TeamCPass")
+
+
+class TestChangingRecipients:
+    """Test adding and removing recipients."""
+
+    def test_add_and_remove_rewrite_header_in_place(self, vault, source):
+        """Test that recipient changes leave the segments and file size untouched."""
+        vault.save_key("team-c", password="TeamCPass")
+        path, _ = vault.encrypt_file(str(source), key_name="team-a", password="TeamAPass",
+                                     recipients={})
+        size = Path(path).stat().st_size
+        segments = _segments(Path(path))
+
+        assert vault.add_recipient(path, "team-c", "TeamCPass", password="TeamAPass",
+                                   key_name="team-a") == ["team-a", "team-c"]
+        assert Path(path).stat().st_size == size
+        assert _segments(Path(path)) == segments
+        decrypted = vault.decrypt_file(path, key_name="team-c", password="TeamCPass")
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+        assert vault.remove_recipient(path, "team-c") == ["team-a"]
+        assert Path(path).stat().st_size == size
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(path, key_name="team-c", password="TeamCPass")
+
+    def test_single_key_file_converted(self, vault, source, tmp_path):
+        """Test sharing a file encrypted before recipients existed."""
+        path, key_id = vault.encrypt_file(str(source), password="OwnerPass")
+        segments = _segments(Path(path))
+
+        vault.add_recipient(path, "team-b", password="OwnerPass")
+
+        assert vault.recipients(path) == [key_id, "team-b"]
+        assert _segments(Path(path)) == segments
+        by_owner = vault.decrypt_file(path, str(tmp_path / "owner.out"), password="OwnerPass")
+        by_b = vault.decrypt_file(path, str(tmp_path / "b.out"), key_name="team-b")
+        assert Path(by_owner).read_bytes() == Path(by_b).read_bytes() == source.read_bytes()
+
+    def test_password_only_decryption_finds_recipient(self, vault, source):
+        """Test that -p alone picks the password recipient it opens."""
+        path, _ = vault.encrypt_file(str(source), password="OwnerPass",
+                                     recipients={"team-a": "TeamAPass"})
+
+        for password in ("OwnerPass", "TeamAPass"):
+            decrypted = vault.decrypt_file(path, password=password)
+            assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_invalid_changes_refused(self, vault, source):
+        """Test duplicate, unknown and last-recipient changes."""
+        path, _ = vault.encrypt_file(str(source), key_name="team-a", password="TeamAPass",
+                                     recipients={"team-b": None})
+
+        with pytest.raises(ValueError, match="already a recipient"):
+            vault.add_recipient(path, "team-b", key_name="team-a", password="TeamAPass")
+        with pytest.raises(ValueError, match="not a recipient"):
+            vault.remove_recipient(path, "team-c")
+        vault.remove_recipient(path, "team-b")
+        with pytest.raises(ValueError, match="last recipient"):
+            vault.remove_recipient(path, "team-a")
+
+
+class TestRecipientsCLI:
+    """Test the recipients command."""
+
+    def test_add_and_list(self, vault, source, tmp_path):
+        """Test sharing a file from the command line."""
+        path, _ = vault.encrypt_file(str(source), key_name="team-a", password="TeamAPass")
+        root = Path(__file__).resolve().parent.parent
+
+        result = subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(tmp_path / "sandbox"), "recipients", path,
+             "--add", "team-b", "-n", "team-a", "-p", "TeamAPass"],
+            capture_output=True, text=True, cwd=root,
+        )
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "Recipients of" in result.stdout and "team-a, team-b" in result.stdout
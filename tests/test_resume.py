@@ -0,0 +1,154 @@
+"""
+CryptVault Test Suite - Resumable Operation Tests
+
+Tests for checkpointed encryption/decryption that survives interruptions.
+"""
+
+import os
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault import journal
+from cryptvault.container import SegmentCipher, DEFAULT_SEGMENT_SIZE
+
+
+class Interrupted(Exception):
+    """Simulated crash."""
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def big_file(tmp_path):
+    """Create a file spanning several segments."""
+    path = tmp_path / "big.bin"
+    path.write_bytes(os.urandom(6 * DEFAULT_SEGMENT_SIZE + 123))
+    return path
+
+
+@pytest.fixture
+def checkpoint_every_segment(monkeypatch):
+    """Checkpoint after every segment to keep tests small."""
+    monkeypatch.setattr(journal, 'CHECKPOINT_BYTES', 1)
+
+
+def _crash_after(monkeypatch, method, segments):
+    """Make SegmentCipher.<method> fail once ``segments`` calls succeeded."""
+    original = getattr(SegmentCipher, method)
+    calls = {'n': 0}
+
+    def failing(self, index, data, final):
+        calls['n'] += 1
+        if calls['n'] > segments:
+            raise Interrupted()
+        return original(self, index, data, final)
+
+    monkeypatch.setattr(SegmentCipher, method, failing)
+    return calls
+
+
+class TestResumableEncryption:
+    """Test resuming interrupted encryption."""
+
+    def test_resume_continues_from_checkpoint(self, vault, big_file, monkeypatch, checkpoint_every_segment):
+        """Test that a resumed run only encrypts the remaining segments."""
+        vault.save_key("resume-key", password="ResumePass")
+        output = vault.sandbox_dir / "big.bin.encrypted"
+
+        _crash_after(monkeypatch, 'encrypt_segment', 4)
+        with pytest.raises(Interrupted):
+            vault.encrypt_file(str(big_file), key_name="resume-key", password="ResumePass", resumable=True)
+        monkeypatch.undo()
+        monkeypatch.setattr(journal, 'CHECKPOINT_BYTES', 1)
+
+        assert not output.exists()
+        assert Path(str(output) + ".cvjournal").exists()
+
+        calls = _crash_after(monkeypatch, 'encrypt_segment', 100)
+        vault.encrypt_file(str(big_file), key_name="resume-key", password="ResumePass", resumable=True)
+
+        assert calls['n'] == 3
+        assert output.exists()
+        assert not Path(str(output) + ".cvjournal").exists()
+        assert not Path(str(output) + ".cvpart").exists()
+
+        decrypted = vault.decrypt_file(str(output), key_name="resume-key", password="ResumePass")
+        assert Path(decrypted).read_bytes() == big_file.read_bytes()
+
+    def test_resume_reuses_generated_key(self, vault, big_file, monkeypatch, checkpoint_every_segment):
+        """Test that a resumed password run does not create a second key entry."""
+        _crash_after(monkeypatch, 'encrypt_segment', 2)
+        with pytest.raises(Interrupted):
+            vault.encrypt_file(str(big_file), password="AutoPass", resumable=True)
+        monkeypatch.undo()
+
+        _, key_id = vault.encrypt_file(str(big_file), password="AutoPass", resumable=True)
+
+        assert list(vault.list_keys()) == [key_id]
+        decrypted = vault.decrypt_file(str(vault.sandbox_dir / "big.bin.encrypted"), password="AutoPass")
+        assert Path(decrypted).read_bytes() == big_file.read_bytes()
+
+    def test_wrong_password_refuses_to_resume(self, vault, big_file, monkeypatch, checkpoint_every_segment):
+        """Test that a resume with another password keeps the staged run untouched."""
+        _crash_after(monkeypatch, 'encrypt_segment', 3)
+        with pytest.raises(Interrupted):
+            vault.encrypt_file(str(big_file), password="FirstPass", resumable=True)
+        monkeypatch.undo()
+        staging = vault.sandbox_dir / "big.bin.encrypted.cvpart"
+        staged = staging.read_bytes()
+
+        with pytest.raises(ValueError, match="does not match the interrupted run"):
+            vault.encrypt_file(str(big_file), password="OtherPass", resumable=True)
+        assert staging.read_bytes() == staged
+
+        vault.encrypt_file(str(big_file), password="FirstPass", resumable=True)
+        decrypted = vault.decrypt_file(str(vault.sandbox_dir / "big.bin.encrypted"), password="FirstPass")
+        assert Path(decrypted).read_bytes() == big_file.read_bytes()
+
+    def test_changed_input_restarts(self, vault, big_file, monkeypatch, checkpoint_every_segment):
+        """Test that a modified input discards the old checkpoint."""
+        vault.save_key("restart-key", password="RestartPass")
+        _crash_after(monkeypatch, 'encrypt_segment', 2)
+        with pytest.raises(Interrupted):
+            vault.encrypt_file(str(big_file), key_name="restart-key", password="RestartPass", resumable=True)
+        monkeypatch.undo()
+
+        big_file.write_bytes(b"replaced content")
+        encrypted, _ = vault.encrypt_file(str(big_file), key_name="restart-key",
+                                          password="RestartPass", resumable=True)
+
+        decrypted = vault.decrypt_file(encrypted, key_name="restart-key", password="RestartPass")
+        assert Path(decrypted).read_bytes() == b"replaced content"
+
+
+class TestResumableDecryption:
+    """Test resuming interrupted decryption."""
+
+    def test_resume_decrypt(self, vault, big_file, monkeypatch, checkpoint_every_segment):
+        """Test that decryption resumes and the catalog hash covers all data."""
+        import hashlib
+
+        encrypted, key_id = vault.encrypt_file(str(big_file))
+        key = vault.list_keys()[key_id]['key']
+        output = vault.sandbox_dir / "big.bin.decrypted"
+
+        _crash_after(monkeypatch, 'decrypt_segment', 3)
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(encrypted, key=key, resumable=True)
+        monkeypatch.undo()
+        assert not output.exists()
+
+        vault.decrypt_file(encrypted, key=key, resumable=True)
+
+        assert output.read_bytes() == big_file.read_bytes()
+        entry = vault.catalog.query(kind='decrypted')[0]
+        assert entry['plaintext_hash'] == hashlib.sha256(big_file.read_bytes()).hexdigest()
+
+    def test_resume_requires_local_aead(self, vault, big_file):
+        """Test that resumable mode rejects the buffered Fernet suite."""
+        with pytest.raises(ValueError, match="Resumable mode"):
+            vault.encrypt_file(str(big_file), cipher="fernet", resumable=True)
@@ -0,0 +1,177 @@
+"""
+CryptVault Test Suite - Batch Scheduler Tests
+
+Tests for memory-budgeted, largest-first batch encryption and decryption.
+"""
+
+import threading
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.scheduler import BatchScheduler, BatchTask, BatchResult, walk_files
+
+
+class TestBatchScheduler:
+    """Test scheduling order, memory budget and backpressure."""
+
+    def _tasks(self, sizes):
+        return [BatchTask(Path(f"f{i}"), size, cost=size) for i, size in enumerate(sizes)]
+
+    def test_largest_first(self):
+        """Test that the largest pending task is started first."""
+        started = []
+        scheduler = BatchScheduler(workers=1)
+
+        scheduler.run(self._tasks([10, 300, 20, 200]),
+                      lambda task: started.append(task.size) or BatchResult(str(task.path)))
+
+        assert started == [300, 200, 20, 10]
+
+    def test_memory_budget_respected(self):
+        """Test that concurrent tasks never exceed the memory budget."""
+        lock = threading.Lock()
+        running = {'bytes': 0, 'peak': 0}
+
+        def fn(task):
+            with lock:
+                running['bytes'] += task.cost
+                running['peak'] = max(running['peak'], running['bytes'])
+            threading.Event().wait(0.01)
+            with lock:
+                running['bytes'] -= task.cost
+            return BatchResult(str(task.path))
+
+        scheduler = BatchScheduler(workers=8, memory_budget=100)
+        results = scheduler.run(self._tasks([60, 50, 40, 30, 20, 10] * 3), fn)
+
+        assert len(results) == 18
+        assert running['peak'] <= 100
+        assert scheduler.peak_in_flight_bytes <= 100
+
+    def test_oversized_task_runs_alone(self):
+        """Test that a task larger than the budget still runs."""
+        scheduler = BatchScheduler(workers=4, memory_budget=10)
+        results = scheduler.run(self._tasks([50, 5]), lambda task: BatchResult(str(task.path)))
+
+        assert len(results) == 2
+        assert scheduler.peak_in_flight_bytes == 50
+
+    def test_backpressure_window(self):
+        """Test that the walker is not consumed far ahead of execution."""
+        pulled = []
+        gate = threading.Event()
+
+        def tasks():
+            for i in range(50):
+                pulled.append(i)
+                yield BatchTask(Path(f"f{i}"), 1, cost=1)
+
+        def fn(task):
+            gate.wait(5)
+            return BatchResult(str(task.path))
+
+        scheduler = BatchScheduler(workers=1, window=4)
+        thread = threading.Thread(target=scheduler.run, args=(tasks(), fn))
+        thread.start()
+        threading.Event().wait(0.1)
+        assert len(pulled) <= 6
+        gate.set()
+        thread.join()
+        assert len(pulled) == 50
+
+    def test_failures_reported(self):
+        """Test that a failing task becomes a failed result."""
+        def fn(task):
+            raise ValueError("boom")
+
+        results = BatchScheduler().run(self._tasks([1]), fn)
+
+        assert not results[0].ok
+        assert results[0].error == "boom"
+
+    def test_walk_files_pattern(self, tmp_path):
+        """Test recursive walking with a filename pattern."""
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "sub" / "b.txt").write_text("b")
+        (tmp_path / "c.log").write_text("c")
+
+        found = sorted(p.relative_to(root).as_posix() for p, root in walk_files([tmp_path], "*.txt"))
+
+        assert found == ["a.txt", "sub/b.txt"]
+
+
+class TestBatchVault:
+    """Test batch encryption and decryption through the vault."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance with temporary sandbox."""
+        return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+    def test_roundtrip_tree(self, vault, tmp_path):
+        """Test that a directory tree survives a batch roundtrip."""
+        source = tmp_path / "src"
+        (source / "nested").mkdir(parents=True)
+        files = {"one.txt": b"1" * 5000, "nested/two.bin": b"2" * 300000, "empty.txt": b""}
+        for name, data in files.items():
+            (source / name).write_bytes(data)
+
+        encrypted = vault.encrypt_batch([str(source)], str(tmp_path / "enc"),
+                                        password="BatchPass", workers=3)
+        assert all(r.ok for r in encrypted)
+        assert (tmp_path / "enc" / "nested" / "two.bin.encrypted").exists()
+
+        decrypted = vault.decrypt_batch([str(tmp_path / "enc")], str(tmp_path / "out"),
+                                        password="BatchPass")
+        assert all(r.ok for r in decrypted)
+        for name, data in files.items():
+            assert (tmp_path / "out" / name).read_bytes() == data
+
+    def test_shared_key_records_all_files(self, vault, tmp_path):
+        """Test that concurrent encryptions all register with a saved key."""
+        vault.save_key("batch", password="BatchPass")
+        for i in range(8):
+            (tmp_path / f"f{i}.txt").write_text(f"file {i}")
+
+        results = vault.encrypt_batch([str(tmp_path / f"f{i}.txt") for i in range(8)],
+                                      key_name="batch", password="BatchPass", workers=4)
+
+        assert all(r.ok for r in results)
+        assert len(vault.list_keys()["batch"]["files"]) == 8
+        assert vault.catalog.summary(kind='encrypted')['count'] == 8
+
+    def test_wrong_password_fails_per_file(self, vault, tmp_path):
+        """Test that failures are reported without aborting the batch."""
+        (tmp_path / "a.txt").write_text("a")
+        vault.encrypt_batch([str(tmp_path / "a.txt")], str(tmp_path / "enc"), password="Right")
+
+        results = vault.decrypt_batch([str(tmp_path / "enc")], str(tmp_path / "out"), password="Wrong")
+
+        assert len(results) == 1 and not results[0].ok
+
+    def test_same_names_do_not_overwrite(self, vault, tmp_path):
+        """Test that same-named inputs from different directories never share an output."""
+        vault.save_key("batch", password="BatchPass")
+        for folder, data in (("a", b"from a"), ("b", b"from b")):
+            (tmp_path / folder).mkdir()
+            (tmp_path / folder / "report.txt").write_bytes(data)
+            vault.encrypt_file(str(tmp_path / folder / "report.txt"),
+                               str(tmp_path / folder / "report.txt.encrypted"),
+                               key_name="batch", password="BatchPass")
+
+        results = vault.decrypt_batch([str(tmp_path / "a" / "report.txt.encrypted"),
+                                       str(tmp_path / "b" / "report.txt.encrypted")],
+                                      key_name="batch", password="BatchPass")
+
+        ok = [r for r in results if r.ok]
+        failed = [r for r in results if not r.ok]
+        assert len(ok) == 1 and len(failed) == 1
+        assert failed[0].path == str(tmp_path / "b" / "report.txt.encrypted")
+        assert "already written by another input" in failed[0].error
+        assert (vault.sandbox_dir / "report.txt.decrypted").read_bytes() == b"from a"
+
+        encrypted = vault.encrypt_batch([str(tmp_path / "a" / "report.txt"),
+                                         str(tmp_path / "b" / "report.txt")],
+                                        key_name="batch", password="BatchPass")
+        assert [r.ok for r in sorted(encrypted, key=lambda r: r.path)] == [True, False]
@@ -0,0 +1,136 @@
+"""
+CryptVault Test Suite - Key Session Tests
+
+Tests for session mode: one PBKDF2 derivation per password per run, and
+parallel derivation of the distinct keys of a batch.
+"""
+
+import base64
+import pytest
+from cryptvault import CryptVault
+from cryptvault.container import read_header
+from cryptvault.kdf import derive_keys, pbkdf2_key
+
+
+class TestKeySession:
+    """Test master key sharing and KDF caching inside a session."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance that counts KDF calls."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        vault.kdf_calls = 0
+        derive = vault._derive_key_from_password
+
+        def counting(password, salt=None):
+            vault.kdf_calls += 1
+            return derive(password, salt)
+
+        vault._derive_key_from_password = counting
+        return vault
+
+    def _files(self, tmp_path, count):
+        paths = []
+        for i in range(count):
+            path = tmp_path / f"f{i}.txt"
+            path.write_text(f"file {i}")
+            paths.append(str(path))
+        return paths
+
+    def test_one_kdf_and_one_entry_per_password(self, vault, tmp_path):
+        """Test that password-only files share one derived master key."""
+        with vault.session():
+            key_ids = {vault.encrypt_file(path, password="RunPass")[1]
+                       for path in self._files(tmp_path, 5)}
+
+        assert vault.kdf_calls == 1
+        assert len(key_ids) == 1
+        entry = vault.list_keys()[key_ids.pop()]
+        assert entry['session'] is True
+        assert len(entry['files']) == 5
+
+    def test_per_file_salts_are_unique(self, vault, tmp_path):
+        """Test that each container still carries its own HKDF salt."""
+        with vault.session():
+            outputs = [vault.encrypt_file(path, password="RunPass")[0]
+                       for path in self._files(tmp_path, 3)]
+
+        salts = set()
+        for output in outputs:
+            with open(output, 'rb') as f:
+                header, _ = read_header(f)
+            salts.add(base64.b64decode(header['salt']))
+        assert len(salts) == 3
+
+    def test_decrypt_session_files(self, vault, tmp_path):
+        """Test that session files decrypt inside and outside a session."""
+        with vault.session():
+            outputs = [vault.encrypt_file(path, password="RunPass")[0]
+                       for path in self._files(tmp_path, 3)]
+        vault.kdf_calls = 0
+
+        with vault.session():
+            for output in outputs:
+                vault.decrypt_file(output, password="RunPass")
+        assert vault.kdf_calls == 1
+
+        assert CryptVault(sandbox_dir=str(vault.sandbox_dir)).decrypt_file(
+            outputs[0], str(tmp_path / "plain.txt"), password="RunPass")
+        assert (tmp_path / "plain.txt").read_text() == "file 0"
+
+    def test_saved_key_derived_once(self, vault, tmp_path):
+        """Test that a saved password key is derived once per session."""
+        vault.save_key("nightly", password="NightPass")
+        vault.kdf_calls = 0
+
+        vault.encrypt_batch(self._files(tmp_path, 6), str(tmp_path / "enc"),
+                            password="NightPass", key_name="nightly", workers=3)
+
+        assert vault.kdf_calls == 1
+
+    def test_without_session_one_kdf_per_file(self, vault, tmp_path):
+        """Test that the default mode keeps per-file key entries."""
+        key_ids = {vault.encrypt_file(path, password="RunPass")[1]
+                   for path in self._files(tmp_path, 2)}
+
+        assert vault.kdf_calls == 2
+        assert len(key_ids) == 2
+
+    def test_cache_dropped_after_session(self, vault, tmp_path):
+        """Test that derived keys do not outlive the session."""
+        with vault.session():
+            vault.encrypt_file(self._files(tmp_path, 1)[0], password="RunPass")
+            with vault.session():
+                pass
+            assert vault._kdf_cache
+
+        assert not vault._kdf_cache
+        assert not vault._session_keys
+
+
+class TestPlannedDerivation:
+    """Test deriving the distinct keys of a batch up front."""
+
+    def test_derive_keys_deduplicates(self):
+        """Test that each distinct salt is derived once, in worker processes."""
+        salts = [b"a" * 16, b"b" * 16, b"a" * 16]
+
+        keys = derive_keys("PlanPass", salts, iterations=1000, workers=2)
+
+        assert keys == {salt: pbkdf2_key("PlanPass", salt, 1000) for salt in set(salts)}
+
+    def test_batch_keys_derived_before_decryption(self, tmp_path):
+        """Test that files under many key entries decrypt on primed keys."""
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        for i in range(4):
+            path = tmp_path / f"f{i}.txt"
+            path.write_text(f"file {i}")
+            vault.encrypt_file(str(path), str(tmp_path / "enc" / f"f{i}.txt.encrypted"),
+                               password="PlanPass")
+        vault._derive_key_from_password = lambda *a: pytest.fail("derived during the batch")
+
+        results = vault.decrypt_batch([str(tmp_path / "enc")], str(tmp_path / "out"),
+                                      password="PlanPass", kdf_workers=2)
+
+        assert all(r.ok for r in results) and len(results) == 4
+        assert (tmp_path / "out" / "f3.txt").read_text() == "file 3"
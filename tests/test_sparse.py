@@ -0,0 +1,182 @@
+"""
+CryptVault Test Suite - Sparse File Tests
+
+Tests for encrypting only the data extents of sparse files.
+"""
+
+import io
+import os
+import hashlib
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault import journal
+from cryptvault.container import SegmentCipher, ContainerError, read_header, encode_header
+from cryptvault.sparse import ExtentMap, data_extents
+
+MIB = 1024 * 1024
+
+# (offset, length) of the data written into the sparse fixture; the first
+# extent ends exactly on a segment boundary
+EXTENTS = [(0, 2 * MIB), (8 * MIB, MIB + MIB // 2), (12 * MIB, 2 * MIB)]
+SIZE = 20 * MIB
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'SEEK_DATA'), reason="needs SEEK_DATA/SEEK_HOLE")
+
+
+class Interrupted(Exception):
+    """Simulated crash."""
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def sparse_file(tmp_path):
+    """Create a mostly-hole file ending in a hole."""
+    path = tmp_path / "disk.img"
+    with open(path, 'wb') as f:
+        for offset, length in EXTENTS:
+            f.seek(offset)
+            f.write(os.urandom(length))
+        f.truncate(SIZE)
+    if data_extents(path) is None:
+        pytest.skip("filesystem does not report holes")
+    return path
+
+
+class TestExtentMap:
+    """Test data-space addressing."""
+
+    def test_pieces_and_offsets(self):
+        """Test splitting data-space ranges across extents."""
+        extent_map = ExtentMap([(0, 10), (100, 20)], 200)
+
+        assert extent_map.data_size == 30
+        assert list(extent_map.pieces(5, 10)) == [(5, 5), (100, 5)]
+        assert extent_map.logical_offset(10) == 100
+        assert extent_map.logical_offset(30) == 120
+
+    def test_detects_holes(self, sparse_file):
+        """Test that SEEK_DATA/SEEK_HOLE find the written extents."""
+        extent_map = data_extents(sparse_file)
+
+        assert extent_map.size == SIZE
+        assert extent_map.data_size == sum(length for _, length in EXTENTS)
+
+    def test_dense_file_has_no_map(self, tmp_path):
+        """Test that files without holes are encrypted as before."""
+        path = tmp_path / "dense.bin"
+        path.write_bytes(os.urandom(MIB))
+        assert data_extents(path) is None
+
+
+class TestSparseEncryption:
+    """Test sparse round trips."""
+
+    def test_round_trip_recreates_holes(self, vault, sparse_file):
+        """Test that only data is encrypted and decryption is sparse again."""
+        encrypted, key_id = vault.encrypt_file(str(sparse_file), password="SparsePass")
+
+        assert Path(encrypted).stat().st_size < 6 * MIB
+        with open(encrypted, 'rb') as f:
+            header, _ = read_header(f)
+        assert header['sparse']['size'] == SIZE
+
+        decrypted = vault.decrypt_file(encrypted, password="SparsePass")
+        assert Path(decrypted).read_bytes() == sparse_file.read_bytes()
+        assert Path(decrypted).stat().st_blocks * 512 < 8 * MIB
+
+    def test_hashes_cover_holes(self, vault, sparse_file):
+        """Test that catalog hashes match the full file content."""
+        encrypted, _ = vault.encrypt_file(str(sparse_file), password="SparsePass")
+        vault.decrypt_file(encrypted, password="SparsePass")
+
+        expected = hashlib.sha256(sparse_file.read_bytes()).hexdigest()
+        hashes = {entry['kind']: entry['plaintext_hash'] for entry in vault.catalog.query()}
+        assert hashes == {'encrypted': expected, 'decrypted': expected}
+
+    def test_leading_hole(self, vault, tmp_path):
+        """Test a file whose first data extent is past offset 0."""
+        path = tmp_path / "tail.img"
+        with open(path, 'wb') as f:
+            f.seek(4 * MIB)
+            f.write(os.urandom(MIB))
+            f.truncate(8 * MIB)
+        extent_map = data_extents(path)
+        if extent_map is None or extent_map.extents[0][0] == 0:
+            pytest.skip("filesystem does not report a leading hole")
+        expected = hashlib.sha256(path.read_bytes()).hexdigest()
+
+        encrypted, _ = vault.encrypt_file(str(path), password="SparsePass")
+        decrypted = vault.decrypt_file(encrypted, str(tmp_path / "restored.img"), password="SparsePass")
+
+        assert Path(decrypted).read_bytes() == path.read_bytes()
+        hashes = {entry['kind']: entry['plaintext_hash'] for entry in vault.catalog.query()}
+        assert hashes == {'encrypted': expected, 'decrypted': expected}
+
+    def test_opt_out(self, vault, sparse_file):
+        """Test that sparse=False writes a dense version 1 container."""
+        encrypted, _ = vault.encrypt_file(str(sparse_file), password="SparsePass", sparse=False)
+
+        assert Path(encrypted).stat().st_size > SIZE
+        with open(encrypted, 'rb') as f:
+            assert f.read(5)[4] == 1
+
+    def test_stream_decrypt_writes_zeros(self, vault, sparse_file):
+        """Test that stream output gets the holes as zeros."""
+        encrypted, key_id = vault.encrypt_file(str(sparse_file), password="SparsePass")
+        output = io.BytesIO()
+
+        with open(encrypted, 'rb') as src:
+            vault.decrypt_stream(src, output, password="SparsePass", name=Path(encrypted).name)
+
+        assert output.getvalue() == sparse_file.read_bytes()
+
+    def test_version_must_match_header(self):
+        """Test that a sparse header cannot be relabelled as version 1."""
+        prefix = bytearray(encode_header({'cipher': 'aes-256-gcm', 'segment_size': MIB,
+                                          'salt': '', 'sparse': {'size': 1, 'extents': []}}))
+        prefix[4] = 1
+        with pytest.raises(ContainerError, match="version"):
+            read_header(io.BytesIO(bytes(prefix)))
+
+
+class TestSparseResume:
+    """Test resumable operations on sparse files."""
+
+    def _crash_after(self, monkeypatch, method, segments):
+        original = getattr(SegmentCipher, method)
+        calls = {'n': 0}
+
+        def failing(self, index, data, final):
+            calls['n'] += 1
+            if calls['n'] > segments:
+                raise Interrupted()
+            return original(self, index, data, final)
+
+        monkeypatch.setattr(SegmentCipher, method, failing)
+
+    def test_resume_encrypt_and_decrypt(self, vault, sparse_file, monkeypatch):
+        """Test resuming at an extent boundary in both directions."""
+        monkeypatch.setattr(journal, 'CHECKPOINT_BYTES', 1)
+        self._crash_after(monkeypatch, 'encrypt_segment', 2)
+        with pytest.raises(Interrupted):
+            vault.encrypt_file(str(sparse_file), password="SparsePass", resumable=True)
+        monkeypatch.undo()
+        monkeypatch.setattr(journal, 'CHECKPOINT_BYTES', 1)
+        encrypted, _ = vault.encrypt_file(str(sparse_file), password="SparsePass", resumable=True)
+
+        self._crash_after(monkeypatch, 'decrypt_segment', 2)
+        with pytest.raises(ValueError, match="Decryption failed"):
+            vault.decrypt_file(encrypted, password="SparsePass", resumable=True)
+        monkeypatch.undo()
+        decrypted = vault.decrypt_file(encrypted, password="SparsePass", resumable=True)
+
+        expected = sparse_file.read_bytes()
+        assert Path(decrypted).read_bytes() == expected
+        for entry in vault.catalog.query():
+            assert entry['plaintext_hash'] == hashlib.sha256(expected).hexdigest()
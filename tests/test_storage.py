@@ -0,0 +1,203 @@
+"""
+CryptVault Test Suite - Storage Backend Tests
+
+Tests for local, directory-emulated and S3-compatible storage backends.
+"""
+
+import io
+import os
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault import storage as storage_module
+from cryptvault.storage import DirectoryStorage, S3Storage, storage_from_url
+
+
+class FakeBody(io.BytesIO):
+    """Response body that, like a real one, cannot seek."""
+
+    def seekable(self):
+        return False
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client calls used by S3Storage."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.part_calls = 0
+        self.part_sizes = {}
+        self.get_calls = 0
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.part_calls += 1
+        self.part_sizes[PartNumber] = len(Body)
+        self.uploads[UploadId][PartNumber] = Body
+        return {'ETag': f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [p['PartNumber'] for p in MultipartUpload['Parts']]
+        assert numbers == sorted(parts)
+        self.objects[(Bucket, Key)] = b''.join(parts[n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    def get_object(self, Bucket, Key):
+        self.get_calls += 1
+        return {'Body': FakeBody(self.objects[(Bucket, Key)])}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise KeyError(Key)
+        return {'ContentLength': len(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+class TestDirectoryStorage:
+    """Test the directory-based object store stand-in."""
+
+    def test_multipart_roundtrip(self, tmp_path):
+        """Test encrypt-and-ship through concurrent part uploads."""
+        storage = DirectoryStorage(str(tmp_path / "bucket"), part_size=64 * 1024, max_workers=3)
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"), storage=storage)
+        data = os.urandom(1024 * 1024 + 11)
+        source = tmp_path / "backup.tar"
+        source.write_bytes(data)
+
+        location, key_id = vault.encrypt_file(str(source))
+        assert location.startswith("dir://")
+        assert (tmp_path / "bucket" / "backup.tar.encrypted").exists()
+        assert not list((tmp_path / "bucket" / ".uploads").iterdir())
+        assert not (tmp_path / "sandbox" / "backup.tar.encrypted").exists()
+
+        decrypted = vault.decrypt_file("backup.tar.encrypted", key=vault.list_keys()[key_id]['key'])
+        assert Path(decrypted).read_bytes() == data
+
+    def test_failed_write_publishes_nothing(self, tmp_path):
+        """Test that an aborted upload leaves no object behind."""
+        storage = DirectoryStorage(str(tmp_path / "bucket"), part_size=16)
+
+        with pytest.raises(RuntimeError):
+            with storage.writer("partial.encrypted") as dst:
+                dst.write(b"x" * 100)
+                raise RuntimeError("producer failed")
+
+        assert not storage.exists("partial.encrypted")
+        assert not list((tmp_path / "bucket" / ".uploads").iterdir())
+
+
+class TestS3Storage:
+    """Test the S3 backend against a fake client."""
+
+    def test_multipart_upload(self, tmp_path):
+        """Test that large outputs are uploaded as ordered parts."""
+        client = FakeS3Client()
+        storage = S3Storage("backups", prefix="nightly", client=client, max_workers=4)
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"), storage=storage)
+        data = os.urandom(12 * 1024 * 1024)
+        source = tmp_path / "db.dump"
+        source.write_bytes(data)
+
+        location, key_id = vault.encrypt_file(str(source), password="S3Pass")
+
+        assert location == "s3://backups/nightly/db.dump.encrypted"
+        assert client.part_calls >= 2
+        assert vault.catalog.query()[0]['path'] == location
+
+        decrypted = vault.decrypt_file("db.dump.encrypted", password="S3Pass")
+        assert Path(decrypted).read_bytes() == data
+
+    def test_part_size_grows(self, monkeypatch):
+        """Test that parts get larger as an upload goes on."""
+        monkeypatch.setattr(storage_module, 'PART_GROWTH_INTERVAL', 2)
+        client = FakeS3Client()
+        storage = S3Storage("backups", client=client)
+        storage.part_size = 16
+        data = os.urandom(16 * 2 + 32 * 2 + 64 + 5)
+
+        with storage.writer("grown.bin") as dst:
+            for offset in range(0, len(data), 7):
+                dst.write(data[offset:offset + 7])
+
+        assert [client.part_sizes[n] for n in sorted(client.part_sizes)] == [16, 16, 32, 32, 64, 5]
+        assert client.objects[("backups", "grown.bin")] == data
+
+    def test_part_limit_reported_before_overflow(self, monkeypatch):
+        """Test that running out of parts fails clearly and aborts the upload."""
+        monkeypatch.setattr(storage_module, 'MAX_PARTS', 3)
+        client = FakeS3Client()
+        storage = S3Storage("backups", client=client)
+        storage.part_size = 16
+
+        with pytest.raises(ValueError, match="more than 3 parts"):
+            with storage.writer("huge.bin") as dst:
+                dst.write(b"x" * 16 * 4)
+
+        assert client.part_calls == 3
+        assert client.uploads == {} and client.objects == {}
+
+    def test_decrypt_reads_object_once(self, tmp_path):
+        """Test that the header peek and the decryption share one GET."""
+        client = FakeS3Client()
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"),
+                           storage=S3Storage("backups", client=client))
+        source = tmp_path / "db.dump"
+        source.write_bytes(os.urandom(300 * 1024))
+        vault.encrypt_file(str(source), password="S3Pass")
+        vault.encrypt_file(str(source), "split.encrypted", password="S3Pass", volume_size=128 * 1024)
+        client.get_calls = 0
+
+        decrypted = vault.decrypt_file("db.dump.encrypted", password="S3Pass")
+        assert client.get_calls == 1
+
+        client.get_calls = 0
+        vault.decrypt_file("split.encrypted", str(tmp_path / "split.out"), password="S3Pass")
+        # The index, then each of the three parts
+        assert client.get_calls == 4
+        assert Path(decrypted).read_bytes() == (tmp_path / "split.out").read_bytes() == source.read_bytes()
+
+    def test_small_object_single_put(self, tmp_path):
+        """Test that small outputs skip multipart uploads."""
+        client = FakeS3Client()
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"),
+                           storage=S3Storage("backups", client=client))
+        source = tmp_path / "note.txt"
+        source.write_bytes(b"small")
+
+        vault.encrypt_file(str(source))
+
+        assert client.part_calls == 0
+        assert ("backups", "note.txt.encrypted") in client.objects
+
+
+class TestStorageURLs:
+    """Test storage URL parsing."""
+
+    def test_local_default(self, tmp_path):
+        """Test that no URL selects the vault's own local storage."""
+        assert storage_from_url(None) is None
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"), storage=storage_from_url(None))
+        assert vault.storage is vault.local
+
+    def test_dir_url(self, tmp_path):
+        """Test dir:// URLs."""
+        storage = storage_from_url(f"dir://{tmp_path / 'objects'}")
+        assert isinstance(storage, DirectoryStorage)
+
+    def test_unknown_scheme(self):
+        """Test that unknown schemes are rejected."""
+        with pytest.raises(ValueError, match="Unsupported storage URL"):
+            storage_from_url("ftp://host/path")
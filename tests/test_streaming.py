@@ -0,0 +1,115 @@
+"""
+CryptVault Test Suite - Streaming Tests
+
+Tests for stream encryption and '-' stdin/stdout support in the CLI.
+"""
+
+import io
+import hashlib
+import os
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+
+
+class TestStreamAPI:
+    """Test encrypt_stream/decrypt_stream."""
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        """Create a CryptVault instance with temporary sandbox."""
+        sandbox = tmp_path / "sandbox"
+        return CryptVault(sandbox_dir=str(sandbox))
+
+    def test_stream_roundtrip(self, vault):
+        """Test that a stream round-trips through a saved key."""
+        vault.save_key("pipe", password="PipePass123")
+        data = os.urandom(2 * 1024 * 1024 + 3)
+
+        encrypted = io.BytesIO()
+        key_id = vault.encrypt_stream(io.BytesIO(data), encrypted, password="PipePass123", key_name="pipe")
+        decrypted = io.BytesIO()
+        vault.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted,
+                             password="PipePass123", key_name="pipe")
+
+        assert key_id == "pipe"
+        assert decrypted.getvalue() == data
+
+    def test_stream_reads_file_output(self, vault, tmp_path):
+        """Test that decrypt_stream accepts a file produced by encrypt_file."""
+        source = tmp_path / "doc.txt"
+        source.write_bytes(b"File to stream")
+        encrypted_path, key_id = vault.encrypt_file(str(source))
+
+        out = io.BytesIO()
+        with open(encrypted_path, 'rb') as src:
+            vault.decrypt_stream(src, out, key=vault.list_keys()[key_id]['key'])
+
+        assert out.getvalue() == b"File to stream"
+
+    def test_password_only_stream_needs_key_name(self, vault):
+        """Test that password-only decryption of an anonymous stream is rejected."""
+        with pytest.raises(ValueError, match="needs the key name"):
+            vault.decrypt_stream(io.BytesIO(b""), io.BytesIO(), password="pass")
+
+    def test_older_password_only_stream_decrypts_by_key_name(self, vault):
+        """Test that each password-only stream opens with the key reported for it."""
+        streams = []
+        for data in (b"first stream", b"second stream"):
+            encrypted = io.BytesIO()
+            key_id = vault.encrypt_stream(io.BytesIO(data), encrypted, password="StreamPass")
+            streams.append((data, key_id, encrypted.getvalue()))
+
+        with pytest.raises(ValueError, match="needs the key name"):
+            vault.decrypt_stream(io.BytesIO(streams[0][2]), io.BytesIO(), password="StreamPass")
+        for data, key_id, encrypted in streams:
+            out = io.BytesIO()
+            vault.decrypt_stream(io.BytesIO(encrypted), out, password="StreamPass", key_name=key_id)
+            assert out.getvalue() == data
+
+
+class TestStreamCLI:
+    """Test '-' for stdin/stdout in the CLI."""
+
+    def _run(self, sandbox, *args, data=b""):
+        return subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(sandbox), *args],
+            input=data, capture_output=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        )
+
+    def test_pipeline_roundtrip(self, tmp_path):
+        """Test encrypt - | decrypt - with no files in between."""
+        sandbox = tmp_path / "sandbox"
+        data = os.urandom(300 * 1024)
+        assert self._run(sandbox, "save-key", "pipe", "-p", "PipePass").returncode == 0
+
+        encrypted = self._run(sandbox, "encrypt", "-", "-k", "pipe", "-p", "PipePass", data=data)
+        assert encrypted.returncode == 0, encrypted.stderr
+        assert b"File encrypted" in encrypted.stderr
+
+        decrypted = self._run(sandbox, "decrypt", "-", "-n", "pipe", "-p", "PipePass",
+                              data=encrypted.stdout)
+        assert decrypted.returncode == 0, decrypted.stderr
+        assert decrypted.stdout == data
+        assert not list(sandbox.glob("*.encrypted"))
+
+    def test_stdin_to_file_is_cataloged(self, tmp_path):
+        """Test that encrypting stdin into a file records it like encrypt_file does."""
+        sandbox = tmp_path / "sandbox"
+        data = os.urandom(100 * 1024)
+        output = tmp_path / "out" / "piped.bin.encrypted"
+
+        result = self._run(sandbox, "encrypt", "-", "-o", str(output), "-p", "PipePass", data=data)
+        assert result.returncode == 0, result.stderr
+
+        entry = CryptVault(sandbox_dir=str(sandbox)).catalog.get(output)
+        assert entry['kind'] == 'encrypted'
+        assert entry['stored_size'] == output.stat().st_size
+        assert entry['plaintext_size'] == len(data)
+        assert entry['plaintext_hash'] == hashlib.sha256(data).hexdigest()
+        listing = self._run(sandbox, "ls", "--kind", "encrypted")
+        assert b"piped.bin.encrypted" in listing.stdout
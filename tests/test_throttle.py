@@ -0,0 +1,173 @@
+"""
+CryptVault Test Suite - Throttling Tests
+
+Tests for I/O rate limiting, the crypto concurrency cap and live adjustment.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.container import SegmentCipher
+from cryptvault.throttle import TokenBucket, ConcurrencyLimit, Throttle
+
+KIB = 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+class TestTokenBucket:
+    """Test rate limiting."""
+
+    def test_limits_rate(self):
+        """Test that consumers are held to the configured rate."""
+        bucket = TokenBucket(rate=1024 * KIB)
+        start = time.monotonic()
+        for _ in range(8):
+            bucket.consume(64 * KIB)
+        assert time.monotonic() - start >= 0.4
+
+    def test_unlimited_releases_waiters(self):
+        """Test that lifting the limit wakes a consumer in debt."""
+        bucket = TokenBucket(rate=KIB)
+        done = threading.Event()
+        thread = threading.Thread(target=lambda: (bucket.consume(100 * KIB), done.set()))
+        thread.start()
+        time.sleep(0.1)
+        assert not done.is_set()
+
+        bucket.set_rate(None)
+        assert done.wait(2)
+        thread.join()
+
+
+class TestConcurrencyLimit:
+    """Test the adjustable concurrency cap."""
+
+    def test_caps_and_raises(self):
+        """Test that the cap holds and can be raised while threads wait."""
+        limit = ConcurrencyLimit(1)
+        peak = {'now': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def work():
+            with limit:
+                with lock:
+                    peak['now'] += 1
+                    peak['max'] = max(peak['max'], peak['now'])
+                time.sleep(0.05)
+                with lock:
+                    peak['now'] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.02)
+        assert peak['max'] == 1
+        limit.set_limit(3)
+        for thread in threads:
+            thread.join()
+
+        assert 1 < peak['max'] <= 3
+
+
+class TestControlFile:
+    """Test live adjustment through the control file."""
+
+    def test_reload(self, tmp_path):
+        """Test that changes apply after a reload request and bad JSON is ignored."""
+        control = tmp_path / "limits.json"
+        control.write_text(json.dumps({'io_rate': 1000, 'crypto_workers': 2}))
+        throttle = Throttle(io_rate=5000, control_file=str(control))
+        assert throttle.io.rate == 1000
+        assert throttle.crypto.limit == 2
+
+        control.write_text(json.dumps({'io_rate': None, 'crypto_workers': 4}))
+        os.utime(control, ns=(time.time_ns() + 10 ** 9,) * 2)
+        throttle.request_reload()
+        throttle.poll()
+        assert throttle.io.rate is None
+        assert throttle.crypto.limit == 4
+
+        control.write_text("{half written")
+        os.utime(control, ns=(time.time_ns() + 2 * 10 ** 9,) * 2)
+        throttle.request_reload()
+        throttle.poll()
+        assert throttle.crypto.limit == 4
+
+
+class TestThrottledOperations:
+    """Test throttles applied to vault operations."""
+
+    def test_io_rate_slows_encryption(self, vault, tmp_path):
+        """Test that reads and writes are metered."""
+        source = tmp_path / "data.bin"
+        source.write_bytes(os.urandom(512 * KIB))
+
+        start = time.monotonic()
+        encrypted, _ = vault.encrypt_file(str(source), password="ThrottlePass",
+                                          throttle=Throttle(io_rate=1024 * KIB))
+        assert time.monotonic() - start >= 0.7
+
+        decrypted = vault.decrypt_file(encrypted, password="ThrottlePass")
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_crypto_workers_cap_batch(self, vault, tmp_path, monkeypatch):
+        """Test that batch threads share the cipher cap."""
+        src = tmp_path / "src"
+        src.mkdir()
+        for i in range(4):
+            (src / f"f{i}.bin").write_bytes(os.urandom(3 * 1024 * KIB))
+
+        original = SegmentCipher.encrypt_segment
+        state = {'now': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def counting(self, index, data, final):
+            with lock:
+                state['now'] += 1
+                state['max'] = max(state['max'], state['now'])
+            time.sleep(0.01)
+            try:
+                return original(self, index, data, final)
+            finally:
+                with lock:
+                    state['now'] -= 1
+
+        monkeypatch.setattr(SegmentCipher, 'encrypt_segment', counting)
+        results = vault.encrypt_batch([str(src)], str(tmp_path / "enc"), password="ThrottlePass",
+                                      workers=4, throttle=Throttle(crypto_workers=1))
+
+        assert all(r.ok for r in results)
+        assert state['max'] == 1
+
+
+class TestThrottleCLI:
+    """Test the throttling flags."""
+
+    def test_flags(self, tmp_path):
+        """Test that limits and a control file are accepted on the command line."""
+        source = tmp_path / "doc.txt"
+        source.write_bytes(os.urandom(64 * KIB))
+        control = tmp_path / "limits.json"
+        control.write_text('{"crypto_workers": 1}')
+        root = Path(__file__).resolve().parent.parent
+
+        result = subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(tmp_path / "sandbox"), "encrypt", str(source), "-p", "CliPass",
+             "--io-rate", "10M", "--crypto-workers", "2", "--control-file", str(control)],
+            capture_output=True, text=True, cwd=root,
+        )
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "[OK] File encrypted" in result.stdout
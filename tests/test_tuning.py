@@ -0,0 +1,153 @@
+"""
+CryptVault Test Suite - Autotuning Tests
+
+Tests for measuring segment size and worker count against a target,
+caching the result per target and applying it to later runs.
+"""
+
+import os
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault import tuning as tuning_module
+from cryptvault.container import DEFAULT_SEGMENT_SIZE, read_header
+from cryptvault.scheduler import BatchScheduler
+from cryptvault.tuning import Tuning, benchmark
+
+KIB = 1024
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """Create a source directory with a few files."""
+    root = tmp_path / "src"
+    root.mkdir()
+    for i in range(3):
+        (root / f"file{i}.bin").write_bytes(os.urandom((i + 1) * MIB))
+    return root
+
+
+def _segment_size(path: str) -> int:
+    with open(path, 'rb') as f:
+        return read_header(f)[0]['segment_size']
+
+
+class TestBenchmark:
+    """Test the choice among measured candidates."""
+
+    def test_cheapest_setting_within_tolerance(self, tmp_path, monkeypatch):
+        """Test that near-ties go to smaller segments and fewer workers."""
+        rates = {(256 * KIB, 4): 100.0, (MIB, 4): 180.0, (4 * MIB, 4): 185.0,
+                 (MIB, 1): 60.0, (MIB, 2): 150.0, (MIB, 8): 200.0, (MIB, 16): 202.0}
+        monkeypatch.setattr(tuning_module, '_run',
+                            lambda source, storage, prefix, cipher, sample, size, workers:
+                            rates[(size, workers)])
+        source = tmp_path / "sample.bin"
+        source.write_bytes(bytes(8 * MIB))
+
+        result = benchmark(source, None, "", 'aes-256-gcm', sample_size=8 * MIB,
+                           segment_sizes=(256 * KIB, MIB, 4 * MIB), worker_counts=(1, 2, 8, 16))
+
+        assert (result.segment_size, result.workers) == (MIB, 8)
+
+    def test_scratch_files_removed(self, vault, sources, tmp_path):
+        """Test that a real run leaves only the cached result behind."""
+        target = tmp_path / "out"
+
+        result = vault.autotune([str(sources)], str(target), sample_size=2 * MIB)
+
+        assert list(target.iterdir()) == []
+        assert result.segment_size in tuning_module.SEGMENT_SIZES
+        assert result.workers in tuning_module.WORKER_COUNTS and result.throughput > 0
+
+
+class TestApplyingTuning:
+    """Test that cached results are used for later runs."""
+
+    def test_encrypt_file_uses_target_segment_size(self, vault, sources, tmp_path):
+        """Test that outputs below a tuned directory get its segment size."""
+        target = tmp_path / "out"
+        vault.tuning.store(str(target.resolve()), Tuning(256 * KIB, 3, 1.0, "2026-01-01T00:00:00"))
+        source = str(sources / "file1.bin")
+
+        tuned, _ = vault.encrypt_file(source, str(target / "nested" / "a.encrypted"), password="TunePass")
+        pinned, _ = vault.encrypt_file(source, str(target / "b.encrypted"), password="TunePass",
+                                       segment_size=2 * MIB)
+        other, _ = vault.encrypt_file(source, str(tmp_path / "elsewhere" / "c.encrypted"),
+                                      password="TunePass")
+
+        assert _segment_size(tuned) == 256 * KIB
+        assert _segment_size(pinned) == 2 * MIB
+        assert _segment_size(other) == DEFAULT_SEGMENT_SIZE
+        decrypted = vault.decrypt_file(tuned, password="TunePass")
+        assert Path(decrypted).read_bytes() == (sources / "file1.bin").read_bytes()
+
+    def test_cache_survives_restart(self, vault, tmp_path):
+        """Test that results are read back from the sandbox by a new vault."""
+        target = str((tmp_path / "out").resolve())
+        vault.tuning.store(target, Tuning(4 * MIB, 8, 1.0, "2026-01-01T00:00:00"))
+
+        reopened = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+        assert reopened.tuning.lookup(target).workers == 8
+
+    def test_batch_uses_tuned_workers(self, vault, sources, tmp_path, monkeypatch):
+        """Test that a batch without -j runs with the tuned worker count."""
+        target = tmp_path / "out"
+        vault.tuning.store(str(target.resolve()), Tuning(256 * KIB, 3, 1.0, "2026-01-01T00:00:00"))
+        seen = []
+
+        class RecordingScheduler(BatchScheduler):
+            def __init__(self, workers, memory_budget):
+                seen.append(workers)
+                super().__init__(workers, memory_budget)
+        monkeypatch.setattr('cryptvault.file_encryption_sandbox.BatchScheduler', RecordingScheduler)
+
+        results = vault.encrypt_batch([str(sources)], str(target), password="TunePass")
+        vault.encrypt_batch([str(sources)], str(target), password="TunePass", workers=2)
+
+        assert seen == [3, 2]
+        assert all(_segment_size(r.output) == 256 * KIB for r in results)
+
+    def test_batch_autotunes_once(self, vault, sources, tmp_path, monkeypatch):
+        """Test that --autotune only benchmarks a target without a cached result."""
+        calls = []
+        original = vault.autotune
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return original(*args, sample_size=MIB, **kwargs)
+        monkeypatch.setattr(vault, 'autotune', counting)
+
+        vault.encrypt_batch([str(sources)], str(tmp_path / "out"), password="TunePass", autotune=True)
+        vault.encrypt_batch([str(sources)], str(tmp_path / "out"), password="TunePass", autotune=True)
+
+        assert len(calls) == 1
+
+
+class TestAutotuneCLI:
+    """Test the autotune command."""
+
+    def test_reports_result(self, sources, tmp_path):
+        """Test that the command prints and caches the chosen setting."""
+        root = Path(__file__).resolve().parent.parent
+
+        result = subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(tmp_path / "sandbox"), "autotune", str(sources),
+             "-o", str(tmp_path / "out"), "--sample-size", "1M"],
+            capture_output=True, text=True, cwd=root,
+        )
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "[OK] Tuned" in result.stdout and "workers" in result.stdout
+        assert (tmp_path / "sandbox" / ".tuning.json").exists()
@@ -0,0 +1,197 @@
+"""
+CryptVault Test Suite - Split Volume Tests
+
+Tests for writing encrypted output as fixed-size parts with an index,
+checking parts without the key and reading them back in order or in
+parallel.
+"""
+
+import os
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.storage import DirectoryStorage, LocalStorage
+from cryptvault.volumes import VolumeWriter, part_name
+
+MIB = 1024 * 1024
+PART = 700 * 1024
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Create a plaintext file spanning several parts."""
+    path = tmp_path / "image.bin"
+    path.write_bytes(os.urandom(3 * MIB + 321))
+    return path
+
+
+def _parts(path: str) -> list:
+    return sorted(Path(path).parent.glob(f"{Path(path).name}.*"))
+
+
+class TestVolumeRoundTrip:
+    """Test encrypting to and decrypting from volume sets."""
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_round_trip(self, vault, source, tmp_path, workers):
+        """Test that parts decrypt in order and with parallel fetches."""
+        path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+
+        parts = _parts(path)
+        assert [p.name for p in parts] == [Path(part_name(path, n)).name for n in range(1, 6)]
+        assert all(p.stat().st_size == PART for p in parts[:-1])
+        decrypted = vault.decrypt_file(path, str(tmp_path / "out.bin"), password="VolumePass",
+                                       volume_workers=workers)
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_catalog_counts_all_parts(self, vault, source):
+        """Test that the stored size covers the parts and the index."""
+        path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+
+        stored = sum(p.stat().st_size for p in _parts(path)) + Path(path).stat().st_size
+        assert vault.catalog.get(Path(path))['stored_size'] == stored
+
+    def test_object_storage(self, source, tmp_path):
+        """Test volume sets in an object store."""
+        storage = DirectoryStorage(str(tmp_path / "bucket"), part_size=256 * 1024)
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"), storage=storage)
+
+        vault.encrypt_file(str(source), "image.bin.encrypted", password="VolumePass",
+                           volume_size=PART)
+
+        assert vault.verify_volumes("image.bin.encrypted").ok
+        decrypted = vault.decrypt_file("image.bin.encrypted", str(tmp_path / "out.bin"),
+                                       password="VolumePass", volume_workers=2)
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_resumable_refused(self, vault, source):
+        """Test that volumes and checkpointed encryption are not combined."""
+        with pytest.raises(ValueError, match="resumable"):
+            vault.encrypt_file(str(source), password="VolumePass", volume_size=PART, resumable=True)
+
+
+class TestVolumeWriter:
+    """Test part bookkeeping of the writer."""
+
+    def test_failed_write_removes_parts(self, tmp_path):
+        """Test that an error leaves neither parts nor an index behind."""
+        storage = LocalStorage(str(tmp_path))
+        name = str(tmp_path / "out.encrypted")
+
+        with pytest.raises(RuntimeError):
+            with VolumeWriter(storage, name, 10) as writer:
+                writer.write(b"x" * 25)
+                raise RuntimeError("interrupted")
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_overwrite_drops_extra_parts(self, tmp_path):
+        """Test that a shorter rewrite removes parts of the older set."""
+        storage = LocalStorage(str(tmp_path))
+        name = str(tmp_path / "out.encrypted")
+        with VolumeWriter(storage, name, 10) as writer:
+            writer.write(b"x" * 45)
+
+        with VolumeWriter(storage, name, 10) as writer:
+            writer.write(b"y" * 15)
+
+        assert [p.name for p in _parts(name)] == ["out.encrypted.g1.0001", "out.encrypted.g1.0002"]
+        assert writer.index['size'] == 15
+
+    def test_failed_overwrite_keeps_previous_set(self, vault, source, tmp_path):
+        """Test that an error while rewriting a set leaves the stored one readable."""
+        path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+        before = {p.name: p.read_bytes() for p in _parts(path)}
+        index = Path(path).read_bytes()
+
+        with pytest.raises(RuntimeError):
+            with VolumeWriter(LocalStorage(), path, PART) as writer:
+                writer.write(b"z" * (3 * PART))
+                raise RuntimeError("interrupted")
+
+        assert {p.name: p.read_bytes() for p in _parts(path)} == before
+        assert Path(path).read_bytes() == index
+        decrypted = vault.decrypt_file(path, str(tmp_path / "out.bin"), password="VolumePass")
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+    def test_rewrites_use_new_generations(self, vault, source, tmp_path):
+        """Test that successive rewrites decrypt and leave only the current parts."""
+        for _ in range(3):
+            path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+
+        assert [p.name for p in _parts(path)] == [f"image.bin.encrypted.g2.000{n}" for n in range(1, 6)]
+        decrypted = vault.decrypt_file(path, str(tmp_path / "out.bin"), password="VolumePass")
+        assert Path(decrypted).read_bytes() == source.read_bytes()
+
+
+class TestVolumeDamage:
+    """Test locating damaged parts."""
+
+    def test_damaged_and_missing_parts_listed(self, vault, source):
+        """Test that verification names exactly the parts to fetch again."""
+        path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+        parts = _parts(path)
+        original = parts[1].read_bytes()
+        data = bytearray(original)
+        data[100] ^= 0x01
+        parts[1].write_bytes(bytes(data))
+        parts[3].unlink()
+
+        report = vault.verify_volumes(path)
+        assert report.damaged == [2, 4]
+
+        parts[1].write_bytes(original)
+        assert vault.verify_volumes(path).damaged == [4]
+
+    def test_decrypt_names_damaged_part(self, vault, source):
+        """Test that a failed decryption points at the damaged part."""
+        path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+        part = _parts(path)[2]
+        data = bytearray(part.read_bytes())
+        data[50] ^= 0x01
+        part.write_bytes(bytes(data))
+
+        for workers in (1, 2):
+            with pytest.raises(ValueError, match=r"part 3 \(image.bin.encrypted.0003\)"):
+                vault.decrypt_file(path, password="VolumePass", volume_workers=workers)
+
+    def test_gc_removes_parts(self, vault, source):
+        """Test that collecting a volume set deletes its parts too."""
+        path, _ = vault.encrypt_file(str(source), password="VolumePass", volume_size=PART)
+
+        vault.gc(keep=0)
+
+        assert not Path(path).exists() and _parts(path) == []
+
+
+class TestVolumeCLI:
+    """Test the --volume-size option and volume verification."""
+
+    def test_encrypt_verify_decrypt(self, source, tmp_path):
+        """Test splitting, scrubbing and streaming a volume set back out."""
+        root = Path(__file__).resolve().parent.parent
+        output = tmp_path / "out" / "image.bin.encrypted"
+        base = [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+                "--sandbox-dir", str(tmp_path / "sandbox")]
+
+        def run(*args):
+            return subprocess.run(base + list(args), capture_output=True, cwd=root)
+
+        result = run("encrypt", str(source), "-o", str(output), "-p", "VolumePass", "--volume-size", "1M")
+        assert result.returncode == 0, result.stdout + result.stderr
+
+        result = run("verify", str(output.parent))
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert b"4 parts" in result.stdout
+
+        result = run("decrypt", str(output), "-o", "-", "-p", "VolumePass", "--volume-workers", "2")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == source.read_bytes()
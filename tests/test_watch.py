@@ -0,0 +1,146 @@
+"""
+CryptVault Test Suite - Watch Mode Tests
+
+Tests for debouncing, change detection and continuous encryption.
+"""
+
+import os
+import time
+import threading
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.watch import Debouncer, Watcher, InotifySource
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Create a CryptVault instance with temporary sandbox."""
+    return CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class _Running:
+    """Runs vault.watch in a background thread."""
+
+    def __init__(self, vault, src, dest, **kwargs):
+        self.stop = threading.Event()
+        self.results = []
+        self.count = None
+        self.thread = threading.Thread(target=self._run, args=(vault, src, dest, kwargs))
+        self.thread.start()
+
+    def _run(self, vault, src, dest, kwargs):
+        self.count = vault.watch(str(src), str(dest), stop=self.stop,
+                                 on_result=self.results.append, **kwargs)
+
+    def done(self, path):
+        return any(r.path == str(path) and r.ok for r in self.results)
+
+    def finish(self):
+        self.stop.set()
+        self.thread.join(10)
+        return self.count
+
+
+class TestDebouncer:
+    """Test the quiet-period logic."""
+
+    def test_changes_restart_timer(self):
+        """Test that a path is held back while it keeps changing."""
+        debouncer = Debouncer(delay=1.0)
+        debouncer.add([Path("a"), Path("b")], now=0.0)
+        debouncer.add([Path("a")], now=0.8)
+
+        assert debouncer.ready(now=1.0) == [Path("b")]
+        assert debouncer.next_deadline() == pytest.approx(1.8)
+        assert debouncer.ready(now=1.5) == []
+        assert debouncer.ready(now=1.8) == [Path("a")]
+        assert len(debouncer) == 0
+
+
+class TestWatcher:
+    """Test change sources."""
+
+    def test_output_and_temporary_files_ignored(self, tmp_path):
+        """Test that excluded directories and ignored suffixes never show up."""
+        src = tmp_path / "src"
+        (src / "out").mkdir(parents=True)
+        (src / "doc.txt").write_text("x")
+        (src / "out" / "doc.txt.encrypted").write_text("x")
+        (src / ".doc.txt.tmp").write_text("x")
+
+        watcher = Watcher(str(src), exclude=[str(src / "out")], ignore_suffixes=(".tmp",))
+        assert list(watcher.files()) == [src / "doc.txt"]
+
+
+class TestWatchMode:
+    """Test continuous encryption."""
+
+    @pytest.mark.parametrize("polling", [
+        True,
+        pytest.param(False, marks=pytest.mark.skipif(not InotifySource.available(),
+                                                     reason="inotify requires Linux")),
+    ])
+    def test_encrypts_new_and_changed_files(self, vault, tmp_path, monkeypatch, polling):
+        """Test the catch-up scan, new files in new directories and rewrites."""
+        src = tmp_path / "src"
+        src.mkdir()
+        existing = src / "existing.txt"
+        existing.write_bytes(b"already here")
+        derivations = []
+        original = vault._derive_key_from_password
+        monkeypatch.setattr(vault, '_derive_key_from_password',
+                            lambda *a: derivations.append(1) or original(*a))
+
+        running = _Running(vault, src, tmp_path / "enc", password="WatchPass",
+                           debounce=0.2, poll_interval=0.1, polling=polling)
+        try:
+            assert _wait_for(lambda: running.done(existing))
+            (src / "sub").mkdir()
+            added = src / "sub" / "new.txt"
+            added.write_bytes(b"first version")
+            assert _wait_for(lambda: running.done(added))
+            running.results.clear()
+            added.write_bytes(b"second version")
+            os.utime(added, ns=(time.time_ns() + 10 ** 9,) * 2)
+            assert _wait_for(lambda: running.done(added))
+        finally:
+            count = running.finish()
+
+        assert count == 3
+        assert len(derivations) == 1
+        decrypted = vault.decrypt_file(str(tmp_path / "enc" / "sub" / "new.txt.encrypted"),
+                                       password="WatchPass")
+        assert Path(decrypted).read_bytes() == b"second version"
+
+    def test_restart_skips_current_outputs(self, vault, tmp_path):
+        """Test that the catch-up scan only encrypts missing or stale outputs."""
+        src = tmp_path / "src"
+        src.mkdir()
+        for i in range(3):
+            (src / f"f{i}.txt").write_bytes(os.urandom(100))
+        stop = threading.Event()
+        stop.set()
+
+        assert vault.watch(str(src), str(tmp_path / "enc"), password="WatchPass", stop=stop) == 3
+        assert vault.watch(str(src), str(tmp_path / "enc"), password="WatchPass", stop=stop) == 0
+
+        os.utime(src / "f1.txt", ns=(time.time_ns() + 10 ** 9,) * 2)
+        results = []
+        vault.watch(str(src), str(tmp_path / "enc"), password="WatchPass", stop=stop,
+                    on_result=results.append)
+        assert [r.path for r in results] == [str(src / "f1.txt")]
+
+    def test_missing_source(self, vault, tmp_path):
+        """Test that a missing directory is reported before watching."""
+        with pytest.raises(FileNotFoundError):
+            vault.watch(str(tmp_path / "missing"), password="WatchPass")
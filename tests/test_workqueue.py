@@ -0,0 +1,142 @@
+"""
+CryptVault Test Suite - Distributed Work Queue Tests
+
+Tests for the SQLite lease queue and the enqueue/worker commands.
+"""
+
+import sys
+import shutil
+import subprocess
+import pytest
+from pathlib import Path
+from cryptvault import CryptVault
+from cryptvault.workqueue import WorkQueue, run_worker
+
+
+def _task(path, size):
+    return {'operation': 'encrypt', 'path': path, 'output': None, 'size': size}
+
+
+class TestWorkQueue:
+    """Test leasing, expiry and retries."""
+
+    @pytest.fixture
+    def queue(self, tmp_path):
+        """Create an empty queue."""
+        return WorkQueue(tmp_path / "queue.db", max_attempts=2)
+
+    def test_enqueue_is_idempotent(self, queue):
+        """Test that queueing the same file twice adds it once."""
+        assert queue.enqueue([_task("/a", 1), _task("/b", 2)]) == 2
+        assert queue.enqueue([_task("/a", 1)]) == 0
+        assert queue.report()['total'] == 2
+
+    def test_lease_largest_first_and_exclusive(self, queue):
+        """Test that leases hand out distinct tasks, largest first."""
+        queue.enqueue([_task("/small", 1), _task("/large", 100)])
+
+        first = queue.lease("w1")
+        second = queue.lease("w2")
+
+        assert first['path'] == "/large"
+        assert second['path'] == "/small"
+        assert queue.lease("w3") is None
+
+    def test_expired_lease_is_reclaimed(self, queue):
+        """Test that a dead worker's task is picked up by another."""
+        queue.enqueue([_task("/a", 1)])
+        task = queue.lease("dead", lease_seconds=-1)
+
+        retaken = queue.lease("alive")
+
+        assert retaken['id'] == task['id']
+        assert not queue.complete(task['id'], "dead")
+        assert queue.complete(task['id'], "alive", "/a.encrypted")
+        assert queue.report()['workers'] == {"alive": {'count': 1, 'bytes': 1}}
+
+    def test_retries_then_fails(self, queue):
+        """Test that a failing task is retried up to max_attempts."""
+        queue.enqueue([_task("/a", 1)])
+
+        for _ in range(2):
+            task = queue.lease("w")
+            queue.fail(task['id'], "w", "disk full")
+
+        assert queue.lease("w") is None
+        report = queue.report()
+        assert report['statuses']['failed']['count'] == 1
+        assert report['failures'] == [{'path': "/a", 'attempts': 2, 'error': "disk full"}]
+
+        assert queue.retry_failed() == 1
+        assert queue.lease("w")['path'] == "/a"
+
+    def test_run_worker_threads(self, queue):
+        """Test that worker threads drain the queue exactly once per task."""
+        queue.enqueue([_task(f"/f{i}", i) for i in range(20)])
+        seen = []
+
+        done = run_worker(queue, lambda task: (seen.append(task['path']), None),
+                          threads=4, wait=False)
+
+        assert done == 20
+        assert sorted(seen) == sorted(f"/f{i}" for i in range(20))
+        assert queue.drained()
+
+
+class TestDistributedVault:
+    """Test enqueue and worker processes sharing one queue."""
+
+    def _run(self, sandbox, *args):
+        return subprocess.run(
+            [sys.executable, "-m", "cryptvault.file_encryption_sandbox",
+             "--sandbox-dir", str(sandbox), *args],
+            capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        )
+
+    def test_encrypt_requires_saved_key(self, tmp_path):
+        """Test that queued encryption refuses per-worker auto keys."""
+        (tmp_path / "a.txt").write_text("a")
+        vault = CryptVault(sandbox_dir=str(tmp_path / "sandbox"))
+        queue = WorkQueue(tmp_path / "queue.db")
+        vault.enqueue(queue, [str(tmp_path / "a.txt")])
+
+        with pytest.raises(ValueError, match="saved key"):
+            vault.work(queue, password="pw", wait=False)
+
+    def test_two_workers_roundtrip(self, tmp_path):
+        """Test that two worker processes split a batch and it decrypts."""
+        source = tmp_path / "src"
+        (source / "sub").mkdir(parents=True)
+        for i in range(6):
+            (source / "sub" / f"f{i}.txt").write_bytes(bytes([i]) * (1000 * (i + 1)))
+        first, second = tmp_path / "host1", tmp_path / "host2"
+        queue = tmp_path / "queue.db"
+
+        assert self._run(first, "save-key", "nightly", "-p", "NightPass").returncode == 0
+        second.mkdir()
+        shutil.copy(first / ".keys.json", second / ".keys.json")
+        assert self._run(first, "enqueue", str(queue), str(source), "-o", str(tmp_path / "enc")).returncode == 0
+
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-m", "cryptvault.file_encryption_sandbox", "--sandbox-dir", str(sandbox),
+                 "worker", str(queue), "-n", "nightly", "-p", "NightPass"],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=Path(__file__).resolve().parent.parent,
+            )
+            for sandbox in (first, second)
+        ]
+        for worker in workers:
+            worker.communicate(timeout=120)
+            assert worker.returncode == 0
+
+        report = WorkQueue(queue).report()
+        assert report['statuses']['done']['count'] == 6
+
+        vault = CryptVault(sandbox_dir=str(first))
+        results = vault.decrypt_batch([str(tmp_path / "enc")], str(tmp_path / "out"),
+                                      password="NightPass", key_name="nightly")
+        assert all(r.ok for r in results)
+        for i in range(6):
+            assert (tmp_path / "out" / "sub" / f"f{i}.txt").read_bytes() == bytes([i]) * (1000 * (i + 1))